@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Backend Resilience Simulator
+Replays a request stream through the circuit-breaker and retry rules declared in the
+backend-pools Terraform module and reports backend load, retry amplification and shedding
+"""
+
+import argparse
+import heapq
+import json
+import random
+import re
+import sys
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Color codes
+class Colors:
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+    OKCYAN = '\033[96m'
+
+
+def print_section(title: str):
+    """Print section header"""
+    print(f"\n{Colors.BOLD}{Colors.OKCYAN}{'─'*80}{Colors.ENDC}")
+    print(f"{Colors.BOLD}{Colors.OKCYAN}{title}{Colors.ENDC}")
+    print(f"{Colors.BOLD}{Colors.OKCYAN}{'─'*80}{Colors.ENDC}")
+
+
+# ---------------------------------------------------------------------------
+# HCL parsing (the subset used by the backend-pools module)
+# ---------------------------------------------------------------------------
+
+_TOKEN_PATTERN = re.compile(r'\s+|#[^\n]*|//[^\n]*|/\*.*?\*/|[{}\[\]=,]|[^\s{}\[\]=,"#]+', re.S)
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split HCL into tokens; quoted strings keep their quotes and any ${...} interpolation."""
+    tokens: List[str] = []
+    position = 0
+    while position < len(text):
+        if text[position] == '"':
+            end = position + 1
+            depth = 0
+            while end < len(text):
+                char = text[end]
+                if char == '\\':
+                    end += 2
+                    continue
+                if text.startswith('${', end):
+                    depth += 1
+                    end += 2
+                    continue
+                if char == '}' and depth:
+                    depth -= 1
+                elif char == '"' and not depth:
+                    break
+                end += 1
+            tokens.append(text[position:end + 1])
+            position = end + 1
+            continue
+        match = _TOKEN_PATTERN.match(text, position)
+        if not match:
+            raise ValueError(f"Unexpected character {text[position]!r} at offset {position}")
+        token = match.group(0)
+        if not (token.isspace() or token.startswith(('#', '//', '/*'))):
+            tokens.append(token)
+        position = match.end()
+    return tokens
+
+
+def _literal(token: str) -> Any:
+    if token.startswith('"'):
+        return token[1:-1]
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return token  # references such as var.west_backends stay as text
+
+
+@dataclass
+class HclBlock:
+    type: str
+    labels: List[str] = field(default_factory=list)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    blocks: List['HclBlock'] = field(default_factory=list)
+
+    def children(self, block_type: str) -> List['HclBlock']:
+        return [block for block in self.blocks if block.type == block_type]
+
+    def child(self, block_type: str) -> Optional['HclBlock']:
+        found = self.children(block_type)
+        return found[0] if found else None
+
+
+def _skip_balanced(tokens: List[str], index: int) -> int:
+    """Index just past the bracket group opening at ``index``."""
+    depth = 0
+    while True:
+        if tokens[index] in ('{', '['):
+            depth += 1
+        elif tokens[index] in ('}', ']'):
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+
+
+def _parse_body(tokens: List[str], index: int, block: HclBlock) -> int:
+    while index < len(tokens) and tokens[index] != '}':
+        name = tokens[index]
+        index += 1
+        if tokens[index] == '=':
+            index += 1
+            if tokens[index] in ('{', '[') and tokens[index + 1] == 'for':
+                # for expressions (for_each maps) are kept as text, not evaluated
+                end = _skip_balanced(tokens, index)
+                block.attributes[name] = ' '.join(tokens[index:end])
+                index = end
+            elif tokens[index] == '[':
+                index += 1
+                values: List[Any] = []
+                while tokens[index] != ']':
+                    if tokens[index] != ',':
+                        values.append(_literal(tokens[index]))
+                    index += 1
+                block.attributes[name] = values
+                index += 1
+            elif tokens[index] == '{':
+                # Object values (required_providers entries) are parsed as anonymous blocks.
+                nested = HclBlock(type=name)
+                index = _parse_body(tokens, index + 1, nested) + 1
+                block.attributes[name] = nested.attributes
+            else:
+                block.attributes[name] = _literal(tokens[index])
+                index += 1
+                if index < len(tokens) and tokens[index] == '[':
+                    # Index into a reference, as in moved blocks: pool["west"]
+                    index = _skip_balanced(tokens, index)
+            continue
+        nested = HclBlock(type=name)
+        while tokens[index] != '{':
+            nested.labels.append(_literal(tokens[index]))
+            index += 1
+        index = _parse_body(tokens, index + 1, nested) + 1
+        block.blocks.append(nested)
+    return index
+
+
+def parse_hcl(text: str) -> HclBlock:
+    root = HclBlock(type='root')
+    _parse_body(_tokenize(text), 0, root)
+    return root
+
+
+# ---------------------------------------------------------------------------
+# Resilience rules
+# ---------------------------------------------------------------------------
+
+_DURATION_PATTERN = re.compile(r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?$')
+
+
+def parse_iso_duration(value: Any) -> float:
+    """Convert an ISO 8601 duration such as PT30S or PT2M to seconds; plain numbers are seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _DURATION_PATTERN.match(str(value).strip().upper())
+    if not match:
+        raise ValueError(f"Unsupported duration: {value}")
+    days, hours, minutes, seconds = (float(part) if part else 0.0 for part in match.groups())
+    return days * 86400 + hours * 3600 + minutes * 60 + seconds
+
+
+def parse_status_ranges(values: List[Any]) -> List[Tuple[int, int]]:
+    ranges: List[Tuple[int, int]] = []
+    for value in values:
+        low, _, high = str(value).partition('-')
+        ranges.append((int(low), int(high or low)))
+    return ranges
+
+
+def _status_matches(status: int, ranges: List[Tuple[int, int]]) -> bool:
+    return any(low <= status <= high for low, high in ranges)
+
+
+@dataclass
+class BreakerRule:
+    name: str
+    count: int
+    interval: float
+    trip_duration: float
+    status_ranges: List[Tuple[int, int]]
+
+
+@dataclass
+class RetryPolicy:
+    count: int
+    interval: float
+    status_ranges: List[Tuple[int, int]]
+
+
+@dataclass
+class PoolRules:
+    name: str
+    breaker_rules: List[BreakerRule]
+    retry: Optional[RetryPolicy]
+
+
+REGION_PLACEHOLDER = '<region>'
+
+
+def pool_matches(pool_name: str, wanted: str) -> bool:
+    """True when ``wanted`` is ``pool_name``, or one of the region pools it declares."""
+    pattern = re.escape(pool_name).replace(re.escape(REGION_PLACEHOLDER), '[a-z0-9-]+')
+    return re.fullmatch(pattern, wanted) is not None
+
+
+def load_pool_rules(module_file: Path) -> List[PoolRules]:
+    """Read breaker and retry rules for every azurerm_api_management_backend in ``module_file``."""
+    root = parse_hcl(module_file.read_text(encoding='utf-8'))
+    pools: List[PoolRules] = []
+    for resource in root.children('resource'):
+        if not resource.labels or resource.labels[0] != 'azurerm_api_management_backend':
+            continue
+        breaker_rules: List[BreakerRule] = []
+        breaker = resource.child('circuit_breaker')
+        for rule in breaker.children('rules') if breaker else []:
+            condition = rule.child('failure_condition')
+            breaker_rules.append(BreakerRule(
+                name=str(rule.attributes.get('name', f"rule-{len(breaker_rules) + 1}")),
+                count=int(condition.attributes['count']),
+                interval=parse_iso_duration(condition.attributes['interval']),
+                trip_duration=parse_iso_duration(rule.attributes['trip_duration']),
+                status_ranges=parse_status_ranges(condition.attributes.get('status_code_ranges', [])),
+            ))
+        retry_block = resource.child('retry')
+        retry = None
+        if retry_block:
+            condition = retry_block.child('on')
+            retry = RetryPolicy(
+                count=int(retry_block.attributes.get('count', 0)),
+                interval=float(retry_block.attributes.get('interval', 0)),
+                status_ranges=parse_status_ranges(condition.attributes.get('status_code_ranges', []) if condition else []),
+            )
+        pools.append(PoolRules(
+            # for_each pools declare one pool per region: doc-${each.key}-pool reads as doc-<region>-pool
+            name=str(resource.attributes.get('name', resource.labels[-1])).replace('${each.key}', REGION_PLACEHOLDER),
+            breaker_rules=breaker_rules,
+            retry=retry,
+        ))
+    return pools
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+
+@dataclass
+class BackendModel:
+    """Synthetic backend: admits ``capacity`` attempts per second, answers 429 beyond that."""
+    capacity: float
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+
+    def respond(self, now: float, admitted: Dict[int, int], rng: random.Random) -> int:
+        second = int(now)
+        admitted[second] = admitted.get(second, 0) + 1
+        if self.capacity > 0 and admitted[second] > self.capacity:
+            return 429
+        roll = rng.random()
+        if roll < self.error_rate:
+            return 500
+        if roll < self.error_rate + self.timeout_rate:
+            return 504
+        return 200
+
+
+def synthetic_arrivals(qps: float, duration: float, rng: random.Random) -> List[Tuple[float, Optional[int]]]:
+    """Poisson arrivals at ``qps`` for ``duration`` seconds."""
+    arrivals: List[Tuple[float, Optional[int]]] = []
+    now = rng.expovariate(qps)
+    while now < duration:
+        arrivals.append((now, None))
+        now += rng.expovariate(qps)
+    return arrivals
+
+
+def load_arrivals(trace_file: Path) -> List[Tuple[float, Optional[int]]]:
+    """Read a JSONL trace with ``t`` (seconds from start) and an optional recorded ``status``."""
+    arrivals: List[Tuple[float, Optional[int]]] = []
+    for line in trace_file.read_text(encoding='utf-8').splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        status = record.get('status')
+        arrivals.append((float(record['t']), int(status) if status is not None else None))
+    arrivals.sort(key=lambda arrival: arrival[0])
+    return arrivals
+
+
+def simulate(
+    rules: PoolRules,
+    arrivals: List[Tuple[float, Optional[int]]],
+    backend: BackendModel,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Run ``arrivals`` through the pool's retry and breaker rules on a virtual clock.
+
+    A recorded ``status`` replaces the backend model for the first attempt only; retries are
+    answered by the model. Attempts made while any breaker rule is tripped are shed without
+    reaching the backend and are not retried, matching the gateway failing fast on an open
+    circuit.
+    """
+    rng = random.Random(seed)
+    retry = rules.retry
+    events: List[Tuple[float, int, int, int, Optional[int]]] = []
+    for sequence, (arrival, recorded) in enumerate(arrivals):
+        heapq.heappush(events, (arrival, sequence, sequence, 0, recorded))
+    sequence = len(arrivals)
+
+    failures: Dict[str, List[float]] = {rule.name: [] for rule in rules.breaker_rules}
+    open_until: Dict[str, float] = {rule.name: 0.0 for rule in rules.breaker_rules}
+    open_intervals: List[Tuple[float, float]] = []
+    trips: Dict[str, int] = {rule.name: 0 for rule in rules.breaker_rules}
+    admitted: Dict[int, int] = {}
+    outcomes: Dict[int, str] = {}
+    attempts = 0
+    retries = 0
+    shed_attempts = 0
+    last_time = arrivals[-1][0] if arrivals else 0.0
+
+    while events:
+        now, _, request_id, attempt, recorded = heapq.heappop(events)
+        last_time = max(last_time, now)
+        if any(until > now for until in open_until.values()):
+            shed_attempts += 1
+            outcomes[request_id] = 'shed'
+            continue
+
+        attempts += 1
+        if attempt:
+            retries += 1
+        status = recorded if recorded is not None and attempt == 0 else backend.respond(now, admitted, rng)
+
+        for rule in rules.breaker_rules:
+            if not _status_matches(status, rule.status_ranges):
+                continue
+            window = [stamp for stamp in failures[rule.name] if now - stamp < rule.interval]
+            window.append(now)
+            failures[rule.name] = window
+            if len(window) >= rule.count:
+                open_until[rule.name] = now + rule.trip_duration
+                open_intervals.append((now, now + rule.trip_duration))
+                trips[rule.name] += 1
+                failures[rule.name] = []
+
+        if retry and attempt < retry.count and _status_matches(status, retry.status_ranges):
+            sequence += 1
+            heapq.heappush(events, (now + retry.interval, sequence, request_id, attempt + 1, None))
+            continue
+        outcomes[request_id] = 'ok' if 200 <= status < 400 else 'failed'
+
+    horizon = max(last_time, arrivals[-1][0] if arrivals else 0.0) or 1.0
+    open_seconds = 0.0
+    merged_end = 0.0
+    for start, end in sorted(open_intervals):
+        start, end = max(start, merged_end), min(end, horizon)
+        if end > start:
+            open_seconds += end - start
+            merged_end = end
+
+    requests = len(arrivals)
+    return {
+        'pool': rules.name,
+        'requests': requests,
+        'backend_attempts': attempts,
+        'retries': retries,
+        # Backend attempts per request that reached the backend at all, i.e. the retry multiplier.
+        'amplification': attempts / (attempts - retries) if attempts > retries else 0.0,
+        'offered_qps': requests / horizon,
+        'backend_qps': attempts / horizon,
+        'peak_backend_qps': max(admitted.values()) if admitted else 0,
+        'succeeded': sum(1 for outcome in outcomes.values() if outcome == 'ok'),
+        'failed': sum(1 for outcome in outcomes.values() if outcome == 'failed'),
+        'shed_requests': sum(1 for outcome in outcomes.values() if outcome == 'shed'),
+        'shed_attempts': shed_attempts,
+        'breaker_open_seconds': open_seconds,
+        'breaker_open_ratio': open_seconds / horizon,
+        'trips': trips,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print_section(f"Pool {report['pool']}")
+    print(f"  Client requests:       {report['requests']}")
+    print(f"  Backend attempts:      {report['backend_attempts']} ({report['retries']} retries)")
+    print(f"  Amplification factor:  {report['amplification']:.2f}x")
+    print(f"  Offered QPS:           {report['offered_qps']:.2f}")
+    print(f"  Effective backend QPS: {report['backend_qps']:.2f} (peak {report['peak_backend_qps']}/s)")
+    print(f"  Succeeded / failed:    {report['succeeded']} / {report['failed']}")
+    color = Colors.WARNING if report['shed_requests'] else Colors.OKGREEN
+    print(f"  Shed requests:         {color}{report['shed_requests']}{Colors.ENDC}")
+    print(f"  Breaker open time:     {report['breaker_open_seconds']:.1f}s ({report['breaker_open_ratio']:.0%})")
+    for name, count in report['trips'].items():
+        print(f"    {name:<20} tripped {count}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate backend-pool circuit-breaker and retry rules against a request stream"
+    )
+    parser.add_argument(
+        "--module",
+        type=Path,
+        default=Path(__file__).parent.parent.parent / "terraform" / "modules" / "backend-pools" / "main.tf",
+        help="Terraform file declaring the backend pools (default: backend-pools module)"
+    )
+    parser.add_argument("--pool", help="Only simulate this backend pool (e.g. doc-west-pool)")
+    parser.add_argument("--trace", type=Path, help="JSONL request stream with 't' seconds and optional 'status'")
+    parser.add_argument("--qps", type=float, default=20.0, help="Synthetic arrival rate (default: 20)")
+    parser.add_argument("--duration", type=float, default=300.0, help="Synthetic stream length in seconds (default: 300)")
+    parser.add_argument(
+        "--capacity",
+        type=float,
+        default=15.0,
+        help="Attempts per second the backend admits before answering 429 (0 = unlimited, default: 15)"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 5xx per admitted attempt")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Probability of a 504 per admitted attempt")
+    parser.add_argument("--retry-count", type=int, help="Override the retry count from Terraform")
+    parser.add_argument("--retry-interval", type=float, help="Override the retry interval from Terraform")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--json", action="store_true", help="Print reports as JSON")
+
+    args = parser.parse_args()
+
+    pools = load_pool_rules(args.module)
+    if args.pool:
+        pools = [replace(pool, name=args.pool) for pool in pools if pool_matches(pool.name, args.pool)]
+    if not pools:
+        print(f"{Colors.FAIL}No matching azurerm_api_management_backend resources in {args.module}{Colors.ENDC}")
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    arrivals = load_arrivals(args.trace) if args.trace else synthetic_arrivals(args.qps, args.duration, rng)
+    backend = BackendModel(args.capacity, args.error_rate, args.timeout_rate)
+
+    reports = []
+    for pool in pools:
+        if pool.retry and args.retry_count is not None:
+            pool.retry.count = args.retry_count
+        if pool.retry and args.retry_interval is not None:
+            pool.retry.interval = args.retry_interval
+        reports.append(simulate(pool, arrivals, backend, seed=args.seed))
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(f"\n{Colors.BOLD}{'='*80}{Colors.ENDC}")
+    print(f"{Colors.BOLD}APIM Document Intelligence - Backend Resilience Simulation{Colors.ENDC}")
+    print(f"{Colors.BOLD}{'='*80}{Colors.ENDC}")
+    for pool in pools:
+        retry = pool.retry
+        retry_text = f"{retry.count} retries every {retry.interval:g}s" if retry else "no retries"
+        rule_text = ", ".join(
+            f"{rule.name} {rule.count}x/{rule.interval:g}s trip {rule.trip_duration:g}s" for rule in pool.breaker_rules
+        )
+        print(f"{pool.name}: {retry_text}; {rule_text}")
+    for report in reports:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
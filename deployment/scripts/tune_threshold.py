@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Backend Switch Threshold Tuner
+Derives backend-switch-threshold from the completion latencies the tester recorded per backend,
+and optionally writes the new value to the APIM named value
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Color codes
+class Colors:
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+    OKCYAN = '\033[96m'
+
+
+def print_section(title: str):
+    """Print section header"""
+    print(f"\n{Colors.BOLD}{Colors.OKCYAN}{'─'*80}{Colors.ENDC}")
+    print(f"{Colors.BOLD}{Colors.OKCYAN}{title}{Colors.ENDC}")
+    print(f"{Colors.BOLD}{Colors.OKCYAN}{'─'*80}{Colors.ENDC}")
+
+
+NAMED_VALUES_DIR = Path(__file__).parent.parent.parent / "src" / "named-values"
+
+
+@dataclass
+class BackendLatency:
+    """Completion latencies observed for one backend, oldest first."""
+    backend: str
+    samples: List[float]
+
+    def percentile(self, percent: float) -> float:
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(percent / 100.0 * len(ordered))) - 1))
+        return ordered[index]
+
+
+def load_latencies(trace_files: List[Path], window: int) -> List[BackendLatency]:
+    """Read tester capture traces (JSONL with 'backend', 'latency', 'status', 'switched').
+
+    Only successful operations that finished where they were submitted count: a switched
+    operation's latency includes the switch itself, not one region's performance. The newest
+    ``window`` samples per backend are kept so the threshold follows drift.
+    """
+    entries: List[Dict[str, Any]] = []
+    for trace_file in trace_files:
+        with trace_file.open('r', encoding='utf-8') as handle:
+            entries.extend(json.loads(line) for line in handle if line.strip())
+    entries.sort(key=lambda entry: entry.get('timestamp') or '')
+
+    by_backend: Dict[str, List[float]] = {}
+    for entry in entries:
+        backend = entry.get('backend')
+        latency = entry.get('latency')
+        if not backend or backend == 'unknown' or not isinstance(latency, (int, float)):
+            continue
+        if entry.get('status', 200) != 200 or entry.get('switched'):
+            continue
+        by_backend.setdefault(backend, []).append(float(latency))
+    return [BackendLatency(backend, samples[-window:]) for backend, samples in sorted(by_backend.items())]
+
+
+def recommend(
+    latencies: List[BackendLatency],
+    current: float,
+    percentile: float,
+    headroom: float,
+    hysteresis: float,
+    min_samples: int,
+    floor: float,
+    ceiling: float,
+) -> Dict[str, Any]:
+    """Threshold = slowest backend's percentile plus headroom, changed only outside the hysteresis band.
+
+    Taking the slowest backend keeps a healthy-but-slower region from tripping switches; the band
+    keeps small drifts from rewriting the named value on every run.
+    """
+    backends = []
+    for item in latencies:
+        backends.append({
+            'backend': item.backend,
+            'samples': len(item.samples),
+            'p50': item.percentile(50),
+            'target': item.percentile(percentile),
+            'max': max(item.samples),
+            'used': len(item.samples) >= min_samples,
+        })
+    eligible = [backend['target'] for backend in backends if backend['used']]
+    report: Dict[str, Any] = {
+        'percentile': percentile,
+        'current': current,
+        'backends': backends,
+        'candidate': None,
+        'recommended': current,
+        'change': False,
+        'reason': '',
+    }
+    if not eligible:
+        report['reason'] = f"no backend has {min_samples} successful, unswitched samples"
+        return report
+
+    candidate = round(min(ceiling, max(floor, max(eligible) * (1 + headroom))), 1)
+    report['candidate'] = candidate
+    drift = abs(candidate - current) / current if current > 0 else float('inf')
+    if drift <= hysteresis:
+        report['reason'] = f"{drift:.0%} from current value, within the {hysteresis:.0%} hysteresis band"
+        return report
+    report['recommended'] = candidate
+    report['change'] = True
+    report['reason'] = f"{drift:.0%} from current value, outside the {hysteresis:.0%} hysteresis band"
+    return report
+
+
+def _az_named_value(args: argparse.Namespace, *extra: str) -> subprocess.CompletedProcess:
+    cmd = [
+        "az", "apim", "nv", *extra,
+        "--resource-group", args.resource_group,
+        "--service-name", args.service_name,
+        "--named-value-id", args.named_value,
+    ]
+    return subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+def read_current(args: argparse.Namespace) -> float:
+    """Current threshold: --current, else the live named value when --apply, else the repo default."""
+    if args.current is not None:
+        return args.current
+    if args.apply:
+        result = _az_named_value(args, "show", "--query", "value", "-o", "tsv")
+        return float(result.stdout.strip())
+    definition = json.loads((NAMED_VALUES_DIR / f"{args.named_value}.json").read_text(encoding='utf-8'))
+    return float(definition['properties']['value'])
+
+
+def print_report(report: Dict[str, Any], named_value: str):
+    print_section(f"Backend latency (p{report['percentile']:g} per backend)")
+    print(f"  {'Backend':<20} {'Samples':>8} {'p50 (s)':>9} {'p' + format(report['percentile'], 'g') + ' (s)':>9} {'Max (s)':>9}")
+    for backend in report['backends']:
+        note = '' if backend['used'] else f"  {Colors.WARNING}(too few samples, ignored){Colors.ENDC}"
+        print(
+            f"  {backend['backend']:<20} {backend['samples']:>8} {backend['p50']:>9.2f} "
+            f"{backend['target']:>9.2f} {backend['max']:>9.2f}{note}"
+        )
+
+    print_section(f"{named_value}")
+    print(f"  Current value:  {report['current']:g}s")
+    if report['candidate'] is not None:
+        print(f"  Candidate:      {report['candidate']:g}s")
+    color = Colors.OKGREEN if report['change'] else Colors.WARNING
+    verdict = f"set to {report['recommended']:g}s" if report['change'] else "keep current value"
+    print(f"  Recommendation: {color}{verdict}{Colors.ENDC} ({report['reason']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tune backend-switch-threshold from observed per-backend completion latencies"
+    )
+    parser.add_argument("traces", nargs="+", type=Path, help="Tester capture traces (--capture JSONL files)")
+    parser.add_argument("--percentile", type=float, default=95.0, help="Target percentile of completion time (default: 95)")
+    parser.add_argument("--headroom", type=float, default=0.2, help="Fraction added above the percentile (default: 0.2)")
+    parser.add_argument(
+        "--hysteresis",
+        type=float,
+        default=0.15,
+        help="Only change the threshold when the candidate differs from it by more than this fraction (default: 0.15)"
+    )
+    parser.add_argument("--window", type=int, default=500, help="Newest samples kept per backend (default: 500)")
+    parser.add_argument("--min-samples", type=int, default=30, help="Samples a backend needs to count (default: 30)")
+    parser.add_argument("--min", dest="floor", type=float, default=1.0, help="Lowest threshold to recommend (default: 1)")
+    parser.add_argument("--max", dest="ceiling", type=float, default=120.0, help="Highest threshold to recommend (default: 120)")
+    parser.add_argument("--current", type=float, help="Current threshold; read from the named value when omitted")
+    parser.add_argument(
+        "--named-value",
+        default="backend-switch-threshold",
+        help="Named value to tune (default: backend-switch-threshold)"
+    )
+    parser.add_argument("--apply", action="store_true", help="Write the recommendation to the APIM named value via az")
+    parser.add_argument("--resource-group", help="Resource group of the APIM instance (required with --apply)")
+    parser.add_argument("--service-name", help="APIM instance name (required with --apply)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    args = parser.parse_args()
+    if args.apply and not (args.resource_group and args.service_name):
+        parser.error("--apply needs --resource-group and --service-name")
+
+    missing = [str(trace) for trace in args.traces if not trace.exists()]
+    if missing:
+        print(f"{Colors.FAIL}Trace not found: {', '.join(missing)}{Colors.ENDC}")
+        sys.exit(1)
+
+    try:
+        current = read_current(args)
+    except (subprocess.CalledProcessError, FileNotFoundError, KeyError, ValueError) as e:
+        print(f"{Colors.FAIL}Could not read the current {args.named_value} value: {e}{Colors.ENDC}")
+        sys.exit(1)
+
+    report = recommend(
+        load_latencies(args.traces, args.window),
+        current,
+        args.percentile,
+        args.headroom,
+        args.hysteresis,
+        args.min_samples,
+        args.floor,
+        args.ceiling,
+    )
+    report['named_value'] = args.named_value
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.named_value)
+
+    if not args.apply or not report['change']:
+        return
+    value = f"{report['recommended']:.1f}"
+    try:
+        _az_named_value(args, "update", "--value", value)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"{Colors.FAIL}Failed to update {args.named_value}: {getattr(e, 'stderr', '') or e}{Colors.ENDC}")
+        sys.exit(1)
+    # The results policy parses the threshold on every poll, so the next poll picks up the new value.
+    print(f"{Colors.OKGREEN}✓ {args.named_value} set to {value}{Colors.ENDC}")
+    print(f"  Terraform will revert it on the next apply unless the matching variable is set to {value}")
+
+
+if __name__ == "__main__":
+    main()
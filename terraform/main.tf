@@ -40,8 +40,7 @@ module "backend_pools" {
   apim_id             = data.azurerm_api_management.apim.id
   resource_group_name = var.resource_group_name
   
-  west_backends       = var.west_backend_endpoints
-  north_backends      = var.north_backend_endpoints
+  regions             = var.backend_regions
   
   tags = var.tags
 }
@@ -54,10 +53,17 @@ module "named_values" {
   resource_group_name = var.resource_group_name
   subscription_id     = var.subscription_id
   
-  active_backend             = var.active_backend
-  backend_switch_threshold   = var.backend_switch_threshold
-  circuit_breaker_threshold  = var.circuit_breaker_threshold
-  circuit_breaker_timeout    = var.circuit_breaker_timeout
+  backend_pools                  = module.backend_pools.pool_ids
+  backend_endpoints              = module.backend_pools.pool_endpoints
+  active_backend                 = coalesce(var.active_backend, module.backend_pools.pool_ids[0])
+  backend_switch_threshold       = var.backend_switch_threshold
+  backend_switch_batch_threshold = var.backend_switch_batch_threshold
+  backend_switch_cooldown        = var.backend_switch_cooldown
+  backend_prewarm_requests       = var.backend_prewarm_requests
+  backend_routing_mode           = var.backend_routing_mode
+  backend_probe_product          = var.backend_probe_product
+  circuit_breaker_threshold      = var.circuit_breaker_threshold
+  circuit_breaker_timeout        = var.circuit_breaker_timeout
   
   tags = var.tags
 }
@@ -86,8 +92,7 @@ module "api_policies" {
   resource_group_name        = var.resource_group_name
   api_name                   = module.document_intelligence_api.api_name
   
-  west_pool_id               = module.backend_pools.west_pool_id
-  north_pool_id              = module.backend_pools.north_pool_id
+  backend_pool_ids           = module.backend_pools.pool_ids
   
   depends_on = [
     module.document_intelligence_api
@@ -146,3 +146,109 @@ resource "azurerm_api_management_api_operation" "analyze_results" {
     }
   }
 }
+
+# Analyze Batch operation
+resource "azurerm_api_management_api_operation" "analyze_batch" {
+  operation_id        = "post-documentintelligence-documentmodels-modelid-analyzebatch"
+  api_name            = azurerm_api_management_api.document_intelligence.name
+  api_management_name = var.apim_name
+  resource_group_name = var.resource_group_name
+  display_name        = "Analyze Batch Documents"
+  method              = "POST"
+  url_template        = "/documentintelligence/documentModels/{modelId}:analyzeBatch"
+  description         = "Analyze the documents in a blob container; results are written to resultContainerUrl"
+  
+  template_parameter {
+    name     = "modelId"
+    required = true
+    type     = "string"
+  }
+  
+  request {
+    query_parameter {
+      name      = "api-version"
+      required  = true
+      type      = "string"
+      values    = ["2024-11-30"]
+      default_value = "2024-11-30"
+    }
+    
+    query_parameter {
+      name     = "pages"
+      required = false
+      type     = "string"
+    }
+    
+    query_parameter {
+      name     = "locale"
+      required = false
+      type     = "string"
+    }
+    
+    representation {
+      content_type = "application/json"
+    }
+  }
+  
+  response {
+    status_code = 202
+    description = "Accepted"
+  }
+  
+  response {
+    status_code = 400
+    description = "Bad Request"
+  }
+  
+  response {
+    status_code = 401
+    description = "Unauthorized"
+  }
+  
+  response {
+    status_code = 429
+    description = "Too Many Requests"
+  }
+}
+
+# Analyze Batch Results operation
+resource "azurerm_api_management_api_operation" "analyze_batch_results" {
+  operation_id        = "analyzeBatchResults"
+  api_name            = azurerm_api_management_api.document_intelligence.name
+  api_management_name = var.apim_name
+  resource_group_name = var.resource_group_name
+  display_name        = "analyzeBatchResults"
+  method              = "GET"
+  url_template        = "/documentintelligence/documentModels/{modelId}/analyzeBatchResults/{resultId}"
+  description         = "Get batch analysis status and per-document result locations"
+  
+  template_parameter {
+    name     = "modelId"
+    required = true
+    type     = "string"
+  }
+  
+  template_parameter {
+    name     = "resultId"
+    required = true
+    type     = "string"
+  }
+  
+  request {
+    query_parameter {
+      name      = "api-version"
+      required  = true
+      type      = "string"
+      values    = ["2024-11-30"]
+    }
+  }
+  
+  response {
+    status_code = 200
+    description = "Success"
+    
+    representation {
+      content_type = "application/json"
+    }
+  }
+}
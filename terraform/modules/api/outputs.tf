@@ -22,3 +22,13 @@ output "analyze_results_operation_id" {
   description = "Operation ID for analyze results endpoint"
   value       = azurerm_api_management_api_operation.analyze_results.operation_id
 }
+
+output "analyze_batch_operation_id" {
+  description = "Operation ID for analyze batch endpoint"
+  value       = azurerm_api_management_api_operation.analyze_batch.operation_id
+}
+
+output "analyze_batch_results_operation_id" {
+  description = "Operation ID for analyze batch results endpoint"
+  value       = azurerm_api_management_api_operation.analyze_batch_results.operation_id
+}
@@ -10,21 +10,23 @@ terraform {
   }
 }
 
-# West Region Backend Pool
-resource "azurerm_api_management_backend" "west_pool" {
-  name                = "doc-west-pool"
+# One backend pool per region, named doc-<region>-pool
+resource "azurerm_api_management_backend" "pool" {
+  for_each = { for region in var.regions : region.name => region }
+
+  name                = "doc-${each.key}-pool"
   resource_group_name = var.resource_group_name
   api_management_name = var.apim_name
   protocol            = "http"
   url                 = "https://placeholder.cognitiveservices.azure.com"
-  description         = "Document Intelligence West Region Pool"
+  description         = "Document Intelligence ${title(each.key)} Region Pool"
   
   # Backend pool configuration with priority-based load balancing
   pool {
     dynamic "backend" {
-      for_each = var.west_backends
+      for_each = each.value.endpoints
       content {
-        name     = "west-backend-${backend.value.priority}"
+        name     = "${each.key}-backend-${backend.value.priority}"
         priority = backend.value.priority
         weight   = 1
         address  = backend.value.url
@@ -92,84 +94,13 @@ resource "azurerm_api_management_backend" "west_pool" {
   }
 }
 
-# North Region Backend Pool
-resource "azurerm_api_management_backend" "north_pool" {
-  name                = "doc-north-pool"
-  resource_group_name = var.resource_group_name
-  api_management_name = var.apim_name
-  protocol            = "http"
-  url                 = "https://placeholder.cognitiveservices.azure.com"
-  description         = "Document Intelligence North Region Pool"
-  
-  # Backend pool configuration with priority-based load balancing
-  pool {
-    dynamic "backend" {
-      for_each = var.north_backends
-      content {
-        name     = "north-backend-${backend.value.priority}"
-        priority = backend.value.priority
-        weight   = 1
-        address  = backend.value.url
-        port     = 443
-      }
-    }
-  }
-
-  # Circuit breaker configuration (same as west)
-  circuit_breaker {
-    rules {
-      failure_condition {
-        count         = 3
-        error_reasons = ["ServerError"]
-        interval      = "PT30S"
-        status_code_ranges = [
-          "500-599"
-        ]
-      }
-      name         = "server-errors"
-      trip_duration = "PT1M"
-    }
-    
-    rules {
-      failure_condition {
-        count         = 5
-        error_reasons = ["RequestTimeout"]
-        interval      = "PT30S"
-        status_code_ranges = [
-          "408",
-          "504"
-        ]
-      }
-      name         = "timeouts"
-      trip_duration = "PT1M"
-    }
-    
-    rules {
-      failure_condition {
-        count         = 10
-        error_reasons = ["TooManyRequests"]
-        interval      = "PT1M"
-        status_code_ranges = [
-          "429"
-        ]
-      }
-      name         = "rate-limiting"
-      trip_duration = "PT2M"
-    }
-  }
+# Pools created before regions became a list keep their state
+moved {
+  from = azurerm_api_management_backend.west_pool
+  to   = azurerm_api_management_backend.pool["west"]
+}
 
-  # Retry policy for transient failures
-  retry {
-    count    = 3
-    interval = 1
-    
-    on {
-      error_type = ["ServerError", "TooManyRequests"]
-      status_code_ranges = [
-        "408",
-        "429",
-        "500-599"
-      ]
-    }
-  }
+moved {
+  from = azurerm_api_management_backend.north_pool
+  to   = azurerm_api_management_backend.pool["north"]
 }
@@ -1,19 +1,14 @@
-output "west_pool_id" {
-  description = "Backend pool ID for West region"
-  value       = azurerm_api_management_backend.west_pool.name
+output "pool_ids" {
+  description = "Backend pool IDs in failover order"
+  value       = [for region in var.regions : azurerm_api_management_backend.pool[region.name].name]
 }
 
-output "north_pool_id" {
-  description = "Backend pool ID for North region"
-  value       = azurerm_api_management_backend.north_pool.name
-}
-
-output "west_pool_name" {
-  description = "Backend pool name for West region"
-  value       = azurerm_api_management_backend.west_pool.name
-}
-
-output "north_pool_name" {
-  description = "Backend pool name for North region"
-  value       = azurerm_api_management_backend.north_pool.name
+output "pool_endpoints" {
+  description = "Primary endpoint URL (lowest priority number) of each backend pool, keyed by pool ID"
+  value = {
+    for region in var.regions : azurerm_api_management_backend.pool[region.name].name => [
+      for endpoint in region.endpoints : endpoint.url
+      if endpoint.priority == min([for candidate in region.endpoints : candidate.priority]...)
+    ][0]
+  }
 }
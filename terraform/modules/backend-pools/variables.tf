@@ -13,21 +13,15 @@ variable "resource_group_name" {
   type        = string
 }
 
-variable "west_backends" {
-  description = "List of backend endpoints for West region"
+variable "regions" {
+  description = "Regions in failover order, each with the endpoints of its pool"
   type = list(object({
-    url      = string
-    title    = string
-    priority = number
-  }))
-}
-
-variable "north_backends" {
-  description = "List of backend endpoints for North region"
-  type = list(object({
-    url      = string
-    title    = string
-    priority = number
+    name = string
+    endpoints = list(object({
+      url      = string
+      title    = string
+      priority = number
+    }))
   }))
 }
 
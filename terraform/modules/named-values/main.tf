@@ -19,6 +19,37 @@ resource "azurerm_api_management_named_value" "active_backend" {
   secret              = false
   
   tags = ["backend", "configuration"]
+
+  lifecycle {
+    precondition {
+      condition     = contains(var.backend_pools, var.active_backend)
+      error_message = "Active backend must be one of the configured backend pools."
+    }
+  }
+}
+
+# Backend pools in failover order; the policies validate backendId against it and switch down the list
+resource "azurerm_api_management_named_value" "backend_pools" {
+  name                = "doc-backend-pools"
+  resource_group_name = var.resource_group_name
+  api_management_name = var.apim_name
+  display_name        = "doc-backend-pools"
+  value               = join(",", var.backend_pools)
+  secret              = false
+  
+  tags = ["backend", "configuration"]
+}
+
+# Primary endpoint of each pool (pool=url,...); the results policy pre-warms the switch target there directly
+resource "azurerm_api_management_named_value" "backend_endpoints" {
+  name                = "doc-backend-endpoints"
+  resource_group_name = var.resource_group_name
+  api_management_name = var.apim_name
+  display_name        = "doc-backend-endpoints"
+  value               = join(",", [for pool in var.backend_pools : "${pool}=${var.backend_endpoints[pool]}"])
+  secret              = false
+  
+  tags = ["backend", "prewarm", "configuration"]
 }
 
 # Backend switch latency threshold (seconds)
@@ -33,6 +64,66 @@ resource "azurerm_api_management_named_value" "backend_switch_threshold" {
   tags = ["backend", "threshold", "configuration"]
 }
 
+# Backend switch threshold for analyzeBatch operations (seconds)
+resource "azurerm_api_management_named_value" "backend_switch_batch_threshold" {
+  name                = "backend-switch-batch-threshold"
+  resource_group_name = var.resource_group_name
+  api_management_name = var.apim_name
+  display_name        = "backend-switch-batch-threshold"
+  value               = tostring(var.backend_switch_batch_threshold)
+  secret              = false
+  
+  tags = ["backend", "threshold", "batch", "configuration"]
+}
+
+# Cooldown between automatic backend switches (seconds)
+resource "azurerm_api_management_named_value" "backend_switch_cooldown" {
+  name                = "backend-switch-cooldown"
+  resource_group_name = var.resource_group_name
+  api_management_name = var.apim_name
+  display_name        = "backend-switch-cooldown"
+  value               = tostring(var.backend_switch_cooldown)
+  secret              = false
+  
+  tags = ["backend", "cooldown", "configuration"]
+}
+
+# Warm-up burst sent to the target pool before an automatic switch (0 disables it)
+resource "azurerm_api_management_named_value" "backend_prewarm_requests" {
+  name                = "backend-prewarm-requests"
+  resource_group_name = var.resource_group_name
+  api_management_name = var.apim_name
+  display_name        = "backend-prewarm-requests"
+  value               = tostring(var.backend_prewarm_requests)
+  secret              = false
+  
+  tags = ["backend", "prewarm", "configuration"]
+}
+
+# Routing mode for new operations: failover (single active pool) or weighted (latency EWMA split)
+resource "azurerm_api_management_named_value" "backend_routing_mode" {
+  name                = "backend-routing-mode"
+  resource_group_name = var.resource_group_name
+  api_management_name = var.apim_name
+  display_name        = "backend-routing-mode"
+  value               = var.backend_routing_mode
+  secret              = false
+  
+  tags = ["backend", "routing", "configuration"]
+}
+
+# Product whose subscriptions may mark requests as health probes; probe=true from anyone else is ignored
+resource "azurerm_api_management_named_value" "backend_probe_product" {
+  name                = "backend-probe-product"
+  resource_group_name = var.resource_group_name
+  api_management_name = var.apim_name
+  display_name        = "backend-probe-product"
+  value               = var.backend_probe_product
+  secret              = false
+  
+  tags = ["backend", "probe", "configuration"]
+}
+
 # Circuit breaker error rate threshold (percentage)
 resource "azurerm_api_management_named_value" "circuit_breaker_threshold" {
   name                = "circuit-breaker-threshold"
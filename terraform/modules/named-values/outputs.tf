@@ -3,11 +3,46 @@ output "active_backend_id" {
   value       = azurerm_api_management_named_value.active_backend.id
 }
 
+output "backend_pools_id" {
+  description = "Named value ID for the ranked backend pool list"
+  value       = azurerm_api_management_named_value.backend_pools.id
+}
+
+output "backend_endpoints_id" {
+  description = "Named value ID for the pools' primary endpoints"
+  value       = azurerm_api_management_named_value.backend_endpoints.id
+}
+
 output "backend_switch_threshold_id" {
   description = "Named value ID for backend switch threshold"
   value       = azurerm_api_management_named_value.backend_switch_threshold.id
 }
 
+output "backend_switch_batch_threshold_id" {
+  description = "Named value ID for backend switch batch threshold"
+  value       = azurerm_api_management_named_value.backend_switch_batch_threshold.id
+}
+
+output "backend_switch_cooldown_id" {
+  description = "Named value ID for backend switch cooldown"
+  value       = azurerm_api_management_named_value.backend_switch_cooldown.id
+}
+
+output "backend_prewarm_requests_id" {
+  description = "Named value ID for backend pre-warm requests"
+  value       = azurerm_api_management_named_value.backend_prewarm_requests.id
+}
+
+output "backend_routing_mode_id" {
+  description = "Named value ID for backend routing mode"
+  value       = azurerm_api_management_named_value.backend_routing_mode.id
+}
+
+output "backend_probe_product_id" {
+  description = "Named value ID for the health-prober product"
+  value       = azurerm_api_management_named_value.backend_probe_product.id
+}
+
 output "circuit_breaker_threshold_id" {
   description = "Named value ID for circuit breaker threshold"
   value       = azurerm_api_management_named_value.circuit_breaker_threshold.id
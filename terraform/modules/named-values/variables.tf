@@ -13,6 +13,16 @@ variable "subscription_id" {
   type        = string
 }
 
+variable "backend_pools" {
+  description = "Backend pool IDs in failover order"
+  type        = list(string)
+}
+
+variable "backend_endpoints" {
+  description = "Primary endpoint URL of each backend pool, keyed by pool ID"
+  type        = map(string)
+}
+
 variable "active_backend" {
   description = "Active backend pool identifier"
   type        = string
@@ -23,6 +33,31 @@ variable "backend_switch_threshold" {
   type        = number
 }
 
+variable "backend_switch_batch_threshold" {
+  description = "Latency threshold for backend switching on batch operations (seconds)"
+  type        = number
+}
+
+variable "backend_switch_cooldown" {
+  description = "Minimum seconds between automatic backend switches"
+  type        = number
+}
+
+variable "backend_prewarm_requests" {
+  description = "Warm-up requests sent to the target pool before an automatic switch"
+  type        = number
+}
+
+variable "backend_routing_mode" {
+  description = "Routing mode for new operations (failover or weighted)"
+  type        = string
+}
+
+variable "backend_probe_product" {
+  description = "APIM product ID whose subscriptions may send health probes"
+  type        = string
+}
+
 variable "circuit_breaker_threshold" {
   description = "Error rate percentage to trigger circuit breaker"
   type        = number
@@ -17,8 +17,7 @@ resource "azurerm_api_management_api_policy" "api_level" {
   resource_group_name = var.resource_group_name
   
   xml_content = templatefile("${path.module}/templates/api-level-policy.xml", {
-    west_pool_id  = var.west_pool_id
-    north_pool_id = var.north_pool_id
+    backend_pool_ids = var.backend_pool_ids
   })
 }
 
@@ -40,7 +39,28 @@ resource "azurerm_api_management_api_operation_policy" "analyze_results" {
   operation_id        = "analyzeResults"
   
   xml_content = templatefile("${path.module}/templates/analyze-results-operation-policy.xml", {
-    west_pool_id  = var.west_pool_id
-    north_pool_id = var.north_pool_id
+    backend_pool_ids = var.backend_pool_ids
+  })
+}
+
+# Analyze Batch operation policy (POST): same Operation-Location rewrite as single-document analyze
+resource "azurerm_api_management_api_operation_policy" "analyze_batch" {
+  api_name            = var.api_name
+  api_management_name = var.apim_name
+  resource_group_name = var.resource_group_name
+  operation_id        = "post-documentintelligence-documentmodels-modelid-analyzebatch"
+  
+  xml_content = file("${path.module}/templates/analyze-operation-policy.xml")
+}
+
+# Analyze Batch Results operation policy (GET): the results policy switches batches on backend-switch-batch-threshold
+resource "azurerm_api_management_api_operation_policy" "analyze_batch_results" {
+  api_name            = var.api_name
+  api_management_name = var.apim_name
+  resource_group_name = var.resource_group_name
+  operation_id        = "analyzeBatchResults"
+  
+  xml_content = templatefile("${path.module}/templates/analyze-results-operation-policy.xml", {
+    backend_pool_ids = var.backend_pool_ids
   })
 }
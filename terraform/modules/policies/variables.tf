@@ -13,12 +13,7 @@ variable "api_name" {
   type        = string
 }
 
-variable "west_pool_id" {
-  description = "Backend pool ID for West region"
-  type        = string
-}
-
-variable "north_pool_id" {
-  description = "Backend pool ID for North region"
-  type        = string
+variable "backend_pool_ids" {
+  description = "Backend pool IDs in failover order"
+  type        = list(string)
 }
@@ -10,19 +10,19 @@ output "api_endpoint" {
   value       = "${data.azurerm_api_management.apim.gateway_url}/${var.api_path}"
 }
 
-output "west_pool_id" {
-  description = "Backend pool ID for West region"
-  value       = module.backend_pools.west_pool_id
-}
-
-output "north_pool_id" {
-  description = "Backend pool ID for North region"
-  value       = module.backend_pools.north_pool_id
+output "backend_pool_ids" {
+  description = "Backend pool IDs in failover order"
+  value       = module.backend_pools.pool_ids
 }
 
 output "active_backend" {
   description = "Currently active backend pool"
-  value       = var.active_backend
+  value       = coalesce(var.active_backend, module.backend_pools.pool_ids[0])
+}
+
+output "backend_routing_mode" {
+  description = "Routing mode for new operations"
+  value       = var.backend_routing_mode
 }
 
 output "backend_switch_threshold" {
@@ -30,6 +30,11 @@ output "backend_switch_threshold" {
   value       = var.backend_switch_threshold
 }
 
+output "backend_switch_batch_threshold" {
+  description = "Configured backend switch threshold for batch operations in seconds"
+  value       = var.backend_switch_batch_threshold
+}
+
 output "api_name" {
   description = "Name of the deployed API"
   value       = module.document_intelligence_api.api_name
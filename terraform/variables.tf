@@ -22,13 +22,13 @@ variable "api_path" {
 }
 
 variable "active_backend" {
-  description = "Active backend pool (doc-west-pool or doc-north-pool)"
+  description = "Active backend pool (doc-<region>-pool for one of backend_regions); defaults to the first region"
   type        = string
-  default     = "doc-west-pool"
+  default     = null
   
   validation {
-    condition     = contains(["doc-west-pool", "doc-north-pool"], var.active_backend)
-    error_message = "Active backend must be either 'doc-west-pool' or 'doc-north-pool'."
+    condition     = var.active_backend == null || can(regex("^doc-[a-z0-9-]+-pool$", var.active_backend))
+    error_message = "Active backend must be a pool ID of the form 'doc-<region>-pool'."
   }
 }
 
@@ -43,6 +43,61 @@ variable "backend_switch_threshold" {
   }
 }
 
+variable "backend_switch_batch_threshold" {
+  description = "Seconds an analyzeBatch operation may run before its polls trigger an automatic backend switch"
+  type        = number
+  default     = 300
+  
+  validation {
+    condition     = var.backend_switch_batch_threshold > 0 && var.backend_switch_batch_threshold <= 86400
+    error_message = "Backend switch batch threshold must be between 0 and 86400 seconds."
+  }
+}
+
+variable "backend_switch_cooldown" {
+  description = "Cooldown in seconds during which only one automatic backend switch may happen gateway-wide"
+  type        = number
+  default     = 60
+  
+  validation {
+    condition     = var.backend_switch_cooldown >= 1 && var.backend_switch_cooldown <= 3600 && floor(var.backend_switch_cooldown) == var.backend_switch_cooldown
+    error_message = "Backend switch cooldown must be a whole number of seconds between 1 and 3600."
+  }
+}
+
+variable "backend_prewarm_requests" {
+  description = "Warm-up requests sent to the target pool just before an automatic switch (0 disables pre-warming)"
+  type        = number
+  default     = 3
+  
+  validation {
+    condition     = var.backend_prewarm_requests >= 0 && var.backend_prewarm_requests <= 5 && floor(var.backend_prewarm_requests) == var.backend_prewarm_requests
+    error_message = "Backend pre-warm requests must be a whole number between 0 and 5."
+  }
+}
+
+variable "backend_routing_mode" {
+  description = "failover sends every new operation to doc-active-backend; weighted splits them across pools by completion-latency EWMA"
+  type        = string
+  default     = "failover"
+  
+  validation {
+    condition     = contains(["failover", "weighted"], var.backend_routing_mode)
+    error_message = "Backend routing mode must be either 'failover' or 'weighted'."
+  }
+}
+
+variable "backend_probe_product" {
+  description = "ID of the APIM product whose subscriptions may send health probes (probe=true); other callers' probe markers are ignored"
+  type        = string
+  default     = "backend-health-prober"
+  
+  validation {
+    condition     = can(regex("^[A-Za-z0-9][A-Za-z0-9-]{0,79}$", var.backend_probe_product))
+    error_message = "Backend probe product must be an APIM product ID: letters, digits and hyphens, at most 80 characters."
+  }
+}
+
 variable "circuit_breaker_threshold" {
   description = "Error rate percentage to trigger circuit breaker (0-100)"
   type        = number
@@ -65,46 +120,58 @@ variable "circuit_breaker_timeout" {
   }
 }
 
-variable "west_backend_endpoints" {
-  description = "List of Document Intelligence endpoints for West region"
+variable "backend_regions" {
+  description = "Document Intelligence regions in failover order; each becomes the backend pool doc-<name>-pool"
   type = list(object({
-    url     = string
-    title   = string
-    priority = number
+    name = string
+    endpoints = list(object({
+      url      = string
+      title    = string
+      priority = number
+    }))
   }))
   default = [
     {
-      url      = "https://di-west-primary.cognitiveservices.azure.com"
-      title    = "Document Intelligence West Primary"
-      priority = 1
+      name = "west"
+      endpoints = [
+        {
+          url      = "https://di-west-primary.cognitiveservices.azure.com"
+          title    = "Document Intelligence West Primary"
+          priority = 1
+        },
+        {
+          url      = "https://di-west-secondary.cognitiveservices.azure.com"
+          title    = "Document Intelligence West Secondary"
+          priority = 2
+        }
+      ]
     },
     {
-      url      = "https://di-west-secondary.cognitiveservices.azure.com"
-      title    = "Document Intelligence West Secondary"
-      priority = 2
-    }
-  ]
-}
-
-variable "north_backend_endpoints" {
-  description = "List of Document Intelligence endpoints for North region"
-  type = list(object({
-    url     = string
-    title   = string
-    priority = number
-  }))
-  default = [
-    {
-      url      = "https://di-north-primary.cognitiveservices.azure.com"
-      title    = "Document Intelligence North Primary"
-      priority = 1
-    },
-    {
-      url      = "https://di-north-secondary.cognitiveservices.azure.com"
-      title    = "Document Intelligence North Secondary"
-      priority = 2
+      name = "north"
+      endpoints = [
+        {
+          url      = "https://di-north-primary.cognitiveservices.azure.com"
+          title    = "Document Intelligence North Primary"
+          priority = 1
+        },
+        {
+          url      = "https://di-north-secondary.cognitiveservices.azure.com"
+          title    = "Document Intelligence North Secondary"
+          priority = 2
+        }
+      ]
     }
   ]
+  
+  validation {
+    condition     = length(var.backend_regions) >= 2 && length(distinct([for region in var.backend_regions : region.name])) == length(var.backend_regions)
+    error_message = "At least two backend regions with unique names are required."
+  }
+  
+  validation {
+    condition     = alltrue([for region in var.backend_regions : can(regex("^[a-z0-9-]+$", region.name)) && length(region.endpoints) > 0])
+    error_message = "Region names must be lowercase letters, digits or hyphens, and every region needs at least one endpoint."
+  }
 }
 
 variable "tags" {
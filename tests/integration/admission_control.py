@@ -0,0 +1,186 @@
+"""Client-side admission control for the backend switching tester.
+
+Each backend pool gets a token bucket that every ``:analyze`` POST must take a token from
+before it is sent. The refill rate adapts the way TCP congestion control does (AIMD): it
+rises by ``increase`` submissions per second after every accepted POST and halves on every
+429. Any ``Retry-After`` on the 429 closes the bucket until it has passed. Load then settles
+just under the region's quota instead of bursting into it, so the pools' ``rate-limiting``
+circuit-breaker rule (10 x 429 in a minute) is not tripped.
+
+The bucket for a POST is the pool named by its ``backendId``. Unpinned POSTs use the pool the
+gateway routed the previous unpinned POST to. Polls are not admitted, but a 429 on a poll still
+slows down submissions to its pool.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+DEFAULT_BURST = 2
+DEFAULT_INCREASE = 0.05
+DECREASE_FACTOR = 0.5
+MIN_RATE = 0.05
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` value in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Token bucket whose refill rate is halved on a 429 and raised a little on every success."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = DEFAULT_BURST,
+        max_rate: Optional[float] = None,
+        increase: float = DEFAULT_INCREASE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_rate = max_rate if max_rate is not None else rate * 4
+        self.increase = increase
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self.admitted = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self.lowest_rate = rate
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Block until a token is available and take it; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0 and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.admitted += 1
+                    self.waited += waited
+                    return waited
+                if wait <= 0:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.throttled += 1
+            self.rate = max(MIN_RATE, self.rate * DECREASE_FACTOR)
+            self.lowest_rate = min(self.lowest_rate, self.rate)
+            # Drop saved-up tokens so the next submissions follow the lowered rate.
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'lowest_rate': self.lowest_rate,
+                'admitted': self.admitted,
+                'throttled': self.throttled,
+                'waited': self.waited,
+            }
+
+
+class AdmissionController:
+    """One :class:`TokenBucket` per backend pool, created on first use."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = DEFAULT_BURST,
+        max_rate: Optional[float] = None,
+        increase: float = DEFAULT_INCREASE,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate
+        self.increase = increase
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, backend: str) -> TokenBucket:
+        key = backend if backend.endswith('-pool') else backend + '-pool'
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(self.rate, self.burst, self.max_rate, self.increase)
+            return self._buckets[key]
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {backend: bucket.snapshot() for backend, bucket in sorted(buckets.items())}
+
+
+class AdmissionPolicy(SansIOHTTPPolicy):
+    """Per-attempt pipeline policy that admits ``:analyze`` POSTs and feeds 429s back to their bucket.
+
+    Runs on every retry, so the SDK's own 429 retries also wait for a token.
+    """
+
+    def __init__(self, controller: AdmissionController, default_backend: str) -> None:
+        self.controller = controller
+        self._routed_backend = default_backend
+
+    @staticmethod
+    def _requested_backend(url: str) -> str:
+        return (parse_qs(urlparse(url).query).get('backendId') or [''])[0].lower()
+
+    def on_request(self, request) -> None:
+        http_request = request.http_request
+        requested = self._requested_backend(http_request.url)
+        backend = requested or self._routed_backend
+        request.context['admission_backend'] = backend
+        request.context['admission_pinned'] = bool(requested)
+        if http_request.method == 'POST':
+            self.controller.bucket(backend).acquire()
+
+    def on_response(self, request, response) -> None:
+        http_request = request.http_request
+        http_response = response.http_response
+        backend = request.context.get('admission_backend') or self._routed_backend
+        if http_request.method == 'POST' and not request.context.get('admission_pinned'):
+            # The gateway picked the pool; the next unpinned POST probably lands on the same one.
+            routed = http_response.headers.get('X-Backend-Used')
+            if routed:
+                self._routed_backend = backend = routed.lower()
+        bucket = self.controller.bucket(backend)
+        if http_response.status_code == 429:
+            bucket.on_throttled(parse_retry_after(http_response.headers.get('Retry-After')))
+        elif http_request.method == 'POST' and 200 <= http_response.status_code < 300:
+            bucket.on_success()
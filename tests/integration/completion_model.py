@@ -0,0 +1,78 @@
+"""Learned completion times for the tester's adaptive polling.
+
+Completion time is tracked per ``(backend, model_id, size bucket)``, where the bucket is the
+power of two just above the document size. Each key keeps a smoothed mean and mean deviation,
+updated online the way TCP estimates round-trip time (RFC 6298): ``mean += (sample - mean) / 8``
+and ``deviation += (|sample - mean| - deviation) / 4``. Samples are the service's own processing
+time (``lastUpdatedDateTime - createdDateTime``), so they do not include the poll interval that
+happened to be in use. The model is one small JSON object per key, rewritten atomically after
+every update.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+MEAN_GAIN = 1 / 8
+DEVIATION_GAIN = 1 / 4
+
+
+def size_bucket(document_size: int) -> int:
+    """Upper bound of the power-of-two size bucket ``document_size`` falls into."""
+    return 1 << max(0, int(document_size) - 1).bit_length()
+
+
+class CompletionModel:
+    """Per-key smoothed completion time, persisted to a JSON file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, float]] = {}
+        if self.path.exists():
+            try:
+                loaded = json.loads(self.path.read_text(encoding="utf-8") or "{}")
+            except json.JSONDecodeError:
+                loaded = {}
+            self._entries = {key: value for key, value in loaded.items() if isinstance(value, dict)}
+
+    @staticmethod
+    def _key(backend: str, model_id: str, document_size: int) -> str:
+        return f"{backend}|{model_id}|{size_bucket(document_size)}"
+
+    def predict(self, backend: str, model_id: str, document_size: int) -> Optional[Tuple[float, float]]:
+        """Return ``(mean, deviation)`` seconds, falling back to the same model and size on any backend."""
+        key = self._key(backend, model_id, document_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                return entry["mean"], entry["deviation"]
+            suffix = key.split("|", 1)[1]
+            peers = [value for name, value in self._entries.items() if name.split("|", 1)[1] == suffix]
+        if not peers:
+            return None
+        samples = sum(peer["samples"] for peer in peers)
+        mean = sum(peer["mean"] * peer["samples"] for peer in peers) / samples
+        deviation = sum(peer["deviation"] * peer["samples"] for peer in peers) / samples
+        return mean, deviation
+
+    def observe(self, backend: str, model_id: str, document_size: int, seconds: float) -> None:
+        key = self._key(backend, model_id, document_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {"mean": seconds, "deviation": seconds / 2, "samples": 0}
+            else:
+                error = seconds - entry["mean"]
+                entry["deviation"] += (abs(error) - entry["deviation"]) * DEVIATION_GAIN
+                entry["mean"] += error * MEAN_GAIN
+            entry["samples"] += 1
+            self._entries[key] = {name: round(value, 3) for name, value in entry.items()}
+            self._write()
+
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        temporary.write_text(json.dumps(self._entries, separators=(",", ":"), sort_keys=True), encoding="utf-8")
+        os.replace(temporary, self.path)
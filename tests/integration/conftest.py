@@ -0,0 +1,5 @@
+"""pytest configuration for the unit tests that sit next to the integration scripts."""
+
+# The tester is a script whose name matches test_*.py. It holds no pytest tests, and importing it opens a
+# new log file under logs/, so it is run directly rather than collected.
+collect_ignore = ["test_automatic_backend_switching.py"]
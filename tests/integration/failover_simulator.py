@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""Discrete-event simulation of the automatic failover loop on a virtual clock.
+
+Models what a soak run of ``test_automatic_backend_switching.py`` exercises - clients posting
+documents, SDK polling, the POST ``Operation-Location`` rewrite, the GET-side switching
+decision and named-value propagation across gateway instances - without waiting in real time,
+so a 16-hour scenario finishes in seconds and thresholds or concurrency levels can be swept.
+"""
+import argparse
+import bisect
+import heapq
+import json
+import math
+import random
+import re
+import statistics
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tabulate import tabulate
+
+POOL_IDS = ("doc-west-pool", "doc-north-pool")
+LEGACY_BACKEND_IDS = {"doc-west": "doc-west-pool", "doc-north": "doc-north-pool"}
+DEFAULT_MEAN_LATENCY = {"doc-west-pool": 7.0, "doc-north-pool": 3.0}
+DEFAULT_LOG_DIR = Path(__file__).resolve().parents[2] / "logs"
+MIN_FIT_SAMPLES = 5
+
+# Final GET rows of the tester's progress table: | run | GET | status | backend | time | duration | ...
+_GET_ROW_PATTERN = re.compile(
+    r"^\|\s*(\d+)\s*\|\s*GET\s*\|\s*(\d{3})\s*\|\s*([\w-]+)\s*\|[^|]*\|\s*([\d.]+)s\s*\|"
+)
+
+
+def _alternate_backend(selected: str) -> str:
+    return "doc-north-pool" if "west" in selected else "doc-west-pool"
+
+
+@dataclass
+class LatencyModel:
+    """Log-normal completion latency for one backend, optionally scaled inside degradation windows."""
+
+    mu: float
+    sigma: float
+    samples: int = 0
+    degradations: List[Tuple[float, float, float]] = field(default_factory=list)
+
+    @classmethod
+    def from_mean(cls, mean: float, sigma: float = 0.25) -> "LatencyModel":
+        return cls(mu=math.log(max(mean, 1e-3)) - sigma * sigma / 2, sigma=sigma)
+
+    @classmethod
+    def fit(cls, durations: List[float]) -> "LatencyModel":
+        logs = [math.log(value) for value in durations if value > 0]
+        sigma = statistics.pstdev(logs) if len(logs) > 1 else 0.0
+        return cls(mu=statistics.fmean(logs), sigma=sigma, samples=len(logs))
+
+    @property
+    def mean(self) -> float:
+        return math.exp(self.mu + self.sigma * self.sigma / 2)
+
+    def sample(self, now: float, rng: random.Random) -> float:
+        latency = rng.lognormvariate(self.mu, self.sigma)
+        for start, end, factor in self.degradations:
+            if start <= now < end:
+                latency *= factor
+        return latency
+
+
+def fit_latencies_from_logs(log_dir: Path) -> Dict[str, List[float]]:
+    """Collect per-pool GET durations from the tester's progress tables in ``log_dir``.
+
+    The tester reprints the table after every row, so each run is counted once per file.
+    Durations are measured at the poll that saw completion, so the fit overstates backend
+    latency by up to one polling interval.
+    """
+    durations: Dict[str, List[float]] = {pool: [] for pool in POOL_IDS}
+    for log_file in sorted(log_dir.glob("backend_switching_test_*.log")):
+        seen: Dict[str, Tuple[str, float]] = {}
+        for line in log_file.read_text(encoding="utf-8", errors="replace").splitlines():
+            match = _GET_ROW_PATTERN.match(line)
+            if not match or match.group(2) != "200":
+                continue
+            backend = LEGACY_BACKEND_IDS.get(match.group(3), match.group(3))
+            if backend in durations:
+                seen[match.group(1)] = (backend, float(match.group(4)))
+        for backend, duration in seen.values():
+            durations[backend].append(duration)
+    return durations
+
+
+@dataclass
+class SimulationConfig:
+    hours: float = 16.0
+    clients: int = 1
+    think_time: float = 6.0
+    poll_interval: float = 1.0
+    threshold: float = 5.0
+    cooldown: float = 60.0
+    propagation_delay: float = 30.0
+    patch_latency: float = 0.05
+    gateway_instances: int = 1
+    single_flight: bool = True
+    initial_backend: str = "doc-west-pool"
+    seed: int = 0
+
+
+class NamedValue:
+    """``doc-active-backend`` as seen by the gateway: a write becomes visible after the propagation delay."""
+
+    def __init__(self, initial: str, propagation_delay: float) -> None:
+        self.propagation_delay = propagation_delay
+        # Writes arrive in clock order with a fixed delay, so visibility times stay sorted.
+        self._visible_at: List[float] = [float("-inf")]
+        self._values: List[str] = [initial]
+
+    def write(self, now: float, value: str) -> None:
+        self._visible_at.append(now + self.propagation_delay)
+        self._values.append(value)
+
+    def read(self, now: float) -> str:
+        return self._values[bisect.bisect_right(self._visible_at, now) - 1]
+
+    def latest(self) -> str:
+        """Last written value, visible or not: what ARM holds after the PATCH."""
+        return self._values[-1]
+
+
+class GatewayInstance:
+    """One APIM unit: its internal cache holds the switch lease and active-backend decision."""
+
+    def __init__(self) -> None:
+        self.decision: Optional[Tuple[str, float]] = None
+        self.lease_until = 0.0
+
+    def cached_decision(self, now: float) -> Optional[str]:
+        if self.decision and self.decision[1] > now:
+            return self.decision[0]
+        return None
+
+
+class FailoverSimulation:
+    def __init__(self, config: SimulationConfig, latencies: Dict[str, LatencyModel]) -> None:
+        self.config = config
+        self.latencies = latencies
+        self.rng = random.Random(config.seed)
+        self.named_value = NamedValue(config.initial_backend, config.propagation_delay)
+        self.instances = [GatewayInstance() for _ in range(max(1, config.gateway_instances))]
+        self._events: List[Tuple[float, int, Callable[[float], None]]] = []
+        self._sequence = 0
+        self.operations: List[Dict[str, Any]] = []
+        self.patches = 0
+        self.flips: List[Tuple[float, str]] = []
+
+    def _schedule(self, at: float, action: Callable[[float], None]) -> None:
+        self._sequence += 1
+        heapq.heappush(self._events, (at, self._sequence, action))
+
+    def _instance(self) -> GatewayInstance:
+        return self.rng.choice(self.instances)
+
+    def _active_backend(self, instance: GatewayInstance, now: float) -> str:
+        return instance.cached_decision(now) or self.named_value.read(now)
+
+    def _post(self, client: int, now: float) -> None:
+        # API-level policy: route to the active backend and rewrite Operation-Location with
+        # backendId and requestTime so every poll returns to the same pool.
+        instance = self._instance()
+        backend = self._active_backend(instance, now)
+        operation = {
+            "client": client,
+            "posted": now,
+            "backend": backend,
+            "ready_at": now + self.latencies[backend].sample(now, self.rng),
+            "switched": False,
+            "polls": 0,
+        }
+        self._schedule(now + self.config.poll_interval, lambda at: self._poll(operation, at))
+
+    def _poll(self, operation: Dict[str, Any], now: float) -> None:
+        operation["polls"] += 1
+        instance = self._instance()
+        duration = now - operation["posted"]
+        exceeded = duration > self.config.threshold
+        if exceeded:
+            self._evaluate_switch(instance, operation, now)
+
+        if now >= operation["ready_at"]:
+            operation["total_time"] = duration
+            operation["exceeded"] = exceeded
+            self.operations.append(operation)
+            self._schedule(now + self.config.think_time, lambda at: self._post(operation["client"], at))
+            return
+        # The results policy sets Retry-After: 1 once the threshold is exceeded.
+        delay = 1.0 if exceeded else self.config.poll_interval
+        self._schedule(now + delay, lambda at: self._poll(operation, at))
+
+    def _evaluate_switch(self, instance: GatewayInstance, operation: Dict[str, Any], now: float) -> None:
+        original = operation["backend"]
+        new_backend = _alternate_backend(original)
+        if self.config.single_flight:
+            if self._active_backend(instance, now) == new_backend:
+                return
+            if instance.lease_until > now:
+                return
+            instance.lease_until = now + self.config.cooldown
+        self.patches += 1
+        if self.named_value.latest() != new_backend:
+            self.flips.append((now, new_backend))
+        self.named_value.write(now + self.config.patch_latency, new_backend)
+        if self.config.single_flight:
+            instance.decision = (new_backend, now + self.config.cooldown)
+        operation["switched"] = True
+
+    def run(self) -> Dict[str, Any]:
+        horizon = self.config.hours * 3600.0
+        for client in range(self.config.clients):
+            start = self.rng.uniform(0.0, self.config.think_time)
+            self._schedule(start, lambda at, client=client: self._post(client, at))
+        while self._events and self._events[0][0] < horizon:
+            now, _, action = heapq.heappop(self._events)
+            action(now)
+        return self.summary(horizon)
+
+    def summary(self, horizon: float) -> Dict[str, Any]:
+        times = sorted(operation["total_time"] for operation in self.operations)
+
+        def percentile(value: float) -> float:
+            if not times:
+                return 0.0
+            return times[min(len(times) - 1, max(0, int(round(value / 100.0 * len(times))) - 1))]
+
+        served = {pool: sum(1 for op in self.operations if op["backend"] == pool) for pool in POOL_IDS}
+        return {
+            "threshold": self.config.threshold,
+            "clients": self.config.clients,
+            "hours": self.config.hours,
+            "operations": len(self.operations),
+            "throughput_per_min": len(self.operations) / horizon * 60.0,
+            "mean_s": statistics.fmean(times) if times else 0.0,
+            "p50_s": percentile(50),
+            "p95_s": percentile(95),
+            "p99_s": percentile(99),
+            "exceeded_pct": 100.0 * sum(1 for op in self.operations if op["exceeded"]) / max(1, len(self.operations)),
+            "patches": self.patches,
+            "flips": len(self.flips),
+            "served": served,
+            "polls": sum(op["polls"] for op in self.operations),
+        }
+
+
+def _parse_degradation(raw: str) -> Tuple[str, float, float, float]:
+    """``BACKEND:START:END:FACTOR`` with times in seconds from the start of the run."""
+    try:
+        backend, start, end, factor = raw.split(":")
+        backend = LEGACY_BACKEND_IDS.get(backend, backend)
+        if backend not in POOL_IDS:
+            raise ValueError(backend)
+        return backend, float(start), float(end), float(factor)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f"expected BACKEND:START:END:FACTOR, got {raw!r}") from error
+
+
+def _float_list(raw: str) -> List[float]:
+    return [float(value) for value in raw.split(",") if value.strip()]
+
+
+def build_latency_models(args: argparse.Namespace) -> Dict[str, LatencyModel]:
+    fitted = {} if args.no_fit else fit_latencies_from_logs(args.logs)
+    overrides = {"doc-west-pool": args.west_latency, "doc-north-pool": args.north_latency}
+    models: Dict[str, LatencyModel] = {}
+    for pool in POOL_IDS:
+        if overrides[pool] is not None:
+            models[pool] = LatencyModel.from_mean(overrides[pool], args.latency_sigma)
+        elif len(fitted.get(pool, [])) >= MIN_FIT_SAMPLES:
+            models[pool] = LatencyModel.fit(fitted[pool])
+        else:
+            models[pool] = LatencyModel.from_mean(DEFAULT_MEAN_LATENCY[pool], args.latency_sigma)
+    for backend, start, end, factor in args.degrade:
+        models[backend].degradations.append((start, end, factor))
+    return models
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Simulate the automatic failover loop on a virtual clock and sweep its settings",
+    )
+    parser.add_argument("--hours", type=float, default=16.0, help="Simulated run length (default: 16)")
+    parser.add_argument("--clients", default="1", help="Concurrent clients; comma-separated values are swept")
+    parser.add_argument("--threshold", default="5", help="backend-switch-threshold; comma-separated values are swept")
+    parser.add_argument("--cooldown", type=float, default=60.0, help="backend-switch-cooldown in seconds")
+    parser.add_argument("--think-time", type=float, default=6.0, help="Pause between a client's runs (default: 6)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="SDK polling interval in seconds")
+    parser.add_argument(
+        "--propagation-delay",
+        type=float,
+        default=30.0,
+        help="Seconds before a PATCHed doc-active-backend is visible to every gateway instance",
+    )
+    parser.add_argument("--patch-latency", type=float, default=0.05, help="Named-value PATCH latency in seconds")
+    parser.add_argument("--gateway-instances", type=int, default=1, help="APIM units, each with its own internal cache")
+    parser.add_argument(
+        "--no-single-flight",
+        dest="single_flight",
+        action="store_false",
+        help="Drop the switch lease and decision cache so every slow poll PATCHes",
+    )
+    parser.add_argument("--initial-backend", default="doc-west-pool", choices=POOL_IDS)
+    parser.add_argument("--logs", type=Path, default=DEFAULT_LOG_DIR, help="Tester logs to fit latencies from")
+    parser.add_argument("--no-fit", action="store_true", help="Ignore logs and use the default latency means")
+    parser.add_argument("--west-latency", type=float, help="Mean doc-west-pool latency, overriding the fit")
+    parser.add_argument("--north-latency", type=float, help="Mean doc-north-pool latency, overriding the fit")
+    parser.add_argument("--latency-sigma", type=float, default=0.25, help="Log-normal sigma for non-fitted latencies")
+    parser.add_argument(
+        "--degrade",
+        action="append",
+        type=_parse_degradation,
+        default=[],
+        metavar="BACKEND:START:END:FACTOR",
+        help="Multiply a backend's latency between START and END seconds (repeatable)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON for CI")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    models = build_latency_models(args)
+    results: List[Dict[str, Any]] = []
+    for threshold in _float_list(args.threshold):
+        for clients in (int(value) for value in _float_list(args.clients)):
+            config = SimulationConfig(
+                hours=args.hours,
+                clients=clients,
+                think_time=args.think_time,
+                poll_interval=args.poll_interval,
+                threshold=threshold,
+                cooldown=args.cooldown,
+                propagation_delay=args.propagation_delay,
+                patch_latency=args.patch_latency,
+                gateway_instances=args.gateway_instances,
+                single_flight=args.single_flight,
+                initial_backend=args.initial_backend,
+                seed=args.seed,
+            )
+            results.append(FailoverSimulation(config, models).run())
+
+    if args.json:
+        print(json.dumps({
+            "latency": {pool: {"mean_s": model.mean, "sigma": model.sigma, "fitted_samples": model.samples}
+                        for pool, model in models.items()},
+            "results": results,
+        }, indent=2))
+        return 0
+
+    for pool, model in models.items():
+        source = f"fitted from {model.samples} runs" if model.samples else "assumed"
+        print(f"{pool}: mean {model.mean:.2f}s, sigma {model.sigma:.2f} ({source})")
+    rows = [{
+        "Threshold": result["threshold"],
+        "Clients": result["clients"],
+        "Operations": result["operations"],
+        "Ops/min": f"{result['throughput_per_min']:.1f}",
+        "Mean (s)": f"{result['mean_s']:.2f}",
+        "p95 (s)": f"{result['p95_s']:.2f}",
+        "p99 (s)": f"{result['p99_s']:.2f}",
+        "Exceeded %": f"{result['exceeded_pct']:.1f}",
+        "PATCHes": result["patches"],
+        "Flips": result["flips"],
+        "West/North": f"{result['served']['doc-west-pool']}/{result['served']['doc-north-pool']}",
+    } for result in results]
+    print(tabulate(rows, headers="keys", tablefmt="github"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Bounded scan of large JSON bodies for a handful of string fields.
+
+A completed ``analyzeResults`` response carries the whole ``analyzeResult`` (pages, words,
+tables), but the tester only needs ``status`` and the length of ``analyzeResult.content``.
+:func:`scan_string_fields` walks the raw body with regular expressions, never builds the
+document tree, and stops as soon as the requested fields are found. The service writes
+``status`` first and ``content`` ahead of ``pages``, so a completed result is normally read
+only up to the end of its content.
+"""
+import json
+import re
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+JsonPath = Tuple[str, ...]
+Span = Tuple[int, int]
+RawJson = Union[bytes, bytearray, str]
+
+_BYTES_TOKEN = re.compile(rb'["{}\[\],]')
+_TEXT_TOKEN = re.compile(r'["{}\[\],]')
+
+
+def _string_end(data: RawJson, position: int, text: bool) -> int:
+    """Index just past the closing quote of the string whose body starts at ``position``, or -1."""
+    quote, backslash = ('"', '\\') if text else (b'"', 0x5C)
+    while True:
+        end = data.find(quote, position)
+        if end < 0:
+            return -1
+        run = end
+        while run > position and data[run - 1] == backslash:
+            run -= 1
+        if (end - run) % 2 == 0:
+            return end + 1
+        position = end + 1
+
+
+def scan_string_fields(data: RawJson, paths: Iterable[JsonPath], limit: Optional[int] = None) -> Dict[JsonPath, Span]:
+    """Return ``{path: (start, end)}`` for the string values found at ``paths``.
+
+    Each span covers the JSON string literal including its quotes, so ``data[start:end]`` can be
+    measured or decoded on its own. Scanning stops after ``limit`` fields (default: all of
+    ``paths``). Non-string values and anything inside an array are ignored.
+    """
+    wanted = set(paths)
+    limit = len(wanted) if limit is None else limit
+    max_depth = max((len(path) for path in wanted), default=0)
+    text = isinstance(data, str)
+    token = _TEXT_TOKEN if text else _BYTES_TOKEN
+
+    found: Dict[JsonPath, Span] = {}
+    keys: List[Optional[str]] = []  # key being read in each open container; None for arrays
+    expecting_key = False
+    position = 0
+    while len(found) < limit:
+        match = token.search(data, position)
+        if match is None:
+            break
+        start = match.start()
+        char = data[start] if text else chr(data[start])
+        position = match.end()
+        if char == '"':
+            position = _string_end(data, position, text)
+            if position < 0:
+                break
+            if expecting_key:
+                keys[-1] = json.loads(data[start:position])
+                expecting_key = False
+            elif len(keys) <= max_depth and None not in keys:
+                path = tuple(keys)
+                if path in wanted:
+                    found.setdefault(path, (start, position))
+        elif char == '{':
+            keys.append('')
+            expecting_key = True
+        elif char == '[':
+            keys.append(None)
+            expecting_key = False
+        elif char == ',':
+            expecting_key = bool(keys) and keys[-1] is not None
+        else:
+            if keys:
+                keys.pop()
+            expecting_key = False
+    return found
+
+
+def _literal_body(data: RawJson, span: Span) -> RawJson:
+    body = data[span[0] + 1:span[1] - 1]
+    escaped = '\\' in body if isinstance(body, str) else b'\\' in body
+    return json.loads(data[span[0]:span[1]]) if escaped else body
+
+
+def string_length(data: RawJson, span: Span) -> int:
+    """Length in characters of the string literal at ``span``, matching ``len()`` of the decoded value."""
+    body = _literal_body(data, span)
+    if isinstance(body, str):
+        return len(body)
+    if body.isascii():
+        return len(body)
+    return len(body.decode('utf-8', errors='replace'))
+
+
+def base64_decoded_length(data: RawJson, span: Span) -> int:
+    """Decoded size of the base64 string at ``span``, or its encoded length if it is not padded base64."""
+    body = _literal_body(data, span)
+    if len(body) % 4:
+        return len(body)
+    padding = body[-2:].count('=' if isinstance(body, str) else b'=')
+    return len(body) // 4 * 3 - padding
@@ -0,0 +1,1363 @@
+#!/usr/bin/env python3
+"""Local stand-in for the APIM gateway and the Document Intelligence regions behind it.
+
+Serves the same ``:analyze`` / ``analyzeResults`` (and ``:analyzeBatch`` /
+``analyzeBatchResults``) surface the SDK talks to and applies
+the routing and switching rules of the enhanced policies, so the tester can run against
+``http://localhost:<port>`` without an Azure subscription.
+"""
+import argparse
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from tabulate import tabulate
+
+from page_split import parse_pages, pdf_page_count
+
+DEFAULT_API_VERSION = "2024-11-30"
+SWITCH_LEASE_KEY = "doc-backend-switch-lease"
+ACTIVE_BACKEND_DECISION_KEY = "doc-active-backend-decision"
+MANAGEMENT_TOKEN_KEY = "doc-mgmt-token"
+MANAGEMENT_TOKEN_SKEW_SECONDS = 300.0
+LATENCY_EWMA_KEY = "doc-latency-ewma"
+LATENCY_EWMA_ALPHA = 0.2
+LATENCY_EWMA_TTL_SECONDS = 300.0
+WEIGHTED_MIN_SHARE = 0.1
+ROUTING_MODES = ("failover", "weighted")
+POOL_IDS = ("doc-west-pool", "doc-north-pool")
+BACKEND_HEALTH_KEY = "doc-backend-health"
+DEMOTION_SECONDS = 300.0
+PROBE_SCORE_KEY = "doc-backend-probe"
+PROBE_SCORE_ALPHA = 0.5
+PROBE_SCORE_TTL_SECONDS = 300.0
+PREWARM_MAX_REQUESTS = 5
+CACHED_RESULT_ID_PREFIX = "cached-"
+
+logger = logging.getLogger("standin")
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _server_timing(stages: List[Tuple[str, float]]) -> str:
+    """Format ``(stage, seconds)`` pairs as a ``Server-Timing`` value in milliseconds, like the policies."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in stages)
+
+
+def _decode_document(body: bytes) -> bytes:
+    """Return the document carried as ``base64Source`` in an analyze body, or the raw body."""
+    try:
+        source = json.loads(body).get("base64Source")
+        if source:
+            return base64.b64decode(source)
+    except (ValueError, AttributeError, binascii.Error):
+        pass
+    return body
+
+
+def _parse_float(raw_value: Optional[str], default: float) -> float:
+    try:
+        return float(raw_value) if raw_value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+class GatewayCache:
+    """Emulates the APIM internal cache used by ``cache-store-value``/``cache-lookup-value``.
+
+    Lookups and stores are individually thread-safe but, like the real cache, there is no
+    compare-and-swap, so policies that need mutual exclusion must confirm their own writes.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._entries: Dict[str, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return default
+            return value
+
+    def store(self, key: str, value: Any, duration: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock() + max(duration, 0.0))
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class NamedValueStore:
+    """Named values plus the management-API PATCH endpoint that updates them.
+
+    ``patch_latency`` models the ARM round-trip and ``arm_rate_limit`` the number of writes
+    per second ARM accepts before answering 429.
+    """
+
+    def __init__(
+        self,
+        values: Dict[str, str],
+        patch_latency: float = 0.0,
+        arm_rate_limit: int = 0,
+    ) -> None:
+        self._values = dict(values)
+        self._lock = threading.Lock()
+        self.patch_latency = patch_latency
+        self.arm_rate_limit = arm_rate_limit
+        self.patch_count = 0
+        self.throttled_count = 0
+        self.history: List[Tuple[float, str, str, str]] = []
+        self._recent_patches: List[float] = []
+
+    def get(self, name: str, default: str = "") -> str:
+        with self._lock:
+            return self._values.get(name, default)
+
+    def patch(self, name: str, value: str) -> int:
+        if self.patch_latency > 0:
+            time.sleep(self.patch_latency)
+        now = time.monotonic()
+        with self._lock:
+            self.patch_count += 1
+            if self.arm_rate_limit > 0:
+                self._recent_patches = [stamp for stamp in self._recent_patches if now - stamp < 1.0]
+                if len(self._recent_patches) >= self.arm_rate_limit:
+                    self.throttled_count += 1
+                    return 429
+                self._recent_patches.append(now)
+            previous = self._values.get(name, "")
+            self._values[name] = value
+            self.history.append((now, name, previous, value))
+        return 200
+
+    def flip_count(self, name: str = "doc-active-backend") -> int:
+        with self._lock:
+            return sum(1 for _, entry_name, previous, value in self.history if entry_name == name and previous != value)
+
+
+class SubscriptionRateLimit:
+    """A product's per-subscription ``rate-limit``: ``calls`` requests per key every ``renewal_period`` seconds.
+
+    As with the API-level policy's ``increment-condition``, only 2xx responses count towards the limit.
+    """
+
+    def __init__(self, calls: int, renewal_period: float = 60.0) -> None:
+        self.calls = calls
+        self.renewal_period = renewal_period
+        self.throttled: Dict[str, int] = {}
+        self._counted: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def check(self, key: str) -> Optional[float]:
+        """``None`` when ``key`` is within its limit, else the seconds until it is (for Retry-After)."""
+        now = time.monotonic()
+        with self._lock:
+            counted = [stamp for stamp in self._counted.get(key, []) if now - stamp < self.renewal_period]
+            self._counted[key] = counted
+            if len(counted) < self.calls:
+                return None
+            self.throttled[key] = self.throttled.get(key, 0) + 1
+            return self.renewal_period - (now - counted[0])
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self._counted.setdefault(key, []).append(time.monotonic())
+
+
+class ManagedIdentityEmulator:
+    """Stands in for ``authentication-managed-identity``: each fetch costs ``latency`` seconds."""
+
+    def __init__(self, latency: float = 0.0, lifetime: float = 3600.0) -> None:
+        self.latency = latency
+        self.lifetime = lifetime
+        self.fetch_count = 0
+        self._lock = threading.Lock()
+
+    def fetch(self) -> Tuple[str, float]:
+        """Return a token and its lifetime in seconds."""
+        if self.latency > 0:
+            time.sleep(self.latency)
+        with self._lock:
+            self.fetch_count += 1
+        return f"mgmt-token-{uuid.uuid4()}", self.lifetime
+
+
+class ResultCache:
+    """Content-addressed cache of completed analyze results.
+
+    Keys hash the document bytes together with the model, API version and requested pages. Entries expire after
+    ``ttl`` seconds and the least recently used ones are evicted once ``max_entries`` or
+    ``max_bytes`` would be exceeded; a single result larger than ``max_bytes`` is never cached.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        max_bytes: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[bytes, str, float]]" = OrderedDict()
+        self._pending: Dict[str, str] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(body: bytes, model_id: str, api_version: str, pages: str = "") -> str:
+        digest = hashlib.sha256()
+        for part in (model_id.encode("utf-8"), api_version.encode("utf-8"), pages.encode("utf-8"), _decode_document(body)):
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def _drop(self, key: str) -> None:
+        body, _, _ = self._entries.pop(key)
+        self._size -= len(body)
+
+    def get(self, key: str, count: bool = True) -> Optional[Tuple[bytes, str]]:
+        """Return ``(result body, backend id)`` for ``key`` or ``None`` when absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= self._clock():
+                self._drop(key)
+                entry = None
+            if count:
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def track(self, operation_id: str, key: str) -> None:
+        """Remember which key a submitted operation fills once it succeeds."""
+        with self._lock:
+            self._pending[operation_id] = key
+
+    def complete(self, operation_id: str, body: bytes, backend_id: str) -> None:
+        with self._lock:
+            key = self._pending.pop(operation_id, None)
+            if key is None or len(body) > self.max_bytes:
+                return
+            if key in self._entries:
+                self._drop(key)
+            while self._entries and (
+                len(self._entries) >= self.max_entries or self._size + len(body) > self.max_bytes
+            ):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[key] = (body, backend_id, self._clock() + self.ttl)
+            self._size += len(body)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class SimulatedBackend:
+    """A Document Intelligence region that completes each operation after ``latency`` seconds.
+
+    ``page_latency`` adds seconds per analyzed page, so page-range chunks finish sooner than
+    the whole document. A request arriving after ``cold_after`` idle seconds first pays
+    ``cold_start`` seconds, the way a fresh gateway connection to a standby region does.
+    ``submit_rate_limit`` is the region's quota of submissions per second (0: unlimited).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        latency: float,
+        page_latency: float = 0.0,
+        cold_start: float = 0.0,
+        cold_after: float = 60.0,
+        submit_rate_limit: int = 0,
+    ) -> None:
+        self.name = name
+        self.latency = latency
+        self.page_latency = page_latency
+        self.cold_start = cold_start
+        self.cold_after = cold_after
+        self._last_request: Optional[float] = None
+        self.submit_rate_limit = submit_rate_limit
+        self.throttled_count = 0
+        self._recent_submits: List[float] = []
+        self._operations: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def connect(self) -> float:
+        """Pay the cold-start cost if the region has been idle; returns the seconds paid."""
+        with self._lock:
+            now = time.monotonic()
+            cold = self._last_request is None or now - self._last_request > self.cold_after
+            self._last_request = now
+        delay = self.cold_start if cold else 0.0
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def admit(self) -> Optional[float]:
+        """``None`` when a submission fits the quota, else the seconds until it would (for Retry-After)."""
+        if self.submit_rate_limit <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._recent_submits = [stamp for stamp in self._recent_submits if now - stamp < 1.0]
+            if len(self._recent_submits) >= self.submit_rate_limit:
+                self.throttled_count += 1
+                return 1.0 - (now - self._recent_submits[0])
+            self._recent_submits.append(now)
+        return None
+
+    def submit_batch(self, model_id: str, sources: List[str], result_prefix: str) -> str:
+        self.connect()
+        operation_id = str(uuid.uuid4())
+        with self._lock:
+            self._operations[operation_id] = {
+                "model_id": model_id,
+                "batch": sources,
+                "result_prefix": result_prefix,
+                "created": _utc_now_iso(),
+                "started_at": time.monotonic(),
+                "ready_at": time.monotonic() + self.latency + self.page_latency * len(sources),
+            }
+        return operation_id
+
+    def _batch_status(self, operation_id: str, operation: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.monotonic()
+        total = max(operation["ready_at"] - operation["started_at"], 1e-6)
+        percent = min(100, int(100 * (now - operation["started_at"]) / total))
+        payload: Dict[str, Any] = {
+            "resultId": operation_id,
+            "status": "running" if percent < 100 else "succeeded",
+            "createdDateTime": operation["created"],
+            "lastUpdatedDateTime": _utc_now_iso(),
+            "percentCompleted": percent,
+        }
+        if percent >= 100:
+            details = []
+            for source in operation["batch"]:
+                name = source.rsplit("/", 1)[-1]
+                result_url = f"{operation['result_prefix']}{name}.ocr.json"
+                details.append({"status": "succeeded", "sourceUrl": source, "resultUrl": result_url})
+            payload["result"] = {
+                "succeededCount": len(details),
+                "failedCount": 0,
+                "skippedCount": 0,
+                "details": details,
+            }
+        return payload
+
+    def submit(self, model_id: str, document_size: int, pages: Optional[List[int]] = None) -> str:
+        self.connect()
+        operation_id = str(uuid.uuid4())
+        created = datetime.now(timezone.utc)
+        pages = pages or []
+        duration = self.latency + self.page_latency * len(pages)
+        with self._lock:
+            self._operations[operation_id] = {
+                "model_id": model_id,
+                "document_size": document_size,
+                "pages": pages,
+                "created": created.isoformat().replace("+00:00", "Z"),
+                # Like the service, lastUpdatedDateTime stops moving once the operation has finished.
+                "completed": (created + timedelta(seconds=duration)).isoformat().replace("+00:00", "Z"),
+                "ready_at": time.monotonic() + duration,
+            }
+        return operation_id
+
+    def _page_result(self, page_numbers: List[int]) -> Dict[str, Any]:
+        # Like the service, pages keep their document page numbers and spans index this result's content.
+        content = ""
+        pages: List[Dict[str, Any]] = []
+        paragraphs: List[Dict[str, Any]] = []
+        for page_number in page_numbers:
+            if content:
+                content += "\n"
+            text = f"Page {page_number} analyzed by {self.name}"
+            span = {"offset": len(content), "length": len(text)}
+            words = []
+            word_offset = span["offset"]
+            for word in text.split(" "):
+                words.append({"content": word, "span": {"offset": word_offset, "length": len(word)}, "confidence": 0.99})
+                word_offset += len(word) + 1
+            pages.append({
+                "pageNumber": page_number,
+                "spans": [span],
+                "lines": [{"content": text, "spans": [span]}],
+                "words": words,
+            })
+            paragraphs.append({
+                "content": text,
+                "spans": [span],
+                "boundingRegions": [{"pageNumber": page_number, "polygon": [0, 0, 1, 0, 1, 1, 0, 1]}],
+            })
+            content += text
+        return {"content": content, "pages": pages, "paragraphs": paragraphs}
+
+    def status(self, operation_id: str, api_version: str) -> Optional[Dict[str, Any]]:
+        self.connect()
+        with self._lock:
+            operation = self._operations.get(operation_id)
+        if operation is None:
+            return None
+        if "batch" in operation:
+            return self._batch_status(operation_id, operation)
+        payload: Dict[str, Any] = {
+            "status": "running",
+            "createdDateTime": operation["created"],
+            "lastUpdatedDateTime": _utc_now_iso(),
+        }
+        if time.monotonic() >= operation["ready_at"]:
+            payload["status"] = "succeeded"
+            payload["lastUpdatedDateTime"] = operation["completed"]
+            payload["analyzeResult"] = {
+                "apiVersion": api_version,
+                "modelId": operation["model_id"],
+                "stringIndexType": "textElements",
+                "content": f"Simulated analysis of {operation['document_size']} bytes by {self.name}",
+                "pages": [],
+            }
+            if operation["pages"]:
+                payload["analyzeResult"].update(self._page_result(operation["pages"]))
+        return payload
+
+
+class StandinGateway:
+    """Applies the API-level and operation-level policy logic to the simulated backends."""
+
+    def __init__(
+        self,
+        backends: Dict[str, SimulatedBackend],
+        named_values: NamedValueStore,
+        cache: Optional[GatewayCache] = None,
+        single_flight: bool = True,
+        identity: Optional[ManagedIdentityEmulator] = None,
+        policy_cache: bool = True,
+        rng: Optional[random.Random] = None,
+        result_cache: Optional[ResultCache] = None,
+        batch_documents: int = 20,
+        subscription_limit: Optional[SubscriptionRateLimit] = None,
+        prober_keys: Iterable[str] = (),
+    ) -> None:
+        self.backends = backends
+        self.named_values = named_values
+        self.cache = cache or GatewayCache()
+        self.single_flight = single_flight
+        self.identity = identity or ManagedIdentityEmulator()
+        self.policy_cache = policy_cache
+        self.rng = rng or random.Random()
+        self.result_cache = result_cache
+        self.batch_documents = batch_documents
+        self.subscription_limit = subscription_limit
+        self.prober_keys = frozenset(prober_keys)
+
+    @staticmethod
+    def _normalize_backend_id(raw_value: str) -> str:
+        return raw_value.strip().lower() if raw_value else ""
+
+    @staticmethod
+    def _pool_id(backend_id: str) -> str:
+        return backend_id if backend_id.endswith("-pool") else backend_id + "-pool"
+
+    def pool_ids(self) -> List[str]:
+        """Pools in failover order, from the ``doc-backend-pools`` named value."""
+        raw = self.named_values.get("doc-backend-pools", ",".join(POOL_IDS))
+        return [pool.strip() for pool in raw.lower().split(",") if pool.strip()]
+
+    def legacy_backend_ids(self) -> List[str]:
+        """Legacy single-backend IDs: each pool ID without its ``-pool`` suffix."""
+        return [pool[:-len("-pool")] for pool in self.pool_ids() if pool.endswith("-pool")]
+
+    def demoted_pools(self) -> Dict[str, float]:
+        """Pools left by a recent switch, with the wall-clock time their demotion ends."""
+        now = time.time()
+        health = self.cache.lookup(BACKEND_HEALTH_KEY) or {}
+        return {pool: until for pool, until in health.items() if until > now}
+
+    def probe_scores(self) -> Dict[str, float]:
+        """Smoothed health-probe round trip per pool, in seconds."""
+        return dict(self.cache.lookup(PROBE_SCORE_KEY) or {})
+
+    def _record_probe(self, backend_id: str, seconds: float) -> float:
+        pool_id = self._pool_id(backend_id)
+        scores = self.probe_scores()
+        previous = scores.get(pool_id)
+        scores[pool_id] = seconds if previous is None else PROBE_SCORE_ALPHA * seconds + (1 - PROBE_SCORE_ALPHA) * previous
+        self.cache.store(PROBE_SCORE_KEY, scores, PROBE_SCORE_TTL_SECONDS)
+        return scores[pool_id]
+
+    def _alternate_backend(self, selected: str, threshold: float = float("inf")) -> str:
+        """Best-ranked pool other than ``selected`` that is neither demoted nor probed worse; legacy IDs stay legacy.
+
+        A pool whose probe score is at or over ``threshold``, or no better than the score of
+        ``selected``, is skipped. When every alternate is worse, ``selected`` is returned: stay put.
+        """
+        legacy = not selected.endswith("-pool")
+        selected_pool = self._pool_id(selected)
+        scores = self.probe_scores()
+        current = scores.get(selected_pool)
+        candidates = [
+            pool for pool in self.pool_ids()
+            if pool != selected_pool and not (
+                pool in scores and (scores[pool] >= threshold or (current is not None and scores[pool] >= current))
+            )
+        ]
+        demoted = self.demoted_pools()
+        best = next((pool for pool in candidates if pool not in demoted), candidates[0] if candidates else None)
+        if best is None:
+            return selected
+        return best[:-len("-pool")] if legacy and best.endswith("-pool") else best
+
+    def _demote(self, backend_id: str) -> None:
+        health = self.demoted_pools()
+        health[self._pool_id(backend_id)] = time.time() + DEMOTION_SECONDS
+        self.cache.store(BACKEND_HEALTH_KEY, health, DEMOTION_SECONDS)
+
+    def _backend_for(self, backend_id: str) -> SimulatedBackend:
+        return self.backends[self._pool_id(backend_id)]
+
+    def active_backend(self) -> str:
+        cached = self.cache.lookup(ACTIVE_BACKEND_DECISION_KEY)
+        if cached:
+            return cached
+        configured = self.named_values.get("doc-active-backend")
+        return configured or self.pool_ids()[0]
+
+    def routing_mode(self) -> str:
+        mode = self.named_values.get("backend-routing-mode", "failover").strip().lower()
+        return mode if mode in ROUTING_MODES else "failover"
+
+    def latency_ewma(self, backend_id: str) -> Optional[float]:
+        return (self.cache.lookup(LATENCY_EWMA_KEY) or {}).get(self._pool_id(backend_id))
+
+    def _record_latency(self, backend_id: str, duration: float) -> None:
+        # Every pool's EWMA lives in one cache entry, as in the policy, so routing reads them with one lookup.
+        pool_id = self._pool_id(backend_id)
+        ewmas = dict(self.cache.lookup(LATENCY_EWMA_KEY) or {})
+        previous = ewmas.get(pool_id)
+        ewmas[pool_id] = duration if previous is None else LATENCY_EWMA_ALPHA * duration + (1 - LATENCY_EWMA_ALPHA) * previous
+        self.cache.store(LATENCY_EWMA_KEY, ewmas, LATENCY_EWMA_TTL_SECONDS)
+
+    def weighted_shares(self) -> Dict[str, float]:
+        """Traffic share per pool, inversely proportional to its completion-latency EWMA.
+
+        Pools without samples borrow the mean of the others so they keep receiving traffic, and
+        every pool keeps at least ``WEIGHTED_MIN_SHARE`` so its EWMA stays fresh.
+        """
+        ewmas = {pool_id: self.latency_ewma(pool_id) for pool_id in self.pool_ids()}
+        known = [value for value in ewmas.values() if value is not None]
+        if not known:
+            return {}
+        fallback = sum(known) / len(known)
+        weights = {
+            pool_id: 1.0 / max(value if value is not None else fallback, 0.001)
+            for pool_id, value in ewmas.items()
+        }
+        total = sum(weights.values())
+        shares = {pool_id: max(weight / total, WEIGHTED_MIN_SHARE) for pool_id, weight in weights.items()}
+        total = sum(shares.values())
+        return {pool_id: share / total for pool_id, share in shares.items()}
+
+    def _weighted_backend(self) -> str:
+        shares = self.weighted_shares()
+        if not shares:
+            return ""
+        roll = self.rng.random()
+        for pool_id, share in shares.items():
+            roll -= share
+            if roll < 0:
+                return pool_id
+        return list(shares)[-1]
+
+    def _switch_config(self, batch: bool = False) -> Dict[str, Any]:
+        """Resolve and parse the switching named values; batch polls use ``backend-switch-batch-threshold``."""
+        if batch:
+            threshold_raw = self.named_values.get("backend-switch-batch-threshold", "300")
+        else:
+            threshold_raw = self.named_values.get("backend-switch-threshold", "5.0")
+        cooldown_raw = self.named_values.get("backend-switch-cooldown", "60")
+        return {
+            "threshold_raw": threshold_raw,
+            "threshold": _parse_float(threshold_raw, 5.0),
+            "cooldown": _parse_float(cooldown_raw, 60.0),
+        }
+
+    def _management_token(self) -> str:
+        if self.policy_cache:
+            cached = self.cache.lookup(MANAGEMENT_TOKEN_KEY)
+            if cached:
+                return cached
+        token, lifetime = self.identity.fetch()
+        if self.policy_cache and lifetime > MANAGEMENT_TOKEN_SKEW_SECONDS:
+            self.cache.store(MANAGEMENT_TOKEN_KEY, token, lifetime - MANAGEMENT_TOKEN_SKEW_SECONDS)
+        return token
+
+    def analyze(
+        self,
+        model_id: str,
+        query: Dict[str, str],
+        body: bytes,
+        base_url: str,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        started = time.perf_counter()
+        requested = query.get("backendId", "")
+        api_version = query.get("api-version", DEFAULT_API_VERSION)
+        request_time = _utc_now_iso()
+        probe = query.get("probe") == "true"
+        cache_key = ""
+        cached = None
+        if self.result_cache is not None and not probe:
+            cache_key = ResultCache.key_for(body, model_id, api_version, query.get("pages", ""))
+            cached = self.result_cache.get(cache_key)
+
+        if cached is not None:
+            # Short-circuit: point the client at the stored result on the backend that produced it.
+            selected = cached[1]
+            operation_id = f"{CACHED_RESULT_ID_PREFIX}{cache_key}"
+            inbound_done = backend_done = time.perf_counter()
+        else:
+            selected = requested
+            if not selected and self.routing_mode() == "weighted":
+                selected = self._weighted_backend()
+            selected = selected or self.active_backend()
+            retry_after = self._backend_for(selected).admit()
+            if retry_after is not None:
+                status, headers, body = self._error_response(429, f"Rate limit of {selected} exceeded.")
+                headers.update({"Retry-After": str(max(1, math.ceil(retry_after))), "X-Backend-Used": selected})
+                return status, headers, body
+            inbound_done = time.perf_counter()
+            pages = parse_pages(query.get("pages", ""))
+            if not pages:
+                pages = list(range(1, pdf_page_count(_decode_document(body)) + 1))
+            operation_id = self._backend_for(selected).submit(model_id, len(body), pages)
+            backend_done = time.perf_counter()
+            if cache_key:
+                self.result_cache.track(operation_id, cache_key)
+        operation_location = (
+            f"{base_url}/documentintelligence/documentModels/{model_id}/analyzeResults/{operation_id}"
+            f"?api-version={api_version}&backendId={selected}&requestTime={quote(request_time, safe='')}"
+            f"{'&probe=true' if probe else ''}"
+        )
+        headers = {
+            "Operation-Location": operation_location,
+            "X-Backend-Used": selected,
+            "X-Processing-Backend": selected,
+            "X-Configured-Backend": self.named_values.get("doc-active-backend", "unset"),
+            "X-Requested-Backend": requested,
+            "X-Routing-Mode": self.routing_mode(),
+        }
+        if self.result_cache is not None:
+            headers["X-Result-Cache"] = "HIT" if cached is not None else "MISS"
+        finished = time.perf_counter()
+        headers["Server-Timing"] = _server_timing([
+            ("inbound", inbound_done - started),
+            ("backend", backend_done - inbound_done),
+            ("outbound", finished - backend_done),
+            ("total", finished - started),
+        ])
+        return 202, headers, b""
+
+    def analyze_batch(
+        self,
+        model_id: str,
+        query: Dict[str, str],
+        body: bytes,
+        base_url: str,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        started = time.perf_counter()
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return self._error_response(400, "Request body must be JSON.")
+        blob_source = request.get("azureBlobSource") or {}
+        file_list_source = request.get("azureBlobFileListSource") or {}
+        source = blob_source or file_list_source
+        if not request.get("resultContainerUrl") or not source.get("containerUrl"):
+            return self._error_response(
+                400, "resultContainerUrl and one of azureBlobSource or azureBlobFileListSource are required."
+            )
+        # Blob listings are not reachable from here, so the batch holds --batch-documents simulated files.
+        container = source["containerUrl"].split("?", 1)[0].rstrip("/")
+        prefix = blob_source.get("prefix", "")
+        sources = [f"{container}/{prefix}doc-{index:04d}.pdf" for index in range(self.batch_documents)]
+        result_prefix = request["resultContainerUrl"].split("?", 1)[0].rstrip("/") + "/" + request.get("resultPrefix", "")
+
+        requested = query.get("backendId", "")
+        api_version = query.get("api-version", DEFAULT_API_VERSION)
+        request_time = _utc_now_iso()
+        selected = requested
+        if not selected and self.routing_mode() == "weighted":
+            selected = self._weighted_backend()
+        selected = selected or self.active_backend()
+        inbound_done = time.perf_counter()
+        operation_id = self._backend_for(selected).submit_batch(model_id, sources, result_prefix)
+        backend_done = time.perf_counter()
+        operation_location = (
+            f"{base_url}/documentintelligence/documentModels/{model_id}/analyzeBatchResults/{operation_id}"
+            f"?api-version={api_version}&backendId={selected}&requestTime={quote(request_time, safe='')}"
+        )
+        finished = time.perf_counter()
+        headers = {
+            "Operation-Location": operation_location,
+            "X-Backend-Used": selected,
+            "X-Processing-Backend": selected,
+            "X-Configured-Backend": self.named_values.get("doc-active-backend", "unset"),
+            "X-Requested-Backend": requested,
+            "X-Routing-Mode": self.routing_mode(),
+            "Server-Timing": _server_timing([
+                ("inbound", inbound_done - started),
+                ("backend", backend_done - inbound_done),
+                ("outbound", finished - backend_done),
+                ("total", finished - started),
+            ]),
+        }
+        return 202, headers, b""
+
+    def analyze_results(
+        self,
+        model_id: str,
+        result_id: str,
+        query: Dict[str, str],
+        batch: bool = False,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        started = time.perf_counter()
+        normalized = self._normalize_backend_id(query.get("backendId", ""))
+        allowed = self.pool_ids() + self.legacy_backend_ids()
+        if not normalized:
+            return self._error_response(400, "backendId query parameter is required.")
+        if normalized not in allowed:
+            return self._error_response(400, f"backendId '{normalized}' is not allowed.")
+
+        if result_id.startswith(CACHED_RESULT_ID_PREFIX) and not batch:
+            return self._cached_result(result_id[len(CACHED_RESULT_ID_PREFIX):], normalized, query)
+
+        api_version = query.get("api-version", DEFAULT_API_VERSION)
+        config = self._switch_config(batch)
+        inbound_done = time.perf_counter()
+        payload = self._backend_for(normalized).status(result_id, api_version)
+        backend_done = time.perf_counter()
+        if payload is None:
+            return self._error_response(404, f"Operation {result_id} not found on {normalized}.")
+
+        threshold_raw = config["threshold_raw"]
+        threshold = config["threshold"]
+        duration = self._request_duration(query.get("requestTime", ""))
+        exceeded = duration > threshold
+
+        headers: Dict[str, str] = {"Content-Type": "application/json"}
+        if exceeded:
+            headers["Retry-After"] = "1"
+
+        routing_mode = self.routing_mode()
+        probe = query.get("probe") == "true"
+        # The policy never reads the result body: a finished operation counts whether it succeeded or failed.
+        finished = payload.get("status") in ("succeeded", "failed")
+        if routing_mode == "weighted" and finished and not batch and not probe:
+            self._record_latency(normalized, duration)
+        if probe and finished:
+            headers["X-Probe-Score"] = f"{self._record_probe(normalized, duration):.3f}"
+
+        switch_diagnostics: Dict[str, str] = {}
+        switch_timings: Dict[str, float] = {}
+        if exceeded and routing_mode == "failover" and not probe:
+            switch_diagnostics = self._switch_backend(
+                normalized, self._alternate_backend(normalized, threshold), config, switch_timings
+            )
+        switched = switch_diagnostics.get("performed") == "true"
+
+        headers.update({
+            "X-Backend-Used": normalized,
+            "X-Processing-Backend": normalized,
+            "X-Configured-Backend": self.named_values.get("doc-active-backend", "unset"),
+            "X-Requested-Backend": query.get("backendId", ""),
+            "X-Request-Duration": f"{duration:.2f}",
+            "X-Duration-Threshold": threshold_raw,
+            "X-Duration-Threshold-Exceeded": "true" if exceeded else "false",
+            "X-Backend-Switched": "true" if switched else "false",
+            "X-Routing-Mode": routing_mode,
+        })
+        if switch_diagnostics:
+            headers["X-Switch-Lease"] = switch_diagnostics["lease"]
+        if switched:
+            headers["X-Switch-Reason"] = f"Duration {duration:.2f}s exceeded {threshold:.2f}s threshold"
+            headers["X-Old-Backend"] = normalized
+            headers["X-New-Backend"] = switch_diagnostics["new_backend"]
+            headers["X-Named-Value-Update-Status"] = switch_diagnostics["status"]
+            headers["X-Prewarm-Requests"] = switch_diagnostics["prewarm"]
+        elif exceeded:
+            headers["X-Switch-Reason"] = f"Duration {duration:.2f}s exceeded but no switch triggered"
+        else:
+            headers["X-Switch-Reason"] = f"Duration {duration:.2f}s within threshold {threshold:.2f}s"
+        body = json.dumps(payload).encode("utf-8")
+        if self.result_cache is not None and payload.get("status") == "succeeded" and not batch:
+            self.result_cache.complete(result_id, body, normalized)
+        finished = time.perf_counter()
+        headers["Server-Timing"] = _server_timing([
+            ("inbound", inbound_done - started),
+            ("backend", backend_done - inbound_done),
+            ("outbound", finished - backend_done - sum(switch_timings.values())),
+            *switch_timings.items(),
+            ("total", finished - started),
+        ])
+        return 200, headers, body
+
+    def _cached_result(
+        self,
+        cache_key: str,
+        backend_id: str,
+        query: Dict[str, str],
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        cached = self.result_cache.get(cache_key, count=False) if self.result_cache is not None else None
+        if cached is None:
+            return self._error_response(404, "Cached result expired or was evicted; resubmit the document.")
+        duration = self._request_duration(query.get("requestTime", ""))
+        headers = {
+            "Content-Type": "application/json",
+            "X-Backend-Used": backend_id,
+            "X-Processing-Backend": backend_id,
+            "X-Configured-Backend": self.named_values.get("doc-active-backend", "unset"),
+            "X-Requested-Backend": query.get("backendId", ""),
+            "X-Request-Duration": f"{duration:.2f}",
+            "X-Duration-Threshold-Exceeded": "false",
+            "X-Backend-Switched": "false",
+            "X-Routing-Mode": self.routing_mode(),
+            "X-Result-Cache": "HIT",
+        }
+        return 200, headers, cached[0]
+
+    def _switch_backend(
+        self,
+        original: str,
+        new_backend: str,
+        config: Dict[str, Any],
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, str]:
+        timings = {} if timings is None else timings
+        cooldown = config["cooldown"]
+        if new_backend == original:
+            return {"performed": "false", "lease": "stay-put", "new_backend": new_backend, "status": ""}
+        if self.single_flight:
+            active = self.active_backend()
+            if self._pool_id(active) == self._pool_id(new_backend):
+                return {"performed": "false", "lease": "already-active", "new_backend": new_backend, "status": ""}
+            if self.cache.lookup(SWITCH_LEASE_KEY) is not None:
+                return {"performed": "false", "lease": "held", "new_backend": new_backend, "status": ""}
+            lease_owner = str(uuid.uuid4())
+            self.cache.store(SWITCH_LEASE_KEY, lease_owner, cooldown)
+            if self.cache.lookup(SWITCH_LEASE_KEY) != lease_owner:
+                return {"performed": "false", "lease": "held", "new_backend": new_backend, "status": ""}
+        prewarm = self._prewarm(new_backend, timings)
+        token_started = time.perf_counter()
+        token = self._management_token()
+        timings["mgmt-token"] = time.perf_counter() - token_started
+        if not token:
+            return {
+                "performed": "false",
+                "lease": "acquired" if self.single_flight else "disabled",
+                "new_backend": new_backend,
+                "status": "ManagedIdentityUnavailable",
+                "prewarm": prewarm,
+            }
+        patch_started = time.perf_counter()
+        status = self.named_values.patch("doc-active-backend", new_backend)
+        timings["nv-patch"] = time.perf_counter() - patch_started
+        if self.single_flight and 200 <= status < 300:
+            self.cache.store(ACTIVE_BACKEND_DECISION_KEY, new_backend, cooldown)
+            self._demote(original)
+        logger.info("Backend switch %s -> %s [%s]", original, new_backend, status)
+        return {
+            "performed": "true",
+            "lease": "acquired" if self.single_flight else "disabled",
+            "new_backend": new_backend,
+            "status": str(status),
+            "prewarm": prewarm,
+        }
+
+    def _prewarm(self, backend_id: str, timings: Dict[str, float]) -> str:
+        """Fire the ``backend-prewarm-requests`` burst straight at the switch target; returns sent/requested.
+
+        Like the policy's ``send-one-way-request``, the burst skips the gateway and the switch does
+        not wait for it, so the target's cold start is paid in the background.
+        """
+        requested = int(_parse_float(self.named_values.get("backend-prewarm-requests", "0"), 0.0))
+        requested = max(0, min(requested, PREWARM_MAX_REQUESTS))
+        if not requested:
+            return "0/0"
+        started = time.perf_counter()
+        backend = self._backend_for(backend_id)
+        for _ in range(requested):
+            threading.Thread(target=backend.connect, name="prewarm", daemon=True).start()
+        timings["prewarm"] = time.perf_counter() - started
+        return f"{requested}/{requested}"
+
+    @staticmethod
+    def _request_duration(request_time_raw: str) -> float:
+        if not request_time_raw:
+            return 0.0
+        try:
+            decoded = unquote(request_time_raw)
+            if decoded.endswith("Z"):
+                decoded = decoded[:-1] + "+00:00"
+            started = datetime.fromisoformat(decoded)
+        except ValueError:
+            return 0.0
+        if started.tzinfo is None:
+            started = started.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - started).total_seconds()
+
+    @staticmethod
+    def _error_response(status: int, message: str) -> Tuple[int, Dict[str, str], bytes]:
+        body = json.dumps({"error": message}).encode("utf-8")
+        return status, {"Content-Type": "application/json"}, body
+
+
+class _StandinRequestHandler(BaseHTTPRequestHandler):
+    gateway: StandinGateway
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - BaseHTTPRequestHandler signature
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _query(self) -> Dict[str, str]:
+        query = {key: ",".join(values) for key, values in parse_qs(urlparse(self.path).query).items()}
+        if self._subscription_key() not in self.gateway.prober_keys:
+            # As in the policies, only the prober product's subscriptions may mark a request as a probe.
+            query.pop("probe", None)
+        return query
+
+    def _subscription_key(self) -> str:
+        return self.headers.get("Ocp-Apim-Subscription-Key", "")
+
+    def _rate_limited(self) -> bool:
+        """Answer 429 like APIM's ``rate-limit`` when the caller's subscription is over its limit."""
+        limit = self.gateway.subscription_limit
+        retry_after = limit.check(self._subscription_key()) if limit else None
+        if retry_after is None:
+            return False
+        seconds = max(1, math.ceil(retry_after))
+        status, headers, body = StandinGateway._error_response(
+            429, f"Rate limit is exceeded. Try again in {seconds} seconds."
+        )
+        headers["Retry-After"] = str(seconds)
+        self._respond(status, headers, body)
+        return True
+
+    def _respond(self, status: int, headers: Dict[str, str], body: bytes) -> None:
+        if self.gateway.subscription_limit and 200 <= status < 300:
+            self.gateway.subscription_limit.count(self._subscription_key())
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        path = urlparse(self.path).path
+        length = int(self.headers.get("Content-Length", "0") or 0)
+        body = self.rfile.read(length) if length else b""
+        if self._rate_limited():
+            return
+        prefix = "/documentintelligence/documentModels/"
+        if path.startswith(prefix) and path.endswith(":analyze"):
+            model_id = path[len(prefix):-len(":analyze")]
+            base_url = f"http://{self.headers.get('Host', 'localhost')}"
+            self._respond(*self.gateway.analyze(model_id, self._query(), body, base_url))
+            return
+        if path.startswith(prefix) and path.endswith(":analyzeBatch"):
+            model_id = path[len(prefix):-len(":analyzeBatch")]
+            base_url = f"http://{self.headers.get('Host', 'localhost')}"
+            self._respond(*self.gateway.analyze_batch(model_id, self._query(), body, base_url))
+            return
+        self._respond(*StandinGateway._error_response(404, f"No route for POST {path}"))
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if self._rate_limited():
+            return
+        path = urlparse(self.path).path
+        parts = path.strip("/").split("/")
+        if len(parts) == 5 and parts[:2] == ["documentintelligence", "documentModels"]:
+            if parts[3] in ("analyzeResults", "analyzeBatchResults"):
+                batch = parts[3] == "analyzeBatchResults"
+                self._respond(*self.gateway.analyze_results(parts[2], parts[4], self._query(), batch=batch))
+                return
+        self._respond(*StandinGateway._error_response(404, f"No route for GET {path}"))
+
+
+def _region_arg(value: str) -> Tuple[str, float]:
+    name, _, latency = value.partition(":")
+    try:
+        seconds = float(latency)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME:SECONDS, got {value!r}") from None
+    if not re.fullmatch(r"[a-z0-9-]+", name):
+        raise argparse.ArgumentTypeError(f"region name must be lowercase letters, digits or hyphens: {name!r}")
+    return name, seconds
+
+
+def _regions(args: argparse.Namespace) -> List[Tuple[str, float]]:
+    """Regions in failover order: every --region, else west and north with their latency flags."""
+    return list(args.region) if args.region else [("west", args.west_latency), ("north", args.north_latency)]
+
+
+def build_gateway(
+    args: argparse.Namespace,
+    single_flight: Optional[bool] = None,
+    policy_cache: Optional[bool] = None,
+) -> StandinGateway:
+    regions = _regions(args)
+    pool_ids = [f"doc-{name}-pool" for name, _ in regions]
+    named_values = NamedValueStore(
+        {
+            "doc-active-backend": args.active_backend or pool_ids[0],
+            "doc-backend-pools": ",".join(pool_ids),
+            "backend-switch-threshold": str(args.threshold),
+            "backend-switch-batch-threshold": str(args.batch_threshold),
+            "backend-switch-cooldown": str(args.cooldown),
+            "backend-prewarm-requests": str(args.prewarm_requests),
+            "backend-routing-mode": args.routing_mode,
+        },
+        patch_latency=args.patch_latency,
+        arm_rate_limit=args.arm_rate_limit,
+    )
+    backends = {
+        pool_id: SimulatedBackend(
+            pool_id, latency, args.page_latency, args.cold_start, args.cold_after, args.submit_rate_limit
+        )
+        for pool_id, (_, latency) in zip(pool_ids, regions)
+    }
+    result_cache = None
+    if args.result_cache:
+        result_cache = ResultCache(
+            ttl=args.result_cache_ttl,
+            max_entries=args.result_cache_entries,
+            max_bytes=int(args.result_cache_mb * 1024 * 1024),
+        )
+    return StandinGateway(
+        backends,
+        named_values,
+        single_flight=args.single_flight if single_flight is None else single_flight,
+        identity=ManagedIdentityEmulator(latency=args.token_latency),
+        policy_cache=args.policy_cache if policy_cache is None else policy_cache,
+        result_cache=result_cache,
+        batch_documents=args.batch_documents,
+        subscription_limit=(
+            SubscriptionRateLimit(args.subscription_rate_limit, args.subscription_renewal_period)
+            if args.subscription_rate_limit > 0 else None
+        ),
+        prober_keys=args.prober_key,
+    )
+
+
+def serve(gateway: StandinGateway, host: str, port: int) -> None:
+    handler = type("StandinRequestHandler", (_StandinRequestHandler,), {"gateway": gateway})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    print(f"Local APIM stand-in listening on http://{host}:{server.server_address[1]}")
+    print("Point the tester at it with AZURE_APIM_ENDPOINT set to that URL and any AZURE_APIM_KEY.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if gateway.result_cache is not None:
+            print(f"Result cache: {gateway.result_cache.stats()}")
+        if gateway.subscription_limit and gateway.subscription_limit.throttled:
+            throttled = {f"...{key[-4:]}": count for key, count in sorted(gateway.subscription_limit.throttled.items())}
+            print(f"Subscription 429s by key: {throttled}")
+
+
+def run_switch_storm(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Fire ``args.storm`` concurrent slow polls per wave with and without single-flight switching."""
+    summaries: List[Dict[str, Any]] = []
+    for single_flight in (False, True):
+        gateway = build_gateway(args, single_flight=single_flight)
+        stale_time = quote(
+            datetime.fromtimestamp(time.time() - args.threshold - 1, timezone.utc).isoformat(), safe=""
+        )
+        operations = []
+        pool_ids = gateway.pool_ids()
+        for index in range(args.storm):
+            backend_id = pool_ids[index % len(pool_ids)]
+            operations.append((backend_id, gateway.backends[backend_id].submit("prebuilt-read", 0)))
+
+        switched_responses = 0
+        started = time.perf_counter()
+        for _ in range(args.waves):
+            barrier = threading.Barrier(len(operations))
+            results: List[Dict[str, str]] = []
+            results_lock = threading.Lock()
+
+            def poll(backend_id: str, operation_id: str) -> None:
+                barrier.wait()
+                _, headers, _ = gateway.analyze_results(
+                    "prebuilt-read",
+                    operation_id,
+                    {"backendId": backend_id, "requestTime": stale_time, "api-version": DEFAULT_API_VERSION},
+                )
+                with results_lock:
+                    results.append(headers)
+
+            threads = [threading.Thread(target=poll, args=operation) for operation in operations]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            switched_responses += sum(1 for headers in results if headers.get("X-Backend-Switched") == "true")
+        elapsed = time.perf_counter() - started
+
+        named_values = gateway.named_values
+        summaries.append({
+            "Mode": "single-flight" if single_flight else "per-poll PATCH",
+            "Polls": args.storm * args.waves,
+            "PATCH calls": named_values.patch_count,
+            "ARM 429s": named_values.throttled_count,
+            "Backend flips": named_values.flip_count(),
+            "Switched responses": switched_responses,
+            "Final backend": gateway.active_backend(),
+            "Elapsed": f"{elapsed:.2f}s",
+        })
+    print(tabulate(summaries, headers="keys", tablefmt="github"))
+    return summaries
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(percentile / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_poll_benchmark(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Measure per-poll gateway overhead with and without the policy cache.
+
+    ``steady`` polls stay under the threshold; ``switching`` polls are past it with the switch
+    lease disabled, so each one evaluates a switch and needs a management token.
+    """
+    summaries: List[Dict[str, Any]] = []
+    fresh_time = quote(_utc_now_iso(), safe="")
+    stale_time = quote(
+        datetime.fromtimestamp(time.time() - args.threshold - 1, timezone.utc).isoformat(), safe=""
+    )
+    for scenario, request_time in (("steady", fresh_time), ("switching", stale_time)):
+        for policy_cache in (False, True):
+            bench_args = argparse.Namespace(**vars(args))
+            bench_args.patch_latency = 0.0
+            bench_args.arm_rate_limit = 0
+            gateway = build_gateway(bench_args, single_flight=False, policy_cache=policy_cache)
+            pool_id = gateway.pool_ids()[0]
+            operation_id = gateway.backends[pool_id].submit("prebuilt-read", 0)
+            query = {"backendId": pool_id, "requestTime": request_time, "api-version": DEFAULT_API_VERSION}
+            samples: List[float] = []
+            for _ in range(args.benchmark):
+                started = time.perf_counter()
+                gateway.analyze_results("prebuilt-read", operation_id, query)
+                samples.append(time.perf_counter() - started)
+            summaries.append({
+                "Scenario": scenario,
+                "Policy cache": "on" if policy_cache else "off",
+                "Polls": len(samples),
+                "Mean (us)": f"{sum(samples) / len(samples) * 1e6:.1f}",
+                "p99 (us)": f"{_percentile(samples, 99) * 1e6:.1f}",
+                "Token fetches": gateway.identity.fetch_count,
+            })
+    print(tabulate(summaries, headers="keys", tablefmt="github"))
+    return summaries
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run a local stand-in for the APIM gateway and the Document Intelligence regions",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument("--west-latency", type=float, default=7.0, help="Seconds doc-west-pool takes per operation")
+    parser.add_argument("--north-latency", type=float, default=3.0, help="Seconds doc-north-pool takes per operation")
+    parser.add_argument(
+        "--region",
+        action="append",
+        type=_region_arg,
+        metavar="NAME:SECONDS",
+        help="Add region pool doc-NAME-pool taking SECONDS per operation; repeat in failover order "
+        "(replaces west and north)",
+    )
+    parser.add_argument(
+        "--page-latency",
+        type=float,
+        default=0.0,
+        help="Extra seconds per analyzed PDF page on every region (default: 0)",
+    )
+    parser.add_argument("--active-backend", help="Initial doc-active-backend (default: the first region's pool)")
+    parser.add_argument(
+        "--routing-mode",
+        default="failover",
+        choices=ROUTING_MODES,
+        help="backend-routing-mode: flip doc-active-backend on slow polls, or split new POSTs by latency EWMA",
+    )
+    parser.add_argument("--threshold", type=float, default=5.0, help="backend-switch-threshold in seconds")
+    parser.add_argument(
+        "--batch-threshold",
+        type=float,
+        default=300.0,
+        help="backend-switch-batch-threshold in seconds, applied to analyzeBatchResults polls",
+    )
+    parser.add_argument(
+        "--batch-documents",
+        type=int,
+        default=20,
+        help="Documents the stand-in pretends each analyzeBatch source container holds (default: 20)",
+    )
+    parser.add_argument("--cooldown", type=float, default=60.0, help="backend-switch-cooldown in seconds")
+    parser.add_argument(
+        "--prewarm-requests",
+        type=int,
+        default=3,
+        help=f"backend-prewarm-requests: warm-up requests sent to the switch target, 0-{PREWARM_MAX_REQUESTS} (default: 3)",
+    )
+    parser.add_argument(
+        "--cold-start",
+        type=float,
+        default=0.0,
+        help="Seconds a region's first request pays after --cold-after idle seconds (default: 0)",
+    )
+    parser.add_argument("--cold-after", type=float, default=60.0, help="Idle seconds before a region goes cold (default: 60)")
+    parser.add_argument(
+        "--submit-rate-limit",
+        type=int,
+        default=0,
+        help="Submissions per second each region accepts before answering 429 with Retry-After (0 disables)",
+    )
+    parser.add_argument(
+        "--subscription-rate-limit",
+        type=int,
+        default=0,
+        metavar="CALLS",
+        help="Successful requests each subscription key may make per renewal period before 429 (0 disables)",
+    )
+    parser.add_argument(
+        "--subscription-renewal-period",
+        type=float,
+        default=60.0,
+        help="Seconds in the --subscription-rate-limit window (default: 60)",
+    )
+    parser.add_argument(
+        "--prober-key",
+        action="append",
+        default=[],
+        metavar="KEY",
+        help="Subscription key of the backend-probe-product prober; probe=true from other keys is ignored (repeatable)",
+    )
+    parser.add_argument("--patch-latency", type=float, default=0.05, help="Simulated ARM PATCH latency in seconds")
+    parser.add_argument(
+        "--arm-rate-limit",
+        type=int,
+        default=10,
+        help="Named-value PATCHes per second ARM accepts before returning 429 (0 disables)",
+    )
+    parser.add_argument(
+        "--no-single-flight",
+        dest="single_flight",
+        action="store_false",
+        help="Disable the switch lease so every slow poll PATCHes the named value",
+    )
+    parser.add_argument(
+        "--token-latency",
+        type=float,
+        default=0.02,
+        help="Simulated managed-identity token fetch latency in seconds",
+    )
+    parser.add_argument(
+        "--no-policy-cache",
+        dest="policy_cache",
+        action="store_false",
+        help="Fetch the management token on every switch evaluation",
+    )
+    parser.add_argument(
+        "--result-cache",
+        action="store_true",
+        help="Serve re-submitted documents from a content-addressed result cache",
+    )
+    parser.add_argument("--result-cache-ttl", type=float, default=3600.0, help="Seconds a cached result stays valid")
+    parser.add_argument("--result-cache-entries", type=int, default=256, help="Maximum cached results (LRU eviction)")
+    parser.add_argument("--result-cache-mb", type=float, default=64.0, help="Maximum total size of cached results in MB")
+    parser.add_argument(
+        "--storm",
+        type=int,
+        metavar="N",
+        help="Instead of serving, fire N concurrent slow polls and compare switching with and without single-flight",
+    )
+    parser.add_argument("--waves", type=int, default=3, help="Number of concurrent poll waves in --storm mode")
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="N",
+        help="Instead of serving, time N polls per scenario with the policy cache off and on",
+    )
+    args = parser.parse_args(argv)
+    pool_ids = [f"doc-{name}-pool" for name, _ in _regions(args)]
+    if len(set(pool_ids)) != len(pool_ids):
+        parser.error("--region names must be unique")
+    if args.active_backend and args.active_backend not in pool_ids:
+        parser.error(f"--active-backend must be one of {', '.join(pool_ids)}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.storm:
+        run_switch_storm(args)
+        return 0
+    if args.benchmark:
+        run_poll_benchmark(args)
+        return 0
+    logger.setLevel(logging.INFO)
+    serve(build_gateway(args), args.host, args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""On-disk checkpoint of the tester's in-flight analyze operations.
+
+Each operation is recorded after its POST is accepted and dropped once its final GET returns,
+so the file only ever holds what a crashed run left behind. Records keep the SDK continuation
+token plus the ``Operation-Location``, start time, backend, mode (soak, hedge, replay, split or
+batch) and run number, which is enough for ``--resume`` to re-attach a poller and report the
+operation as if the run had never stopped.
+The file is rewritten atomically on every change and stays a few KB regardless of run length.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+class OperationCheckpoint:
+    """In-flight operations keyed by operation ID, persisted to a JSON file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._operations: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                loaded = json.loads(self.path.read_text(encoding="utf-8") or "{}")
+            except json.JSONDecodeError:
+                loaded = {}
+            self._operations = {key: value for key, value in loaded.items() if isinstance(value, dict)}
+
+    def add(
+        self,
+        operation_id: str,
+        token: str,
+        operation_location: str,
+        backend: str,
+        started: float,
+        **extra: Any,
+    ) -> None:
+        record = {
+            "token": token,
+            "operation_location": operation_location,
+            "backend": backend,
+            "started": round(started, 3),
+            **extra,
+        }
+        with self._lock:
+            self._operations[operation_id] = record
+            self._write()
+
+    def remove(self, operation_id: str) -> None:
+        with self._lock:
+            if self._operations.pop(operation_id, None) is not None:
+                self._write()
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Checkpointed operations, oldest first, each with its ``operation_id``."""
+        with self._lock:
+            records = [{"operation_id": key, **value} for key, value in self._operations.items()]
+        return sorted(records, key=lambda record: record.get("started", 0.0))
+
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        temporary.write_text(json.dumps(self._operations, separators=(",", ":")), encoding="utf-8")
+        os.replace(temporary, self.path)
@@ -0,0 +1,110 @@
+"""Page-range splitting and ``analyzeResult`` merging for the tester's split mode.
+
+Document Intelligence analyzes only the pages named in ``pages`` and reports spans relative to
+that chunk's own ``content``. Merging concatenates the chunks in page order, shifts every span
+offset by the content in front of it, renumbers pages if the service counted them from 1, and
+re-points ``/paragraphs/N``-style element references at the merged collections.
+"""
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_SEPARATOR = "\n"
+
+_PAGE_OBJECT_PATTERN = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+_ELEMENT_REFERENCE_PATTERN = re.compile(r"^/(\w+)/(\d+)(.*)$")
+
+
+def pdf_page_count(data: bytes) -> int:
+    """Best-effort page count of a PDF without a PDF library; 0 when it cannot be determined.
+
+    Page objects stored in compressed object streams are invisible to this scan, so callers
+    should accept an explicit page count for such files.
+    """
+    if not data.startswith(b"%PDF"):
+        return 0
+    return len(_PAGE_OBJECT_PATTERN.findall(data))
+
+
+def page_ranges(page_count: int, pages_per_chunk: int) -> List[Tuple[int, int]]:
+    """Split ``1..page_count`` into inclusive ``(first, last)`` ranges of ``pages_per_chunk`` pages."""
+    step = max(1, pages_per_chunk)
+    return [(first, min(first + step - 1, page_count)) for first in range(1, page_count + 1, step)]
+
+
+def format_pages(first: int, last: int) -> str:
+    """Render a range in the ``pages`` parameter syntax, e.g. ``"3"`` or ``"3-4"``."""
+    return str(first) if first == last else f"{first}-{last}"
+
+
+def parse_pages(spec: str) -> List[int]:
+    """Expand a ``pages`` parameter such as ``"1-3,5"`` into sorted page numbers."""
+    pages = set()
+    for part in spec.split(","):
+        first, _, last = part.strip().partition("-")
+        if not first.isdigit() or (last and not last.isdigit()):
+            continue
+        pages.update(range(int(first), int(last or first) + 1))
+    return sorted(pages)
+
+
+def _shift_reference(reference: Any, bases: Dict[str, int]) -> Any:
+    if not isinstance(reference, str):
+        return reference
+    match = _ELEMENT_REFERENCE_PATTERN.match(reference)
+    if not match:
+        return reference
+    collection, index, rest = match.groups()
+    return f"/{collection}/{int(index) + bases.get(collection, 0)}{rest}"
+
+
+def _shift(node: Any, offset: int, page_delta: int, bases: Dict[str, int]) -> Any:
+    if isinstance(node, list):
+        return [_shift(item, offset, page_delta, bases) for item in node]
+    if not isinstance(node, dict):
+        return node
+    shifted: Dict[str, Any] = {}
+    for key, value in node.items():
+        if key == "span" and isinstance(value, dict):
+            shifted[key] = {**value, "offset": value.get("offset", 0) + offset}
+        elif key == "spans" and isinstance(value, list):
+            shifted[key] = [{**span, "offset": span.get("offset", 0) + offset} for span in value]
+        elif key == "pageNumber" and isinstance(value, int):
+            shifted[key] = value + page_delta
+        elif key == "elements" and isinstance(value, list):
+            shifted[key] = [_shift_reference(reference, bases) for reference in value]
+        else:
+            shifted[key] = _shift(value, offset, page_delta, bases)
+    return shifted
+
+
+def merge_analyze_results(parts: Sequence[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Merge ``(first_page, analyzeResult)`` chunks into one result covering every chunk.
+
+    Offsets are only meaningful if every chunk was analyzed with the same ``stringIndexType``;
+    the tester requests ``unicodeCodePoint`` so they line up with Python string lengths.
+    """
+    merged: Dict[str, Any] = {}
+    contents: List[str] = []
+    length = 0
+    for first_page, result in sorted(parts, key=lambda part: part[0]):
+        content = result.get("content") or ""
+        offset = length + len(CONTENT_SEPARATOR) if contents and content else length
+        page_numbers = [page.get("pageNumber") for page in result.get("pages") or []]
+        first_reported: Optional[int] = min((n for n in page_numbers if isinstance(n, int)), default=None)
+        page_delta = first_page - first_reported if first_reported is not None else 0
+        bases = {key: len(value) for key, value in merged.items() if isinstance(value, list)}
+
+        for key, value in _shift(result, offset, page_delta, bases).items():
+            if key == "content":
+                continue
+            if isinstance(value, list):
+                merged.setdefault(key, []).extend(value)
+            else:
+                merged.setdefault(key, value)
+        if content:
+            if contents:
+                contents.append(CONTENT_SEPARATOR)
+            contents.append(content)
+            length = offset + len(content)
+    merged["content"] = "".join(contents)
+    return merged
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""SQLite store of the tester's per-operation results, for queries across runs.
+
+When the tester is given ``--results-db``, every finished operation is appended as one row of
+the ``results`` table: its run, mode, start and end time, the POST and final backends, statuses,
+total time, switch and hedge outcome, polls, subscription key, and any remaining result fields as
+JSON. The database runs in WAL mode, so runs can append while a report reads. Indexes on end time
+and the final backend keep filtered queries fast however many weeks of runs the file holds.
+
+Percentiles are computed inside SQLite with window functions (nearest rank per group), so a
+report over hundreds of thousands of operations never loads them into Python. Run the module to
+report, e.g. p99 on doc-north-pool for switched operations by hour::
+
+    python tests/integration/results_store.py --backend doc-north-pool --switched --by hour
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from tabulate import tabulate
+
+DEFAULT_RESULTS_DB = Path(__file__).resolve().parents[2] / "logs" / "results.db"
+PERCENTILES = (50, 95, 99)
+
+# Column -> result keys to read it from, first present wins. Replay results use the short names.
+COLUMNS: Dict[str, Tuple[str, ...]] = {
+    'test_name': ('test_name',),
+    'post_backend': ('post_backend',),
+    'get_backend': ('get_backend', 'backend'),
+    'post_status': ('post_status',),
+    'get_status': ('get_status', 'status'),
+    'total_time': ('total_time', 'latency', 'elapsed'),
+    'post_seconds': ('post_seconds',),
+    'switching_occurred': ('switching_occurred', 'switched'),
+    'switched_to': ('switched_to',),
+    'success': ('success',),
+    'hedge_winner': ('hedge_winner',),
+    'result_cache': ('result_cache',),
+    'polls': ('polls',),
+    'subscription_key': ('subscription_key',),
+}
+# Bulky or derived fields that are not worth keeping per row.
+_SKIPPED_FIELDS = {'operation_query', 'result'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL NOT NULL,
+    test_name TEXT,
+    post_backend TEXT,
+    get_backend TEXT,
+    post_status INTEGER,
+    get_status INTEGER,
+    total_time REAL,
+    post_seconds REAL,
+    switching_occurred INTEGER,
+    switched_to TEXT,
+    success INTEGER,
+    hedge_winner TEXT,
+    result_cache TEXT,
+    polls INTEGER,
+    subscription_key TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS results_finished ON results (finished);
+CREATE INDEX IF NOT EXISTS results_backend_finished ON results (get_backend, finished);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+"""
+
+# Group expressions for --by; times are stored as UTC epoch seconds.
+GROUPINGS = {
+    'hour': "strftime('%Y-%m-%d %H:00', finished, 'unixepoch')",
+    'day': "strftime('%Y-%m-%d', finished, 'unixepoch')",
+    'run': "run_id",
+    'backend': "get_backend",
+    'mode': "mode",
+    'key': "subscription_key",
+}
+
+
+def _column_value(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str) and value.lower() in ('true', 'false'):
+        return int(value.lower() == 'true')
+    return value if value != '' else None
+
+
+class ResultsStore:
+    """Appends result dicts to the ``results`` table; one connection shared by the tester's threads."""
+
+    def __init__(self, path: Path, run_id: Optional[str] = None) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.run_id = run_id or datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+
+    def append(self, result: Dict[str, Any], mode: str, finished: Optional[float] = None) -> None:
+        finished = finished if finished is not None else time.time()
+        row: Dict[str, Any] = {'run_id': self.run_id, 'mode': mode, 'finished': finished}
+        used = set()
+        for column, keys in COLUMNS.items():
+            key = next((key for key in keys if key in result), None)
+            row[column] = _column_value(result[key]) if key else None
+            used.add(key)
+        row['started'] = finished - float(row['total_time'] or 0.0)
+        extra = {
+            key: value for key, value in result.items()
+            if key not in used and key not in _SKIPPED_FIELDS and value not in ('', None)
+        }
+        row['extra'] = json.dumps(extra, default=str, separators=(',', ':')) if extra else None
+        names = ', '.join(row)
+        placeholders = ', '.join(f':{name}' for name in row)
+        with self._lock:
+            self._connection.execute(f"INSERT INTO results ({names}) VALUES ({placeholders})", row)
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def latency_report(
+    connection: sqlite3.Connection,
+    by: str = 'hour',
+    backend: Optional[str] = None,
+    switched: Optional[bool] = None,
+    mode: Optional[str] = None,
+    since: Optional[float] = None,
+    percentiles: Tuple[int, ...] = PERCENTILES,
+) -> List[Dict[str, Any]]:
+    """Operations, mean, percentiles and max of ``total_time`` per ``by`` group, oldest group first."""
+    conditions = ["total_time IS NOT NULL"]
+    parameters: Dict[str, Any] = {}
+    if backend:
+        conditions.append("get_backend = :backend")
+        parameters['backend'] = backend
+    if switched is not None:
+        conditions.append("switching_occurred = :switched")
+        parameters['switched'] = int(switched)
+    if mode:
+        conditions.append("mode = :mode")
+        parameters['mode'] = mode
+    if since is not None:
+        conditions.append("finished >= :since")
+        parameters['since'] = since
+    # Nearest rank: the smallest value whose rank reaches p% of the group.
+    percentile_columns = ''.join(
+        f", MIN(CASE WHEN position * 100 >= {int(p)} * size THEN total_time END) AS p{int(p)}" for p in percentiles
+    )
+    query = f"""
+        WITH ranked AS (
+            SELECT {GROUPINGS[by]} AS bucket, total_time,
+                   ROW_NUMBER() OVER (PARTITION BY {GROUPINGS[by]} ORDER BY total_time) AS position,
+                   COUNT(*) OVER (PARTITION BY {GROUPINGS[by]}) AS size
+            FROM results
+            WHERE {' AND '.join(conditions)}
+        )
+        SELECT bucket, COUNT(*) AS operations, AVG(total_time) AS mean{percentile_columns}, MAX(total_time) AS max
+        FROM ranked
+        GROUP BY bucket
+        ORDER BY bucket
+    """
+    connection.row_factory = sqlite3.Row
+    return [dict(row) for row in connection.execute(query, parameters)]
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Report operation latency across tester runs from the results store")
+    parser.add_argument("--db", type=Path, default=DEFAULT_RESULTS_DB, help="Results database (default: logs/results.db)")
+    parser.add_argument("--by", choices=sorted(GROUPINGS), default='hour', help="Group rows by (default: hour)")
+    parser.add_argument("--backend", help="Only operations that finished on this pool, e.g. doc-north-pool")
+    switched = parser.add_mutually_exclusive_group()
+    switched.add_argument("--switched", dest="switched", action="store_true", default=None, help="Only switched operations")
+    switched.add_argument("--unswitched", dest="switched", action="store_false", help="Only operations that were not switched")
+    parser.add_argument("--mode", help="Only operations from this tester mode (soak, replay, resume)")
+    parser.add_argument("--days", type=float, help="Only operations that finished in the last DAYS days")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    if not args.db.exists():
+        print(f"No results database at {args.db}")
+        return 1
+    connection = sqlite3.connect(str(args.db))
+    try:
+        since = time.time() - args.days * 86400 if args.days else None
+        rows = latency_report(connection, args.by, args.backend, args.switched, args.mode, since)
+    finally:
+        connection.close()
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    if not rows:
+        print("No operations match")
+        return 1
+    table = [
+        {
+            args.by.capitalize(): row['bucket'],
+            'Operations': row['operations'],
+            'Mean (s)': f"{row['mean']:.2f}",
+            **{f"p{p} (s)": f"{row[f'p{p}']:.2f}" for p in PERCENTILES},
+            'Max (s)': f"{row['max']:.2f}",
+        }
+        for row in rows
+    ]
+    print(tabulate(table, headers="keys", tablefmt="github"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
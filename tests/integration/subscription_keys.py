@@ -0,0 +1,146 @@
+"""Subscription-key sharding for the backend switching tester.
+
+APIM applies a product's ``rate-limit`` and ``quota`` per subscription, so a run that sends
+everything with one key measures that subscription's allowance rather than the backends. The API's
+``rate-limit-by-key`` counts per caller IP and is shared by every key. With a key pool, every
+operation is assigned a key when it is submitted and keeps it for its POST and all of its polls.
+``round-robin`` hands keys out in turn. ``least-used`` picks the key that has sent the fewest
+requests, skipping keys still inside a 429's ``Retry-After``. Per-key request, 429 and error
+counts are kept for the end-of-run report.
+
+Keys come from a file (one per line, ``#`` comments allowed) or from ``AZURE_APIM_KEYS``
+(comma-separated). Either form accepts ``label=key`` so reports can name tenants. Unlabelled keys
+are reported as ``key1``, ``key2``, ... and the keys themselves are never logged.
+"""
+import itertools
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+from admission_control import parse_retry_after
+
+KEY_OPTION = "subscription_key"
+KEY_HEADER = "Ocp-Apim-Subscription-Key"
+ASSIGNMENTS = ("round-robin", "least-used")
+
+
+def parse_keys(text: str) -> List[Tuple[str, str]]:
+    """``(label, key)`` pairs from newline- or comma-separated entries, each ``key`` or ``label=key``."""
+    entries: List[Tuple[str, str]] = []
+    for line in text.splitlines():
+        for raw in line.split('#', 1)[0].split(','):
+            label, separator, key = raw.strip().partition('=')
+            if not separator:
+                label, key = '', label
+            if not key.strip():
+                continue
+            entries.append((label.strip() or f"key{len(entries) + 1}", key.strip()))
+    labels = [label for label, _ in entries]
+    duplicates = sorted({label for label in labels if labels.count(label) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate subscription key labels: {', '.join(duplicates)}")
+    return entries
+
+
+def load_keys(path: Optional[str] = None, key_list: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Keys from ``path`` if given, else from the comma-separated ``key_list``."""
+    if path:
+        return parse_keys(Path(path).read_text(encoding="utf-8"))
+    return parse_keys(key_list or "")
+
+
+class SubscriptionKeyPool:
+    """Assigns subscription keys to operations and counts what each key sent."""
+
+    def __init__(
+        self,
+        keys: List[Tuple[str, str]],
+        assignment: str = "round-robin",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not keys:
+            raise ValueError("A subscription key pool needs at least one key")
+        if assignment not in ASSIGNMENTS:
+            raise ValueError(f"Unknown key assignment {assignment!r}; expected one of {', '.join(ASSIGNMENTS)}")
+        self.assignment = assignment
+        self._keys = dict(keys)
+        self._labels = [label for label, _ in keys]
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rotation = itertools.cycle(self._labels)
+        self._stats: Dict[str, Dict[str, float]] = {
+            label: {'assigned': 0, 'requests': 0, 'accepted': 0, 'throttled': 0, 'errors': 0}
+            for label in self._labels
+        }
+        self._blocked_until: Dict[str, float] = {label: 0.0 for label in self._labels}
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def __contains__(self, label: object) -> bool:
+        return label in self._keys
+
+    def key(self, label: str) -> str:
+        return self._keys[label]
+
+    def assign(self) -> str:
+        """Label of the key the next operation should use."""
+        with self._lock:
+            if self.assignment == "round-robin":
+                label = next(self._rotation)
+            else:
+                now = self._clock()
+                open_labels = [label for label in self._labels if self._blocked_until[label] <= now] or self._labels
+                label = min(
+                    open_labels,
+                    key=lambda name: (self._stats[name]['requests'], self._stats[name]['assigned']),
+                )
+            self._stats[label]['assigned'] += 1
+            return label
+
+    def record(self, label: str, method: str, status: int, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            stats = self._stats[label]
+            stats['requests'] += 1
+            if status == 429:
+                stats['throttled'] += 1
+                if retry_after:
+                    self._blocked_until[label] = max(self._blocked_until[label], self._clock() + retry_after)
+            elif status >= 400 and status != 404:  # 404 is how a switched operation ends
+                stats['errors'] += 1
+            elif method == 'POST' and 200 <= status < 300:
+                stats['accepted'] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {label: dict(self._stats[label]) for label in self._labels}
+
+
+class SubscriptionKeyPolicy(SansIOHTTPPolicy):
+    """Authentication policy that sends each request with its operation's key from the pool.
+
+    The key travels as the ``subscription_key`` request option, which the SDK passes to both the
+    initial POST and the poller. Requests without one are assigned a key as they are sent.
+    """
+
+    def __init__(self, pool: SubscriptionKeyPool) -> None:
+        self.pool = pool
+
+    def on_request(self, request) -> None:
+        label = request.context.options.pop(KEY_OPTION, None) or request.context.get(KEY_OPTION)
+        if label not in self.pool:
+            label = self.pool.assign()
+        request.context[KEY_OPTION] = label
+        request.http_request.headers[KEY_HEADER] = self.pool.key(label)
+
+    def on_response(self, request, response) -> None:
+        http_response = response.http_response
+        self.pool.record(
+            request.context[KEY_OPTION],
+            request.http_request.method,
+            http_response.status_code,
+            parse_retry_after(http_response.headers.get('Retry-After')),
+        )
@@ -0,0 +1,172 @@
+"""Unit tests for the AIMD token buckets and the admission pipeline policy."""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import pytest
+
+import admission_control
+from admission_control import (
+    MIN_RATE,
+    AdmissionController,
+    AdmissionPolicy,
+    TokenBucket,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    """Monotonic clock that only moves when a test (or a patched ``time.sleep``) advances it."""
+
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(admission_control.time, "sleep", fake.sleep)
+    return fake
+
+
+def _exchange(method, url, status=202, headers=None, context=None):
+    """A pipeline request/response pair with just the fields the policy reads."""
+    request = SimpleNamespace(
+        http_request=SimpleNamespace(method=method, url=url),
+        context={} if context is None else context,
+    )
+    response = SimpleNamespace(http_response=SimpleNamespace(status_code=status, headers=headers or {}))
+    return request, response
+
+
+def test_throttle_halves_the_rate():
+    bucket = TokenBucket(rate=2.0)
+
+    bucket.on_throttled()
+
+    assert bucket.rate == 1.0
+    assert bucket.snapshot()['throttled'] == 1
+    assert bucket.snapshot()['lowest_rate'] == 1.0
+
+
+def test_rate_never_drops_below_the_floor():
+    bucket = TokenBucket(rate=0.08)
+
+    for _ in range(5):
+        bucket.on_throttled()
+
+    assert bucket.rate == MIN_RATE
+
+
+def test_rate_never_rises_above_the_ceiling():
+    bucket = TokenBucket(rate=1.0, max_rate=1.2, increase=0.1)
+
+    for _ in range(10):
+        bucket.on_success()
+
+    assert bucket.rate == 1.2
+    assert TokenBucket(rate=0.5).max_rate == 2.0
+
+
+def test_rate_recovers_additively_after_a_throttle():
+    bucket = TokenBucket(rate=2.0, increase=0.25)
+    bucket.on_throttled()
+
+    rates = []
+    for _ in range(4):
+        bucket.on_success()
+        rates.append(bucket.rate)
+
+    assert rates == [1.25, 1.5, 1.75, 2.0]
+
+
+def test_burst_is_admitted_without_waiting(clock):
+    bucket = TokenBucket(rate=1.0, burst=3, clock=clock)
+
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_throttle_drops_saved_tokens(clock):
+    bucket = TokenBucket(rate=2.0, burst=4, clock=clock)
+
+    bucket.on_throttled()
+
+    assert bucket.acquire() == pytest.approx(1.0)  # one token at the halved rate of 1/s
+
+
+def test_retry_after_closes_the_bucket_until_it_has_passed(clock):
+    bucket = TokenBucket(rate=10.0, clock=clock)
+    throttled_at = clock.now
+
+    bucket.on_throttled(retry_after=3.0)
+    waited = bucket.acquire()
+
+    assert waited >= 3.0
+    assert clock.now >= throttled_at + 3.0
+    assert bucket.snapshot()['waited'] == waited
+
+
+def test_parse_retry_after_seconds_and_http_date():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 <= parse_retry_after(in_a_minute) <= 60
+
+
+def test_controller_shares_one_bucket_per_pool():
+    controller = AdmissionController(rate=1.0)
+
+    assert controller.bucket('doc-west') is controller.bucket('doc-west-pool')
+    assert controller.bucket('doc-north-pool') is not controller.bucket('doc-west-pool')
+
+
+def test_policy_feeds_429_and_retry_after_to_the_pinned_pool(clock):
+    controller = AdmissionController(rate=2.0)
+    policy = AdmissionPolicy(controller, 'doc-west-pool')
+    request, response = _exchange(
+        'POST', 'https://apim/doc:analyze?backendId=doc-north-pool', 429, {'Retry-After': '4'}
+    )
+
+    policy.on_request(request)
+    policy.on_response(request, response)
+
+    north = controller.bucket('doc-north-pool')
+    assert north.rate == 1.0
+    assert north.throttled == 1
+    assert controller.bucket('doc-west-pool').rate == 2.0
+
+
+def test_policy_follows_the_gateway_for_unpinned_posts(clock):
+    controller = AdmissionController(rate=1.0, increase=0.5)
+    policy = AdmissionPolicy(controller, 'doc-west-pool')
+    request, response = _exchange('POST', 'https://apim/doc:analyze', 202, {'X-Backend-Used': 'doc-north-pool'})
+
+    policy.on_request(request)
+    policy.on_response(request, response)
+
+    assert controller.bucket('doc-north-pool').rate == 1.5
+    follow_up, _ = _exchange('POST', 'https://apim/doc:analyze')
+    policy.on_request(follow_up)
+    assert follow_up.context['admission_backend'] == 'doc-north-pool'
+
+
+def test_throttled_poll_slows_submissions_without_taking_a_token(clock):
+    controller = AdmissionController(rate=2.0)
+    policy = AdmissionPolicy(controller, 'doc-west-pool')
+    request, response = _exchange('GET', 'https://apim/doc/analyzeResults/1?backendId=doc-west-pool', 429)
+
+    policy.on_request(request)
+    policy.on_response(request, response)
+
+    west = controller.bucket('doc-west-pool')
+    assert west.admitted == 0
+    assert west.rate == 1.0
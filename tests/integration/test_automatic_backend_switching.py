@@ -19,24 +19,41 @@ EXPECTED IN PRODUCTION (with working automatic switching at 5 seconds):
 """
 import argparse
 import base64
-import binascii
+import hashlib
 import json
 import logging
 import os
+import queue
+import re
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import parse_qs, parse_qsl, urlparse
 from email.utils import parsedate_to_datetime
 
 from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.core.credentials import AzureKeyCredential
 from azure.core.exceptions import HttpResponseError
+from azure.core.polling.base_polling import LROBasePolling
 from dotenv import load_dotenv
 from tabulate import tabulate
 
+from admission_control import DEFAULT_BURST, AdmissionController, AdmissionPolicy
+from completion_model import CompletionModel
+from json_scan import base64_decoded_length, scan_string_fields, string_length
+from operation_checkpoint import OperationCheckpoint
+from page_split import format_pages, merge_analyze_results, page_ranges, pdf_page_count
+from results_store import ResultsStore
+from subscription_keys import ASSIGNMENTS, KEY_OPTION, SubscriptionKeyPolicy, SubscriptionKeyPool, load_keys
+from tester_metrics import TesterMetrics, serve_metrics
+from tester_profiler import DEFAULT_INTERVAL, DEFAULT_MEMORY_FRAMES, PhaseTarget, SamplingProfiler
+from tester_tracing import OPERATION_OPTION, TraceparentPolicy, create_tracer, otel_available
+from tester_transport import DEFAULT_KEEPALIVE_IDLE, DEFAULT_POOL_SIZE, create_transport, http2_available
+
 # Load environment variables - override with .env file
 load_dotenv(override=True)
 
@@ -46,6 +63,9 @@ TEST_DATA_DIR = Path(__file__).resolve().parents[1] / "test-data"
 LOG_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "logs"))
 os.makedirs(LOG_DIR, exist_ok=True)
 LOG_FILE = os.path.join(LOG_DIR, f"backend_switching_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+CHECKPOINT_FILE = os.path.join(LOG_DIR, "inflight_operations.json")
+COMPLETION_MODEL_FILE = os.path.join(LOG_DIR, "completion_model.json")
+PROFILE_FILE = os.path.splitext(LOG_FILE)[0] + ".collapsed"
 
 
 def _configure_logger(name: str, handler: logging.Handler, level: int) -> logging.Logger:
@@ -66,39 +86,320 @@ file_handler = logging.FileHandler(LOG_FILE)
 file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 file_logger = _configure_logger('detailed', file_handler, logging.DEBUG)
 
+# Pools in failover order, as in the doc-backend-pools named value.
+BACKEND_POOLS = tuple(
+    pool.strip().lower()
+    for pool in (os.environ.get("BACKEND_SWITCH_TEST_POOLS") or "doc-west-pool,doc-north-pool").split(",")
+    if pool.strip()
+)
+# Legacy single-backend IDs: each pool ID without its -pool suffix, as the results policy derives them.
+LEGACY_BACKEND_IDS = frozenset(pool[:-len('-pool')] for pool in BACKEND_POOLS if pool.endswith('-pool'))
+
+# JSON fields read from captured bodies; bodies are scanned, not parsed, so large results stay cheap.
+CONTENT_PATHS = (("content",), ("analyzeResult", "content"))
+BASE64_SOURCE_PATH = ("base64Source",)
+STATUS_PATH = ("status",)
+CREATED_PATH = ("createdDateTime",)
+UPDATED_PATH = ("lastUpdatedDateTime",)
+
+# Stages the policies report in Server-Timing, plus the derived gateway overhead (total - backend).
+SERVER_TIMING_STAGES = ("inbound", "backend", "outbound", "prewarm", "mgmt-token", "nv-patch", "total", "gateway")
+# Operations after a switch that count as landing on a cold pool in the pre-warm summary
+POST_SWITCH_WINDOW = 3
+_SERVER_TIMING_LOG_PATTERN = re.compile(r" - DEBUG - Server-Timing (POST|GET) \S+: (.+)$")
+
+StageSamples = Dict[Tuple[str, str], List[float]]
+
+
+def _parse_server_timing(value: str) -> Dict[str, float]:
+    """Return ``{stage: milliseconds}`` for the ``dur`` of each metric in a Server-Timing header."""
+    stages: Dict[str, float] = {}
+    for metric in value.split(","):
+        name, *params = [part.strip() for part in metric.split(";")]
+        for param in params:
+            key, _, raw = param.partition("=")
+            if name and key.strip() == "dur":
+                try:
+                    stages[name] = float(raw.strip('"'))
+                except ValueError:
+                    pass
+    return stages
+
+
+def _add_stage_samples(samples: StageSamples, method: str, stages: Dict[str, float]) -> None:
+    for stage, duration in stages.items():
+        samples.setdefault((method, stage), []).append(duration)
+    if "total" in stages and "backend" in stages:
+        samples.setdefault((method, "gateway"), []).append(stages["total"] - stages["backend"])
+
+
+def _stage_timing_table(samples: StageSamples) -> str:
+    order = {stage: index for index, stage in enumerate(SERVER_TIMING_STAGES)}
+    rows = []
+    for method, stage in sorted(samples, key=lambda key: (key[0] != "POST", order.get(key[1], len(order)), key[1])):
+        values = sorted(samples[(method, stage)])
+        rows.append({
+            'Method': method,
+            'Stage': stage,
+            'Samples': len(values),
+            'Mean (ms)': f"{sum(values) / len(values):.1f}",
+            'p50 (ms)': f"{values[len(values) // 2]:.1f}",
+            'p95 (ms)': f"{values[min(len(values) - 1, int(len(values) * 0.95))]:.1f}",
+            'Max (ms)': f"{values[-1]:.1f}",
+        })
+    return tabulate(rows, headers="keys", tablefmt="github")
+
+
+def summarize_server_timing_logs(log_dir: Path) -> StageSamples:
+    """Collect the Server-Timing stages the tester logged to ``backend_switching_test_*.log`` files."""
+    samples: StageSamples = {}
+    for log_file in sorted(log_dir.glob("backend_switching_test_*.log")):
+        for line in log_file.read_text(encoding="utf-8", errors="replace").splitlines():
+            match = _SERVER_TIMING_LOG_PATTERN.search(line)
+            if match:
+                _add_stage_samples(samples, match.group(1), _parse_server_timing(match.group(2)))
+    return samples
+
+
+class HedgeCancelled(Exception):
+    """Raised inside a poller thread when its hedged twin finished first."""
+
+
+class CancellableLROPolling(LROBasePolling):
+    """LROBasePolling whose wait between polls can be interrupted to abandon a hedge loser."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.cancelled = threading.Event()
+
+    def _sleep(self, delay: float) -> None:
+        if self.cancelled.wait(delay):
+            raise HedgeCancelled("Operation abandoned after its hedge completed first")
+
+
+class PredictivePolling(CancellableLROPolling):
+    """Polls around the completion time a :class:`CompletionModel` predicts for the operation.
+
+    The first poll waits until half a deviation before the predicted completion. Later polls
+    start at half the deviation and back off geometrically up to the fixed interval, so an
+    operation that overruns is never polled less often than with fixed polling. Without a
+    prediction for the backend, model and size, it polls at the fixed interval.
+    """
+
+    BACKOFF = 1.5
+
+    def __init__(
+        self,
+        timeout: float,
+        model: CompletionModel,
+        model_id: str,
+        document_size: int,
+        min_interval: float = 0.25,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(timeout, **kwargs)
+        self._model = model
+        self._model_id = model_id
+        self._document_size = document_size
+        self._min_interval = min_interval
+        self._started = time.monotonic()
+        self._polls_after_prediction = 0
+        self.prediction: Optional[Tuple[float, float]] = None
+
+    def initialize(self, client: Any, initial_response: Any, deserialization_callback: Any) -> None:
+        super().initialize(client, initial_response, deserialization_callback)
+        backend = initial_response.http_response.headers.get('x-backend-used', 'unknown')
+        self.prediction = self._model.predict(backend, self._model_id, self._document_size)
+
+    def run(self) -> None:
+        if self.prediction and not self.finished():
+            mean, deviation = self.prediction
+            wait = mean - deviation / 2 - (time.monotonic() - self._started)
+            if wait > 0:
+                self._sleep(wait)
+        super().run()
+
+    def _extract_delay(self) -> float:
+        if not self.prediction:
+            return super()._extract_delay()
+        step = max(self._min_interval, self.prediction[1] / 2) * self.BACKOFF ** self._polls_after_prediction
+        self._polls_after_prediction += 1
+        # The gateway sends Retry-After while an operation is over the switch threshold; never poll sooner.
+        retry_after = self._pipeline_response.http_response.headers.get('retry-after', '')
+        try:
+            floor = float(retry_after)
+        except ValueError:
+            floor = 0.0
+        return max(min(self._timeout, step), floor)
+
 
 class AutomaticBackendTester:
     """Exercise automatic backend switching with SDK-managed polling."""
 
-    def __init__(self, sample_override: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        sample_override: Optional[str] = None,
+        hedge: bool = False,
+        capture_path: Optional[str] = None,
+        metrics_port: Optional[int] = None,
+        trace_export: Optional[str] = None,
+        checkpoint_path: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        http2: bool = False,
+        adaptive_polling: bool = False,
+        completion_model_path: Optional[str] = None,
+        admission_rate: Optional[float] = None,
+        admission_burst: Optional[int] = None,
+        subscription_keys: Optional[str] = None,
+        key_assignment: Optional[str] = None,
+        results_db: Optional[str] = None,
+    ) -> None:
         self.endpoint = os.environ["AZURE_APIM_ENDPOINT"].rstrip('/')
-        subscription_key = os.environ.get("AZURE_APIM_KEY")
+        keys = load_keys(
+            subscription_keys or os.environ.get("BACKEND_SWITCH_TEST_SUBSCRIPTION_KEYS"),
+            os.environ.get("AZURE_APIM_KEYS"),
+        )
+        subscription_key = keys[0][1] if keys else os.environ.get("AZURE_APIM_KEY")
         if not subscription_key:
             raise ValueError("AZURE_APIM_KEY environment variable is required")
 
-        self.client = DocumentIntelligenceClient(self.endpoint, AzureKeyCredential(subscription_key))
+        trace_export = trace_export or os.environ.get("BACKEND_SWITCH_TEST_TRACE_EXPORT")
+        self.tracer = create_tracer(trace_export)
+        pool_size = pool_size or int(os.environ.get("BACKEND_SWITCH_TEST_POOL_SIZE") or DEFAULT_POOL_SIZE)
+        keepalive_idle = int(os.environ.get("BACKEND_SWITCH_TEST_KEEPALIVE_IDLE") or DEFAULT_KEEPALIVE_IDLE)
+        http2 = http2 or os.environ.get("BACKEND_SWITCH_TEST_HTTP2", "").lower() in ("1", "true", "yes")
+        self.transport = create_transport(pool_size, keepalive_idle, http2=http2)
+        client_kwargs: Dict[str, Any] = {'transport': self.transport}
+        per_retry_policies: List[Any] = []
+        admission_rate = admission_rate or float(os.environ.get("BACKEND_SWITCH_TEST_ADMISSION_RATE") or 0)
+        self.admission: Optional[AdmissionController] = None
+        if admission_rate > 0:
+            self.admission = AdmissionController(
+                admission_rate,
+                burst=admission_burst or int(os.environ.get("BACKEND_SWITCH_TEST_ADMISSION_BURST") or DEFAULT_BURST),
+            )
+            # Ahead of tracing, so time spent waiting for a token is not counted in the HTTP span.
+            per_retry_policies.append(AdmissionPolicy(self.admission, BACKEND_POOLS[0]))
+        if self.tracer:
+            per_retry_policies.append(TraceparentPolicy())
+        if per_retry_policies:
+            client_kwargs['per_retry_policies'] = per_retry_policies
+        self.keys: Optional[SubscriptionKeyPool] = None
+        if len(keys) > 1:
+            self.keys = SubscriptionKeyPool(
+                keys, key_assignment or os.environ.get("BACKEND_SWITCH_TEST_KEY_ASSIGNMENT") or "round-robin"
+            )
+            # Replaces the credential's policy, which would send the same key on every request.
+            client_kwargs['authentication_policy'] = SubscriptionKeyPolicy(self.keys)
+        self.client = DocumentIntelligenceClient(self.endpoint, AzureKeyCredential(subscription_key), **client_kwargs)
+        self._current_trace = None
+        self._current_key: Optional[str] = None
         self.sample_path = self._resolve_sample_path(sample_override)
         with self.sample_path.open("rb") as handle:
             sample_bytes = handle.read()
         self.test_document_base64 = base64.b64encode(sample_bytes).decode("ascii")
+        self.sample_sha256 = hashlib.sha256(sample_bytes).hexdigest()
+        self.sample_size = len(sample_bytes)
         self.polling_interval = float(os.environ.get("BACKEND_SWITCH_TEST_POLL_INTERVAL", "1"))
         self.polling_delay = float(os.environ.get("BACKEND_SWITCH_TEST_DELAY", "2"))
         self.results: List[Dict[str, Any]] = []
         self.response_log: List[Dict[str, Any]] = []
+        self.stage_timings: StageSamples = {}
         self.log_file = LOG_FILE
         self.progress_entries: List[Dict[str, Any]] = []
         self.console_header_printed = False
         self._line_overwritable = False
         self._last_line_length = 0
+        self.hedging_enabled = hedge or os.environ.get("BACKEND_SWITCH_TEST_HEDGE", "").lower() in ("1", "true", "yes")
+        self.hedge_percentile = float(os.environ.get("BACKEND_SWITCH_TEST_HEDGE_PERCENTILE", "95"))
+        self.hedge_min_samples = int(os.environ.get("BACKEND_SWITCH_TEST_HEDGE_MIN_SAMPLES", "20"))
+        self.hedge_default_budget = float(os.environ.get("BACKEND_SWITCH_TEST_HEDGE_BUDGET", "5"))
+        self.hedge_max_ratio = float(os.environ.get("BACKEND_SWITCH_TEST_HEDGE_MAX_RATIO", "0.1"))
+        self.hedge_count = 0
+        self.capture_path = Path(capture_path) if capture_path else None
+        adaptive_polling = adaptive_polling or os.environ.get(
+            "BACKEND_SWITCH_TEST_ADAPTIVE_POLLING", ""
+        ).lower() in ("1", "true", "yes")
+        self.completion_model: Optional[CompletionModel] = None
+        if adaptive_polling:
+            self.completion_model = CompletionModel(Path(
+                completion_model_path or os.environ.get("BACKEND_SWITCH_TEST_COMPLETION_MODEL") or COMPLETION_MODEL_FILE
+            ))
+        self.min_polling_interval = float(os.environ.get("BACKEND_SWITCH_TEST_MIN_POLL_INTERVAL", "0.25"))
+        self.checkpoint = OperationCheckpoint(
+            Path(checkpoint_path or os.environ.get("BACKEND_SWITCH_TEST_CHECKPOINT") or CHECKPOINT_FILE)
+        )
+        results_db = results_db or os.environ.get("BACKEND_SWITCH_TEST_RESULTS_DB")
+        self.results_store: Optional[ResultsStore] = None
+        if results_db:
+            self.results_store = ResultsStore(
+                Path(results_db), run_id=Path(self.log_file).stem.replace("backend_switching_test_", "")
+            )
+        self._capture_started: Optional[float] = None
+        metrics_port = metrics_port or int(os.environ.get("BACKEND_SWITCH_TEST_METRICS_PORT", "0") or 0)
+        self.metrics: Optional[TesterMetrics] = None
+        self._polls_by_operation: Dict[str, int] = {}
+        if metrics_port:
+            self.metrics = TesterMetrics()
+            serve_metrics(self.metrics, metrics_port)
 
         self._log_info("Automatic Backend Tester initialized")
+        if trace_export and not otel_available():
+            self._log_warning("Tracing requested but opentelemetry-sdk is not installed; running untraced")
+        elif self.tracer:
+            self._log_info(f"Exporting OpenTelemetry traces to {trace_export}")
+        if self.metrics:
+            self._log_info(f"Serving OpenMetrics on http://0.0.0.0:{metrics_port}/metrics")
+        if http2 and not http2_available():
+            self._log_warning("HTTP/2 requested but httpx[http2] is not installed; using HTTP/1.1")
+        file_logger.info(
+            "HTTP transport: %s, pool size %s, TCP keep-alive after %ss idle",
+            type(self.transport).__name__, pool_size, keepalive_idle,
+        )
         file_logger.info("Sample document: %s", self.sample_path)
         file_logger.info("Log file: %s", self.log_file)
+        file_logger.info("Checkpoint file: %s", self.checkpoint.path)
+        if self.results_store:
+            file_logger.info("Results database: %s (run %s)", self.results_store.path, self.results_store.run_id)
+        if self.completion_model:
+            self._log_info(f"Adaptive polling from completion model {self.completion_model.path}")
+        if self.admission:
+            self._log_info(
+                f"Admission control: {self.admission.rate:g} submissions/s per pool to start, burst {self.admission.burst}"
+            )
+        if self.keys:
+            self._log_info(f"Sharding operations over {len(self.keys)} subscription keys ({self.keys.assignment})")
+
+    def _key_options(self, label: Optional[str] = None) -> Dict[str, Any]:
+        """Request option that sends an operation's POST and polls with one pooled key (``label`` if still pooled)."""
+        if not self.keys:
+            return {}
+        return {KEY_OPTION: label if label in self.keys else self.keys.assign()}
 
     @staticmethod
     def _normalize_headers(headers: Dict[str, Any]) -> Dict[str, str]:
         return {str(k).lower(): str(v) for k, v in headers.items()}
 
+    @staticmethod
+    def _operation_id_from_url(url: Optional[str]) -> str:
+        if not url:
+            return ''
+        path = urlparse(url).path
+        for marker in ('/analyzeResults/', '/analyzeBatchResults/'):
+            if marker in path:
+                return path.split(marker, 1)[1].strip('/')
+        return ''
+
+    @staticmethod
+    def _alternate_backend(backend_id: str) -> str:
+        """Best-ranked other pool, like the results policy before any pool is demoted; legacy IDs stay legacy."""
+        selected = (backend_id or BACKEND_POOLS[0]).lower()
+        legacy = not selected.endswith('-pool')
+        pool = selected + '-pool' if legacy else selected
+        alternate = next((candidate for candidate in BACKEND_POOLS if candidate != pool), pool)
+        legacy_target = alternate[:-len('-pool')]
+        return legacy_target if legacy and legacy_target in LEGACY_BACKEND_IDS else alternate
+
     @staticmethod
     def _resolve_sample_path(sample_override: Optional[str]) -> Path:
         if sample_override:
@@ -114,23 +415,10 @@ class AutomaticBackendTester:
         return candidate
 
     @staticmethod
-    def _parse_json_payload(data: Any) -> Optional[Dict[str, Any]]:
-        if data is None:
-            return None
+    def _scannable_body(data: Any) -> Optional[Any]:
         if isinstance(data, dict):
-            return data
-        if isinstance(data, (bytes, bytearray)):
-            try:
-                data = data.decode('utf-8')
-            except UnicodeDecodeError:
-                return None
-        if isinstance(data, str):
-            try:
-                parsed = json.loads(data)
-            except json.JSONDecodeError:
-                return None
-            return parsed if isinstance(parsed, dict) else None
-        return None
+            return json.dumps(data)
+        return data if isinstance(data, (bytes, bytearray, str)) and data else None
 
     @staticmethod
     def _read_http_body(http_response: Any) -> Optional[Any]:
@@ -147,19 +435,50 @@ class AutomaticBackendTester:
             return value
         return None
 
-    @staticmethod
-    def _extract_content_string(payload: Optional[Dict[str, Any]]) -> Optional[str]:
-        if not isinstance(payload, dict):
-            return None
-        direct_content = payload.get('content')
-        if isinstance(direct_content, str):
-            return direct_content
-        analyze_result = payload.get('analyzeResult')
-        if isinstance(analyze_result, dict):
-            nested_content = analyze_result.get('content')
-            if isinstance(nested_content, str):
-                return nested_content
-        return None
+    @classmethod
+    def _request_content_length(cls, body: Any) -> str:
+        """Characters of ``content`` or decoded bytes of ``base64Source`` in a request body."""
+        data = cls._scannable_body(body)
+        if data is None:
+            return ''
+        fields = scan_string_fields(data, CONTENT_PATHS + (BASE64_SOURCE_PATH,), limit=1)
+        for path in CONTENT_PATHS:
+            if path in fields:
+                return str(string_length(data, fields[path]))
+        if BASE64_SOURCE_PATH in fields:
+            return str(base64_decoded_length(data, fields[BASE64_SOURCE_PATH]))
+        return ''
+
+    @classmethod
+    def _response_fields(cls, http_response: Any) -> Tuple[str, str, Optional[float]]:
+        """Return ``(status, content_length, service_seconds)`` without parsing the whole result.
+
+        ``service_seconds`` is the service's processing time, ``lastUpdatedDateTime`` minus
+        ``createdDateTime``, once the operation has succeeded.
+        """
+        data = cls._scannable_body(cls._read_http_body(http_response))
+        if data is None:
+            return '', '', None
+        fields = scan_string_fields(data, (STATUS_PATH, CREATED_PATH, UPDATED_PATH) + CONTENT_PATHS, limit=4)
+
+        def text(path: Tuple[str, ...]) -> str:
+            return json.loads(data[slice(*fields[path])]) if path in fields else ''
+
+        status = text(STATUS_PATH)
+        service_seconds: Optional[float] = None
+        if status == 'succeeded' and CREATED_PATH in fields and UPDATED_PATH in fields:
+            try:
+                created = datetime.fromisoformat(text(CREATED_PATH).replace('Z', '+00:00'))
+                updated = datetime.fromisoformat(text(UPDATED_PATH).replace('Z', '+00:00'))
+                service_seconds = max(0.0, (updated - created).total_seconds())
+            except ValueError:
+                service_seconds = None
+        content_length = ''
+        for path in CONTENT_PATHS:
+            if path in fields:
+                content_length = str(string_length(data, fields[path]))
+                break
+        return status, content_length, service_seconds
 
     @staticmethod
     def _format_query_string(raw_query: str) -> str:
@@ -194,7 +513,13 @@ class AutomaticBackendTester:
         milliseconds = dt_obj.microsecond // 1000
         return f"{dt_obj.hour:02d}:{dt_obj.minute:02d}:{dt_obj.second:02d}.{milliseconds:03d}"
 
-    def _capture_response(self, response) -> None:
+    def _capture_response(self, response) -> Dict[str, Any]:
+        entry = self._response_entry(response)
+        self.response_log.append(entry)
+        return entry
+
+    def _response_entry(self, response) -> Dict[str, Any]:
+        """Describe a response for ``response_log``; replay and split mode keep their own per-operation lists."""
         http_response = response.http_response
         request = http_response.request
         parsed_url = urlparse(request.url)
@@ -206,41 +531,59 @@ class AutomaticBackendTester:
             # POST responses do not echo requestTime in the query string, so fall back to server date header.
             request_time_raw = headers.get('date', '')
         request_time = self._format_request_time_display(request_time_raw)
-        content_length = ''
-        body = getattr(request, "body", None)
-        payload = self._parse_json_payload(body)
-
-        if isinstance(payload, dict):
-            content_value = self._extract_content_string(payload)
-            if isinstance(content_value, str):
-                content_length = str(len(content_value))
-            else:
-                base64_value = payload.get('base64Source')
-                if isinstance(base64_value, str):
-                    try:
-                        decoded = base64.b64decode(base64_value, validate=True)
-                        content_length = str(len(decoded))
-                    except (binascii.Error, ValueError):
-                        content_length = str(len(base64_value))
-
+        operation_status = ''
+        service_seconds: Optional[float] = None
+        content_length = self._request_content_length(getattr(request, "body", None))
         if not content_length:
-            response_payload = self._parse_json_payload(self._read_http_body(http_response))
-            if isinstance(response_payload, dict):
-                response_content = self._extract_content_string(response_payload)
-                if isinstance(response_content, str):
-                    content_length = str(len(response_content))
+            operation_status, content_length, service_seconds = self._response_fields(http_response)
+
+        if request.method == 'POST':
+            operation_id = self._operation_id_from_url(headers.get('operation-location'))
+        else:
+            operation_id = self._operation_id_from_url(request.url)
 
         entry = {
             "method": request.method,
+            "operation_id": operation_id,
             "url": request.url,
             "status_code": http_response.status_code,
             "headers": headers,
             "request_time": request_time,
             "content_length": content_length,
+            "operation_status": operation_status,
+            "service_seconds": service_seconds,
             "query_params": query_string,
         }
-        self.response_log.append(entry)
-        file_logger.debug("Captured %s %s -> %s", entry['method'], entry['url'], entry['status_code'])
+        file_logger.debug(
+            "Captured %s %s -> %s %s", entry['method'], entry['url'], entry['status_code'], operation_status
+        )
+        server_timing = headers.get('server-timing')
+        if server_timing:
+            file_logger.debug("Server-Timing %s %s: %s", entry['method'], operation_id or '-', server_timing)
+            _add_stage_samples(self.stage_timings, entry['method'], _parse_server_timing(server_timing))
+        if self.metrics:
+            self._record_response_metrics(entry)
+        return entry
+
+    def _record_response_metrics(self, entry: Dict[str, Any]) -> None:
+        headers = entry['headers']
+        backend = headers.get('x-backend-used', 'unknown')
+        self.metrics.inc(
+            'tester_http_responses', method=entry['method'], status=str(entry['status_code']), backend=backend
+        )
+        if entry['method'] == 'GET':
+            operation_id = entry['operation_id']
+            self._polls_by_operation[operation_id] = self._polls_by_operation.get(operation_id, 0) + 1
+            if headers.get('x-backend-switched', '').lower() == 'true':
+                self.metrics.inc('tester_backend_switched', backend=headers.get('x-old-backend', backend))
+        update_status = headers.get('x-named-value-update-status')
+        if update_status:
+            self.metrics.inc('tester_named_value_updates', status=update_status)
+
+    def _record_operation_metrics(self, backend: str, total_time: float, operation_ids: List[str]) -> None:
+        polls = sum(self._polls_by_operation.pop(operation_id, 0) for operation_id in operation_ids if operation_id)
+        self.metrics.observe('tester_operation_duration_seconds', total_time, backend=backend)
+        self.metrics.observe('tester_operation_polls', polls, backend=backend)
 
     def _log(self, level: str, message: str) -> None:
         getattr(console_logger, level)(message)
@@ -262,26 +605,31 @@ class AutomaticBackendTester:
                 return entry
         return None
 
-    def _last_response(self, method: str) -> Optional[Dict[str, Any]]:
+    def _last_response(self, method: str, operation_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         method_upper = method.upper()
         for entry in reversed(self.response_log):
-            if entry['method'] == method_upper:
+            if entry['method'] == method_upper and (not operation_id or entry.get('operation_id') == operation_id):
                 return entry
         return None
 
-    def _wait_for_response(self, method: str, timeout: float = 5.0) -> Optional[Dict[str, Any]]:
+    def _wait_for_response(
+        self,
+        method: str,
+        timeout: float = 5.0,
+        operation_id: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
         deadline = time.time() + timeout
         while time.time() < deadline:
-            entry = self._last_response(method)
+            entry = self._last_response(method, operation_id)
             if entry:
                 return entry
             time.sleep(0.05)
-        return self._last_response(method)
+        return self._last_response(method, operation_id)
 
     def _extract_operation_url(self, poller) -> Optional[str]:
         token = poller.continuation_token() if hasattr(poller, "continuation_token") else None
         if token:
-            file_logger.debug("Continuation token captured (full value): %s", token)
+            file_logger.debug("Continuation token captured (%s chars)", len(token))
         post_response = self._first_response('POST')
         if post_response:
             headers = post_response['headers']
@@ -399,19 +747,147 @@ class AutomaticBackendTester:
         if target:
             self._emit_console_line(target, overwriteable=False, replace=True)
 
-    def test_automatic_switching(self, run_number: int, test_name: str) -> Dict[str, Any]:
-        file_logger.info("=== Testing Automatic Switching: %s ===", test_name)
-        start_time = time.time()
-        self.response_log = []
-
-        start_time = time.time()
-        poller = self.client.begin_analyze_document(
+    def _begin_analyze(self, backend_id: Optional[str] = None):
+        kwargs: Dict[str, Any] = {}
+        if backend_id:
+            # The API-level policy honours backendId on POST, pinning the operation to that pool.
+            kwargs['params'] = {'backendId': backend_id}
+        trace_kwargs: Dict[str, Any] = {}
+        if self._current_trace is not None:
+            # Passed through the SDK to the POST and every poll, where TraceparentPolicy picks it up.
+            trace_kwargs[OPERATION_OPTION] = self._current_trace
+        trace_kwargs.update(self._key_options(self._current_key))
+        if self.completion_model:
+            kwargs['polling'] = self._predictive_polling(
+                "prebuilt-read", self.sample_size, self._capture_response, trace_kwargs
+            )
+        elif self.hedging_enabled:
+            kwargs['polling'] = CancellableLROPolling(
+                self.polling_interval, raw_response_hook=self._capture_response, **trace_kwargs
+            )
+        kwargs.update(trace_kwargs)
+        return self.client.begin_analyze_document(
             model_id="prebuilt-read",
             body={"base64Source": self.test_document_base64},
             content_type="application/json",
             raw_response_hook=self._capture_response,
             polling_interval=self.polling_interval,
+            **kwargs,
+        )
+
+    def _checkpoint_operation(
+        self, poller, operation_location: str, backend: str, started: float, mode: str, **extra: Any
+    ) -> str:
+        """Checkpoint ``poller``'s operation for ``--resume`` under ``mode``; returns its ID ('' if unknown)."""
+        operation_id = self._operation_id_from_url(operation_location)
+        if operation_id:
+            self.checkpoint.add(
+                operation_id, poller.continuation_token(), operation_location, backend, started, mode=mode, **extra
+            )
+        return operation_id
+
+    def _predictive_polling(
+        self, model_id: str, document_size: int, hook: Any, trace_kwargs: Dict[str, Any]
+    ) -> PredictivePolling:
+        return PredictivePolling(
+            self.polling_interval,
+            self.completion_model,
+            model_id,
+            document_size,
+            min_interval=self.min_polling_interval,
+            raw_response_hook=hook,
+            **trace_kwargs,
+        )
+
+    def _learn_completion(self, backend: str, model_id: str, document_size: int, final_entry: Optional[Dict[str, Any]]) -> None:
+        """Feed the service processing time of an operation that finished where it started into the model."""
+        if not self.completion_model or not final_entry or backend in ('', 'unknown'):
+            return
+        seconds = final_entry.get('service_seconds')
+        if seconds is not None:
+            self.completion_model.observe(backend, model_id, document_size, seconds)
+
+    def _hedge_budget(self) -> float:
+        """Seconds an operation may run before hedging: a percentile of past completion times."""
+        samples = sorted(result['total_time'] for result in self.results if result.get('success'))
+        if len(samples) < self.hedge_min_samples:
+            return self.hedge_default_budget
+        index = min(len(samples) - 1, max(0, int(round(self.hedge_percentile / 100.0 * len(samples))) - 1))
+        return samples[index]
+
+    def _hedge_allowed(self) -> bool:
+        # Cap hedges at a fraction of operations so hedging cannot double load on both pools.
+        operations = len(self.results) + 1
+        return self.hedge_count < self.hedge_max_ratio * operations
+
+    def _await_with_hedge(self, poller, post_backend: str, start_time: float, run_number: int):
+        """Wait for ``poller``; past the hedge budget, race it against a copy on the alternate pool.
+
+        Returns the poller to take the result from and a dict describing the hedge, if any.
+        """
+        budget = self._hedge_budget()
+        remaining = budget - (time.time() - start_time)
+        if remaining > 0:
+            poller.wait(timeout=remaining)
+        if poller.done() or not self._hedge_allowed():
+            return poller, {}
+
+        hedge_backend = self._alternate_backend(post_backend)
+        self.hedge_count += 1
+        file_logger.info(
+            "Operation exceeded hedge budget %.2fs on %s; hedging to %s", budget, post_backend, hedge_backend
+        )
+        hedge_started = time.time()
+        hedge_poller = self._begin_analyze(hedge_backend)
+        # The hedge can be the winner, so it is checkpointed like the primary; the soak loop removes both.
+        hedge_post = self._last_response('POST') or {}
+        hedge_operation_id = self._checkpoint_operation(
+            hedge_poller,
+            hedge_post.get('headers', {}).get('operation-location', ''),
+            hedge_backend,
+            hedge_started,
+            'hedge',
+            run=run_number,
+            model_id="prebuilt-read",
+            subscription_key=self._current_key,
         )
+        outcome = {
+            'hedge_backend': hedge_backend,
+            'hedge_budget': budget,
+            'hedge_operation_id': hedge_operation_id or hedge_poller.details.get('operation_id', ''),
+            'hedge_winner': 'primary',
+        }
+
+        contenders = {'primary': poller, 'hedge': hedge_poller}
+        winner_label = ''
+        while not winner_label:
+            finished = [label for label, candidate in contenders.items() if candidate.done()]
+            succeeded = [label for label in finished if contenders[label].status().lower() == 'succeeded']
+            if succeeded:
+                winner_label = succeeded[0]
+            elif len(finished) == len(contenders):
+                winner_label = 'primary'
+            else:
+                time.sleep(0.05)
+
+        for label, candidate in contenders.items():
+            if label != winner_label:
+                candidate.polling_method().cancelled.set()
+        outcome['hedge_winner'] = winner_label
+        file_logger.info("Hedge race won by %s", winner_label)
+        return contenders[winner_label], outcome
+
+    def test_automatic_switching(self, run_number: int, test_name: str) -> Dict[str, Any]:
+        file_logger.info("=== Testing Automatic Switching: %s ===", test_name)
+        start_time = time.time()
+        self.response_log = []
+
+        start_time = time.time()
+        if self.tracer:
+            self._current_trace = self.tracer.start_operation("prebuilt-read", **{"tester.run": run_number})
+        self._current_key = self.keys.assign() if self.keys else None
+        poller = self._begin_analyze()
+        post_seconds = time.time() - start_time
 
         operation_url = self._extract_operation_url(poller)
         operation_query = self._parse_query(operation_url)
@@ -422,6 +898,18 @@ class AutomaticBackendTester:
 
         post_backend = post_response.get('headers', {}).get('x-backend-used', 'unknown')
         post_status = post_response.get('status_code', 0)
+        operation_id = self._operation_id_from_url(operation_url)
+        if operation_id:
+            self.checkpoint.add(
+                operation_id,
+                poller.continuation_token(),
+                operation_url,
+                post_backend,
+                start_time,
+                run=run_number,
+                model_id="prebuilt-read",
+                subscription_key=self._current_key,
+            )
 
         self._add_progress_entry({
             'run': run_number,
@@ -462,19 +950,39 @@ class AutomaticBackendTester:
         # time.sleep(self.polling_delay)
 
         result_status = 200
+        hedge_outcome: Dict[str, Any] = {}
+        if self.metrics:
+            self.metrics.add_gauge('tester_operations_in_flight', 1)
         try:
+            if self.hedging_enabled:
+                poller, hedge_outcome = self._await_with_hedge(poller, post_backend, start_time, run_number)
             poller.result()
         except HttpResponseError as error:  # 404 is expected when backend switches
             result_status = getattr(error, 'status_code', None) or (
                 error.response.status_code if getattr(error, 'response', None) else 0
             )
             file_logger.warning("Poller finished with HttpResponseError: %s", result_status)
+        finally:
+            if self.metrics:
+                self.metrics.add_gauge('tester_operations_in_flight', -1)
+        # Anything other than a service answer propagates and leaves the operation checkpointed for --resume.
+        self.checkpoint.remove(operation_id)
+        self.checkpoint.remove(hedge_outcome.get('hedge_operation_id', ''))
 
         total_time = time.time() - start_time
 
-        final_response = self._wait_for_response('GET') or post_response
+        final_operation_id = operation_id
+        if hedge_outcome.get('hedge_winner') == 'hedge':
+            final_operation_id = hedge_outcome.get('hedge_operation_id', '')
+        final_response = self._wait_for_response('GET', operation_id=final_operation_id) or post_response
 
         get_backend = (final_response or {}).get('headers', {}).get('x-backend-used', 'unknown')
+        if self.metrics:
+            self._record_operation_metrics(
+                get_backend,
+                total_time,
+                [self._operation_id_from_url(operation_url), hedge_outcome.get('hedge_operation_id', '')],
+            )
         backend_switched_header = (final_response or {}).get('headers', {}).get('x-backend-switched', 'false')
         duration_exceeded = (final_response or {}).get('headers', {}).get('x-duration-threshold-exceeded', 'false')
         #request_duration = (final_response or {}).get('headers', {}).get('x-request-duration', '0')
@@ -482,9 +990,13 @@ class AutomaticBackendTester:
 
         backend_switched_flag = str(backend_switched_header).lower() == 'true'
 
+        # A hedge that wins was submitted to the alternate pool, so compare against where it started.
+        origin_backend = post_backend
+        if hedge_outcome.get('hedge_winner') == 'hedge':
+            origin_backend = hedge_outcome['hedge_backend']
         switching_occurred = (
-            post_backend != get_backend
-            and post_backend != 'unknown'
+            origin_backend != get_backend
+            and origin_backend != 'unknown'
             and get_backend != 'unknown'
         ) or backend_switched_flag
         success = result_status in (200, 404)
@@ -497,6 +1009,27 @@ class AutomaticBackendTester:
         except (TypeError, ValueError):
             duration_display = request_duration or f"{total_time:.2f}s"
 
+        polls = sum(
+            1 for entry in self.response_log
+            if entry['method'] == 'GET' and entry.get('operation_id') == final_operation_id
+        )
+        if success and not switching_occurred and hedge_outcome.get('hedge_winner') != 'hedge':
+            self._learn_completion(post_backend, "prebuilt-read", self.sample_size, final_response)
+
+        result_cache = post_response.get('headers', {}).get('x-result-cache', '')
+        switch_headers = next(
+            (
+                entry['headers'] for entry in self.response_log
+                if entry['method'] == 'GET' and entry['headers'].get('x-backend-switched', '').lower() == 'true'
+            ),
+            {},
+        )
+        status_label = 'OK'
+        if hedge_outcome.get('hedge_winner') == 'hedge':
+            status_label = 'HEDGE'
+        elif result_cache.upper() == 'HIT':
+            status_label = 'CACHED'
+
         self._update_progress_entry(
             run_number,
             'GET',
@@ -508,7 +1041,7 @@ class AutomaticBackendTester:
             switched='YES' if switching_occurred else 'NO',
             content_length=(final_response or {}).get('content_length', ''),
             query_params=(final_response or {}).get('query_params', ''),
-            status='OK' if success else 'FAIL',
+            status=status_label if success else 'FAIL',
         )
 
         result: Dict[str, Any] = {
@@ -530,12 +1063,784 @@ class AutomaticBackendTester:
             'get_content_length': (final_response or {}).get('content_length', ''),
             'post_query_params': post_response.get('query_params', ''),
             'get_query_params': (final_response or {}).get('query_params', ''),
+            'hedged': bool(hedge_outcome),
+            'hedge_backend': hedge_outcome.get('hedge_backend', ''),
+            'hedge_winner': hedge_outcome.get('hedge_winner', ''),
+            'hedge_budget': hedge_outcome.get('hedge_budget', ''),
+            'result_cache': result_cache,
+            'polls': polls,
+            'post_seconds': post_seconds,
+            'switched_to': switch_headers.get('x-new-backend', ''),
+            'prewarm': switch_headers.get('x-prewarm-requests', ''),
+            'prewarm_ms': _parse_server_timing(switch_headers.get('server-timing', '')).get('prewarm'),
+            'subscription_key': self._current_key or '',
         }
 
         self.results.append(result)
+        if self.results_store:
+            self.results_store.append(result, 'soak')
+        if self._current_trace is not None:
+            self._current_trace.finish({
+                'docintel.operation_id': self._operation_id_from_url(operation_url),
+                'docintel.post_backend': post_backend,
+                'docintel.final_backend': get_backend,
+                'docintel.total_time_s': total_time,
+                'docintel.switching_occurred': switching_occurred,
+                'docintel.hedge_winner': hedge_outcome.get('hedge_winner', ''),
+                'docintel.result_cache': result_cache,
+            }, error=not success)
+            self._current_trace = None
+        if self.capture_path:
+            self._record_trace_entry(start_time, result)
+        return result
+
+    def _record_trace_entry(self, start_time: float, result: Dict[str, Any]) -> None:
+        """Append one operation to the capture file as a JSONL trace entry."""
+        if self._capture_started is None:
+            self._capture_started = start_time
+        entry = {
+            't': round(start_time - self._capture_started, 3),
+            'timestamp': datetime.fromtimestamp(start_time, timezone.utc).isoformat(),
+            'model_id': 'prebuilt-read',
+            'document_sha256': self.sample_sha256,
+            'document_size': self.sample_size,
+            'post_backend': result['post_backend'],
+            'backend': result['get_backend'],
+            'latency': round(result['total_time'], 3),
+            'status': result['get_status'],
+            'switched': result['switching_occurred'],
+        }
+        with self.capture_path.open('a', encoding='utf-8') as handle:
+            handle.write(json.dumps(entry) + '\n')
+
+    def resume_operations(self) -> List[Dict[str, Any]]:
+        """Re-attach pollers to the operations a previous run left in the checkpoint.
+
+        Each resumed operation is reported under its original run number and start time, so the
+        results (and the capture trace, if enabled) continue as if the run had not stopped.
+        """
+        pending = self.checkpoint.pending()
+        if not pending:
+            self._log_info(f"No in-flight operations to resume in {self.checkpoint.path}")
+            return []
+        self._log_info(f"Resuming {len(pending)} in-flight operation(s) from {self.checkpoint.path}")
+        return [self._resume_operation(record) for record in pending]
+
+    def _resume_operation(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        operation_id = record['operation_id']
+        run_number = record.get('run', '')
+        start_time = float(record.get('started') or time.time())
+        post_backend = record.get('backend', 'unknown')
+        # Soak records predate the mode field; hedge, replay and split operations re-attach the same way.
+        mode = record.get('mode', 'soak')
+        self.response_log = []
+        file_logger.info(
+            "Re-attaching to %s operation %s (run %s, POST to %s)", mode, operation_id, run_number, post_backend
+        )
+
+        trace_kwargs: Dict[str, Any] = {}
+        operation_trace = None
+        if self.tracer:
+            operation_trace = self.tracer.start_operation(
+                record.get('model_id', 'prebuilt-read'), **{"tester.run": run_number, "tester.resumed": True}
+            )
+            trace_kwargs[OPERATION_OPTION] = operation_trace
+        trace_kwargs.update(self._key_options(record.get('subscription_key')))
+        self._add_progress_entry({
+            'run': run_number,
+            'method': 'GET',
+            'response_code': 'resuming ...',
+            'backend': '',
+            'request_time': '',
+            'duration': '',
+            'threshold_exceeded': '',
+            'switched': '',
+            'content_length': '',
+            'query_params': '',
+            'status': 'IN PROGRESS',
+        }, overwriteable=True)
+
+        result_status = 200
+        if self.metrics:
+            self.metrics.add_gauge('tester_operations_in_flight', 1)
+        begin = self.client.begin_analyze_document
+        polling_interval = self.polling_interval
+        if mode == 'batch':
+            begin = self.client.begin_analyze_batch_documents
+            polling_interval = float(os.environ.get("BACKEND_SWITCH_TEST_BATCH_POLL_INTERVAL", "5"))
+        try:
+            poller = begin(
+                model_id=record.get('model_id', 'prebuilt-read'),
+                body=None,
+                continuation_token=record['token'],
+                raw_response_hook=self._capture_response,
+                polling_interval=polling_interval,
+                **trace_kwargs,
+            )
+            poller.result()
+        except HttpResponseError as error:  # 404 once the service has expired the operation
+            result_status = getattr(error, 'status_code', None) or 0
+            file_logger.warning("Resumed operation %s finished with HttpResponseError: %s", operation_id, result_status)
+        finally:
+            if self.metrics:
+                self.metrics.add_gauge('tester_operations_in_flight', -1)
+        self.checkpoint.remove(operation_id)
+        total_time = time.time() - start_time
+
+        final_response = self._last_response('GET', operation_id) or {}
+        headers = final_response.get('headers', {})
+        get_backend = headers.get('x-backend-used', 'unknown')
+        backend_switched_header = headers.get('x-backend-switched', 'false')
+        duration_exceeded = headers.get('x-duration-threshold-exceeded', 'false')
+        switching_occurred = (
+            post_backend != get_backend and 'unknown' not in (post_backend, get_backend)
+        ) or str(backend_switched_header).lower() == 'true'
+        success = result_status in (200, 404)
+        if self.metrics:
+            self._record_operation_metrics(get_backend, total_time, [operation_id])
+
+        self._update_progress_entry(
+            run_number,
+            'GET',
+            response_code=str(final_response.get('status_code', result_status)),
+            backend=get_backend,
+            request_time=final_response.get('request_time', ''),
+            duration=f"{total_time:.2f}s",
+            threshold_exceeded=str(duration_exceeded).lower() if duration_exceeded else '',
+            switched='YES' if switching_occurred else 'NO',
+            content_length=final_response.get('content_length', ''),
+            query_params=final_response.get('query_params', ''),
+            status='RESUMED' if success else 'FAIL',
+        )
+
+        result: Dict[str, Any] = {
+            'test_name': f"Auto-Switch-{run_number}" if mode in ('soak', 'hedge') else f"{mode}-{operation_id}",
+            'post_status': 202,
+            'get_status': final_response.get('status_code', result_status),
+            'post_backend': post_backend,
+            'get_backend': get_backend,
+            'backend_switched': backend_switched_header,
+            'duration_exceeded': duration_exceeded,
+            'switching_occurred': switching_occurred,
+            'total_time': total_time,
+            'success': success,
+            'operation_location': record.get('operation_location', ''),
+            'get_request_time': final_response.get('request_time', ''),
+            'get_content_length': final_response.get('content_length', ''),
+            'get_query_params': final_response.get('query_params', ''),
+            'resumed': True,
+            'resumed_mode': mode,
+            'run': run_number,
+            'subscription_key': trace_kwargs.get(KEY_OPTION, ''),
+        }
+        self.results.append(result)
+        if self.results_store:
+            self.results_store.append(result, 'resume')
+        if operation_trace is not None:
+            operation_trace.finish({
+                'docintel.operation_id': operation_id,
+                'docintel.post_backend': post_backend,
+                'docintel.final_backend': get_backend,
+                'docintel.total_time_s': total_time,
+                'docintel.switching_occurred': switching_occurred,
+            }, error=not success)
+        if self.capture_path:
+            self._record_trace_entry(start_time, result)
         return result
 
-    def run_test(self) -> List[Dict[str, Any]]:
+    def _replay_documents(self) -> Dict[str, str]:
+        """Index candidate documents by SHA-256 so replay re-sends the captured document when it is on disk."""
+        documents = {self.sample_sha256: self.test_document_base64}
+        for directory in {TEST_DATA_DIR, self.sample_path.parent}:
+            for candidate in directory.glob('*'):
+                if candidate.is_file() and candidate.stat().st_size <= 50 * 1024 * 1024:
+                    data = candidate.read_bytes()
+                    documents.setdefault(hashlib.sha256(data).hexdigest(), base64.b64encode(data).decode('ascii'))
+        return documents
+
+    def _replay_operation(self, entry: Dict[str, Any], document_base64: str, lag: float) -> Dict[str, Any]:
+        responses: List[Dict[str, Any]] = []
+
+        def capture(response) -> None:
+            captured = self._response_entry(response)
+            http_response = response.http_response
+            responses.append({
+                'method': http_response.request.method,
+                'status_code': http_response.status_code,
+                'headers': self._normalize_headers(http_response.headers),
+                'service_seconds': captured.get('service_seconds'),
+            })
+
+        started = time.time()
+        status = 200
+        trace_kwargs: Dict[str, Any] = {}
+        operation_trace = None
+        if self.tracer:
+            operation_trace = self.tracer.start_operation(
+                entry.get('model_id', 'prebuilt-read'), **{'replay.t': entry.get('t', 0.0)}
+            )
+            trace_kwargs[OPERATION_OPTION] = operation_trace
+        trace_kwargs.update(self._key_options())
+        model_id = entry.get('model_id', 'prebuilt-read')
+        document_size = len(document_base64) * 3 // 4
+        polling_kwargs: Dict[str, Any] = {}
+        if self.completion_model:
+            polling_kwargs['polling'] = self._predictive_polling(model_id, document_size, capture, trace_kwargs)
+        operation_id = ''
+        if self.metrics:
+            self.metrics.add_gauge('tester_operations_in_flight', 1)
+        try:
+            poller = self.client.begin_analyze_document(
+                model_id=model_id,
+                body={"base64Source": document_base64},
+                content_type="application/json",
+                raw_response_hook=capture,
+                polling_interval=self.polling_interval,
+                **polling_kwargs,
+                **trace_kwargs,
+            )
+            post_headers = responses[0]['headers'] if responses else {}
+            operation_id = self._checkpoint_operation(
+                poller,
+                post_headers.get('operation-location', ''),
+                post_headers.get('x-backend-used', 'unknown'),
+                started,
+                'replay',
+                model_id=model_id,
+                subscription_key=trace_kwargs.get(KEY_OPTION),
+            )
+            poller.result()
+        except HttpResponseError as error:
+            status = getattr(error, 'status_code', None) or 0
+        finally:
+            if self.metrics:
+                self.metrics.add_gauge('tester_operations_in_flight', -1)
+        self.checkpoint.remove(operation_id)
+        latency = time.time() - started
+
+        posts = [r for r in responses if r['method'] == 'POST']
+        gets = [r for r in responses if r['method'] == 'GET']
+        post_backend = posts[0]['headers'].get('x-backend-used', 'unknown') if posts else 'unknown'
+        get_backend = gets[-1]['headers'].get('x-backend-used', 'unknown') if gets else post_backend
+        switched = any(r['headers'].get('x-backend-switched', '').lower() == 'true' for r in gets)
+        if status == 200 and not switched and post_backend == get_backend and gets:
+            self._learn_completion(post_backend, model_id, document_size, gets[-1])
+        if self.metrics:
+            operation_ids = [self._operation_id_from_url(r['headers'].get('operation-location')) for r in posts]
+            self._record_operation_metrics(get_backend, latency, operation_ids)
+        if operation_trace is not None:
+            operation_trace.finish({
+                'docintel.post_backend': post_backend,
+                'docintel.final_backend': get_backend,
+                'docintel.total_time_s': latency,
+                'docintel.backend_switched': switched,
+            }, error=status not in (200, 404))
+        result = {
+            't': entry.get('t', 0.0),
+            'lag': lag,
+            'latency': latency,
+            'captured_latency': entry.get('latency'),
+            'status': status,
+            'post_backend': post_backend,
+            'backend': get_backend,
+            'switched': switched,
+            'polls': len(gets),
+            'subscription_key': trace_kwargs.get(KEY_OPTION, ''),
+        }
+        if self.results_store:
+            self.results_store.append(result, 'replay')
+        return result
+
+    def replay_trace(self, trace_path: str, speed: float = 1.0, concurrency: int = 8) -> List[Dict[str, Any]]:
+        """Re-issue a captured trace, compressing its arrival times by ``speed``.
+
+        At most ``concurrency`` operations run at once; arrivals beyond that queue and the wait
+        is reported as schedule lag.
+        """
+        with open(trace_path, 'r', encoding='utf-8') as handle:
+            entries = sorted((json.loads(line) for line in handle if line.strip()), key=lambda e: e.get('t', 0.0))
+        if not entries:
+            self._log_warning(f"Trace {trace_path} is empty; nothing to replay")
+            return []
+        documents = self._replay_documents()
+        missing = sum(1 for entry in entries if entry.get('document_sha256') not in documents)
+        if missing:
+            self._log_warning(f"{missing}/{len(entries)} captured documents not found locally; sending {self.sample_path.name}")
+
+        self._log_info(
+            f"Replaying {len(entries)} operations from {trace_path} at {speed:g}x with concurrency {concurrency}"
+        )
+        replay_started = time.time()
+        futures = []
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            for entry in entries:
+                due = replay_started + float(entry.get('t', 0.0)) / speed
+                delay = due - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                document = documents.get(entry.get('document_sha256'), self.test_document_base64)
+                futures.append(executor.submit(self._replay_timed, entry, document, due))
+            results = [future.result() for future in futures]
+        elapsed = time.time() - replay_started
+
+        rows = []
+        for backend in sorted({result['backend'] for result in results}):
+            latencies = sorted(r['latency'] for r in results if r['backend'] == backend)
+            rows.append({
+                'Backend': backend,
+                'Operations': len(latencies),
+                'p50 (s)': f"{latencies[len(latencies) // 2]:.2f}",
+                'p95 (s)': f"{latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]:.2f}",
+                'Switched': sum(1 for r in results if r['backend'] == backend and r['switched']),
+                'Failed': sum(1 for r in results if r['backend'] == backend and r['status'] not in (200, 404)),
+            })
+        self._log_info("\n" + tabulate(rows, headers="keys", tablefmt="github"))
+        mean_lag = sum(r['lag'] for r in results) / len(results)
+        self._log_info(
+            f"Replay finished in {elapsed:.1f}s ({len(results) / elapsed:.2f} ops/s); "
+            f"mean schedule lag {mean_lag:.2f}s, max {max(r['lag'] for r in results):.2f}s"
+        )
+        self._log_polling_summary(results)
+        self._log_admission_summary()
+        self._log_subscription_key_summary(results)
+        self._log_server_timing_summary()
+        self._log_connection_summary()
+        return results
+
+    def _replay_timed(self, entry: Dict[str, Any], document_base64: str, due: float) -> Dict[str, Any]:
+        return self._replay_operation(entry, document_base64, max(0.0, time.time() - due))
+
+    def _analyze_chunk(self, backend_id: str, first: int, last: int) -> Dict[str, Any]:
+        pages = format_pages(first, last)
+        trace_kwargs: Dict[str, Any] = {}
+        operation_trace = None
+        if self.tracer:
+            operation_trace = self.tracer.start_operation(
+                "prebuilt-read", **{'docintel.pages': pages, 'docintel.post_backend': backend_id}
+            )
+            trace_kwargs[OPERATION_OPTION] = operation_trace
+        trace_kwargs.update(self._key_options())
+        posts: List[Dict[str, Any]] = []
+        gets: List[Dict[str, Any]] = []
+
+        def capture(response) -> None:
+            entry = self._response_entry(response)
+            (gets if entry['method'] == 'GET' else posts).append(entry)
+
+        started = time.time()
+        poller = self.client.begin_analyze_document(
+            model_id="prebuilt-read",
+            body={"base64Source": self.test_document_base64},
+            content_type="application/json",
+            pages=pages,
+            # Offsets in code points line up with Python string lengths when the chunks are merged.
+            string_index_type="unicodeCodePoint",
+            params={'backendId': backend_id},
+            raw_response_hook=capture,
+            polling_interval=self.polling_interval,
+            **trace_kwargs,
+        )
+        operation_id = self._checkpoint_operation(
+            poller,
+            posts[0]['headers'].get('operation-location', '') if posts else '',
+            backend_id,
+            started,
+            'split',
+            model_id="prebuilt-read",
+            pages=pages,
+            subscription_key=trace_kwargs.get(KEY_OPTION),
+        )
+        if self.metrics:
+            self.metrics.add_gauge('tester_operations_in_flight', 1)
+        try:
+            result = poller.result()
+        except HttpResponseError:
+            self.checkpoint.remove(operation_id)
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.add_gauge('tester_operations_in_flight', -1)
+            elapsed = time.time() - started
+            operation_id = operation_id or poller.details.get('operation_id', '')
+            backend = gets[-1]['headers'].get('x-backend-used', backend_id) if gets else backend_id
+            if self.metrics:
+                self._record_operation_metrics(backend, elapsed, [operation_id])
+            if operation_trace is not None:
+                operation_trace.finish({'docintel.final_backend': backend, 'docintel.total_time_s': elapsed})
+        self.checkpoint.remove(operation_id)
+        file_logger.info("Chunk pages %s finished on %s in %.2fs", pages, backend, elapsed)
+        chunk = {'pages': pages, 'first': first, 'backend': backend, 'elapsed': elapsed, 'result': result.as_dict()}
+        if self.results_store:
+            self.results_store.append(
+                {**chunk, 'post_backend': backend_id, 'subscription_key': trace_kwargs.get(KEY_OPTION, '')}, 'split'
+            )
+        return chunk
+
+    def analyze_split(
+        self,
+        pages_per_chunk: int,
+        concurrency: int = 2,
+        page_count: Optional[int] = None,
+        output_path: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Analyze the sample as page-range chunks spread over both pools and merge the results.
+
+        Each pool runs at most ``concurrency`` chunks at once. Workers pull chunks from a shared
+        queue, so the faster pool ends up analyzing more of the document.
+        """
+        page_count = page_count or pdf_page_count(base64.b64decode(self.test_document_base64))
+        if not page_count:
+            raise ValueError(f"Could not count the pages of {self.sample_path.name}; pass --page-count")
+        ranges = page_ranges(page_count, pages_per_chunk)
+        pending: "queue.Queue[Tuple[int, Tuple[int, int]]]" = queue.Queue()
+        for index, page_range in enumerate(ranges):
+            pending.put((index, page_range))
+        chunks: List[Optional[Dict[str, Any]]] = [None] * len(ranges)
+
+        def worker(backend_id: str) -> None:
+            while True:
+                try:
+                    index, (first, last) = pending.get_nowait()
+                except queue.Empty:
+                    return
+                chunks[index] = self._analyze_chunk(backend_id, first, last)
+
+        self._log_info(
+            f"Splitting {self.sample_path.name} ({page_count} pages) into {len(ranges)} chunks of up to "
+            f"{pages_per_chunk} pages, {concurrency} in flight per pool"
+        )
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=concurrency * len(BACKEND_POOLS)) as executor:
+            workers = [executor.submit(worker, backend) for backend in BACKEND_POOLS for _ in range(concurrency)]
+            for future in workers:
+                future.result()
+        elapsed = time.time() - started
+
+        merged = merge_analyze_results([(chunk['first'], chunk['result']) for chunk in chunks if chunk])
+        rows = [
+            {'Pages': chunk['pages'], 'Backend': chunk['backend'], 'Time (s)': f"{chunk['elapsed']:.2f}"}
+            for chunk in chunks if chunk
+        ]
+        self._log_info("\n" + tabulate(rows, headers="keys", tablefmt="github"))
+        chunk_time = sum(chunk['elapsed'] for chunk in chunks if chunk)
+        self._log_info(
+            f"Merged {len(merged.get('pages', []))} pages ({len(merged['content'])} chars) in {elapsed:.2f}s "
+            f"wall time; chunks took {chunk_time:.2f}s in total"
+        )
+        self._log_admission_summary()
+        self._log_subscription_key_summary()
+        self._log_server_timing_summary()
+        self._log_connection_summary()
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as handle:
+                json.dump(merged, handle, indent=2)
+            self._log_info(f"Merged analyzeResult written to {output_path}")
+        return merged
+
+    def _probe_backend(self, backend_id: str) -> Dict[str, Any]:
+        """One small analyze round trip (page 1 of the sample) pinned to ``backend_id`` and marked as a probe."""
+        scores: List[str] = []
+
+        def capture(response) -> None:
+            score = response.http_response.headers.get('X-Probe-Score')
+            if score:
+                scores.append(score)
+
+        started = time.time()
+        status = 'succeeded'
+        try:
+            poller = self.client.begin_analyze_document(
+                model_id="prebuilt-read",
+                body={"base64Source": self.test_document_base64},
+                content_type="application/json",
+                pages="1",
+                params={'backendId': backend_id, 'probe': 'true'},
+                raw_response_hook=capture,
+                polling_interval=self.polling_interval,
+                **self._key_options(),
+            )
+            poller.result()
+        except HttpResponseError as error:
+            status = 'failed'
+            file_logger.warning("Probe of %s failed: %s", backend_id, error)
+        round_trip = time.time() - started
+        file_logger.info("Probe of %s %s in %.2fs", backend_id, status, round_trip)
+        return {
+            'backend': backend_id,
+            'status': status,
+            'round_trip': round_trip,
+            'score': float(scores[-1]) if scores else None,
+        }
+
+    def probe_backends(self, interval: float = 30.0, rounds: int = 0) -> List[Dict[str, Any]]:
+        """Probe every pool in ``BACKEND_POOLS`` each ``interval`` seconds, for ``rounds`` rounds (0: until interrupted).
+
+        The results policy folds each probe's round trip into the pool's score in
+        ``doc-backend-probe`` and ranks failover targets by it, so the prober has to keep running
+        for the scores to stay fresh; they lapse five minutes after the last probe.
+        """
+        self._log_info(
+            f"Probing {', '.join(BACKEND_POOLS)} every {interval:g}s with page 1 of {self.sample_path.name}"
+        )
+        results: List[Dict[str, Any]] = []
+        round_number = 0
+        try:
+            with ThreadPoolExecutor(max_workers=len(BACKEND_POOLS)) as executor:
+                while not rounds or round_number < rounds:
+                    round_number += 1
+                    started = time.time()
+                    probes = list(executor.map(self._probe_backend, BACKEND_POOLS))
+                    for probe in probes:
+                        probe['round'] = round_number
+                    results.extend(probes)
+                    rows = [
+                        {
+                            'Round': round_number,
+                            'Backend': probe['backend'],
+                            'Status': probe['status'],
+                            'Round trip (s)': f"{probe['round_trip']:.2f}",
+                            'Gateway score (s)': f"{probe['score']:.2f}" if probe['score'] is not None else '-',
+                        }
+                        for probe in probes
+                    ]
+                    self._log_info("\n" + tabulate(rows, headers="keys", tablefmt="github"))
+                    if rounds and round_number >= rounds:
+                        break
+                    time.sleep(max(0.0, interval - (time.time() - started)))
+        except KeyboardInterrupt:
+            self._log_info(f"Probing stopped after {round_number} rounds")
+        self._log_subscription_key_summary()
+        self._log_connection_summary()
+        return results
+
+    def run_batch(self, source_container: str, result_container: str, prefix: str = "") -> Dict[str, Any]:
+        """Submit every document under ``source_container``/``prefix`` as one ``analyzeBatch`` operation.
+
+        The batch is polled through ``analyzeBatchResults`` like a single document, but at
+        ``BACKEND_SWITCH_TEST_BATCH_POLL_INTERVAL`` and against ``backend-switch-batch-threshold``.
+        """
+        poll_interval = float(os.environ.get("BACKEND_SWITCH_TEST_BATCH_POLL_INTERVAL", "5"))
+        body: Dict[str, Any] = {
+            "azureBlobSource": {"containerUrl": source_container},
+            "resultContainerUrl": result_container,
+            "resultPrefix": f"batch-{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}/",
+        }
+        if prefix:
+            body["azureBlobSource"]["prefix"] = prefix
+        operation_trace = None
+        trace_kwargs: Dict[str, Any] = {}
+        if self.tracer:
+            operation_trace = self.tracer.start_operation("prebuilt-read", **{'docintel.batch': True})
+            trace_kwargs[OPERATION_OPTION] = operation_trace
+        trace_kwargs.update(self._key_options())
+        self._log_info(f"Submitting analyzeBatch for {source_container.split('?', 1)[0]} (prefix '{prefix}')")
+        started = time.time()
+        poller = self.client.begin_analyze_batch_documents(
+            model_id="prebuilt-read",
+            body=body,
+            content_type="application/json",
+            raw_response_hook=self._capture_response,
+            polling_interval=poll_interval,
+            **trace_kwargs,
+        )
+        post = self._last_response('POST')
+        operation_id = self._checkpoint_operation(
+            poller,
+            post['headers'].get('operation-location', '') if post else '',
+            post['headers'].get('x-backend-used', 'unknown') if post else 'unknown',
+            started,
+            'batch',
+            model_id="prebuilt-read",
+            subscription_key=trace_kwargs.get(KEY_OPTION),
+        )
+        error: Optional[str] = None
+        result = None
+        if self.metrics:
+            self.metrics.add_gauge('tester_operations_in_flight', 1)
+        try:
+            result = poller.result()
+        except HttpResponseError as exc:
+            error = str(exc)
+        finally:
+            if self.metrics:
+                self.metrics.add_gauge('tester_operations_in_flight', -1)
+        self.checkpoint.remove(operation_id)
+        total_time = time.time() - started
+
+        gets = [e for e in self.response_log if e['method'] == 'GET' and e['operation_id'] == operation_id]
+        post_backend = post['headers'].get('x-backend-used', 'unknown') if post else 'unknown'
+        final_backend = gets[-1]['headers'].get('x-backend-used', post_backend) if gets else post_backend
+        switched = any(e['headers'].get('x-backend-switched', '').lower() == 'true' for e in gets)
+        documents = (result.succeeded_count + result.failed_count + result.skipped_count) if result else 0
+        summary = {
+            'operation_id': operation_id,
+            'post_backend': post_backend,
+            'backend': final_backend,
+            'switching_occurred': switched,
+            'total_time': total_time,
+            'polls': len(gets),
+            'documents': documents,
+            'succeeded': result.succeeded_count if result else 0,
+            'failed': result.failed_count if result else 0,
+            'skipped': result.skipped_count if result else 0,
+            'error': error,
+        }
+        if self.metrics:
+            self._record_operation_metrics(final_backend, total_time, [operation_id])
+        if operation_trace is not None:
+            operation_trace.finish({
+                'docintel.post_backend': post_backend,
+                'docintel.final_backend': final_backend,
+                'docintel.total_time_s': total_time,
+                'docintel.backend_switched': switched,
+                'docintel.batch_documents': documents,
+            }, error=error is not None)
+
+        rows = [{
+            'Backend': final_backend if final_backend == post_backend else f"{post_backend} -> {final_backend}",
+            'Documents': documents,
+            'Succeeded': summary['succeeded'],
+            'Failed': summary['failed'],
+            'Skipped': summary['skipped'],
+            'Time (s)': f"{total_time:.1f}",
+            'Polls': len(gets),
+            'Switched': 'YES' if switched else 'NO',
+        }]
+        self._log_info("\n" + tabulate(rows, headers="keys", tablefmt="github"))
+        if error:
+            self._log_error(f"Batch failed: {error}")
+        elif documents:
+            # Analyzing one document at a time costs a POST plus its own polling loop per document.
+            self._log_info(
+                f"{documents} documents in 1 POST and {len(gets)} polls "
+                f"({documents / max(1, len(gets)):.1f} documents per poll)"
+            )
+        self._log_server_timing_summary()
+        self._log_connection_summary()
+        return summary
+
+    def _log_result_cache_summary(self) -> None:
+        """Report hit rate and latency saved when the gateway answers with X-Result-Cache."""
+        hits = [r['total_time'] for r in self.results if r.get('result_cache', '').upper() == 'HIT']
+        misses = [r['total_time'] for r in self.results if r.get('result_cache', '').upper() == 'MISS']
+        if not hits and not misses:
+            return
+        hit_rate = len(hits) / (len(hits) + len(misses))
+        mean_hit = sum(hits) / len(hits) if hits else 0.0
+        mean_miss = sum(misses) / len(misses) if misses else 0.0
+        self._log_info(
+            f"Result cache: {len(hits)} hits / {len(misses)} misses ({hit_rate:.0%}), "
+            f"mean {mean_hit:.2f}s on hit vs {mean_miss:.2f}s on miss"
+        )
+
+    def _log_switch_warmup_summary(self) -> None:
+        """Compare the first operations a pool takes after a switch with its steady state.
+
+        The gap is the cold cost ``backend-prewarm-requests`` is meant to absorb; run once with it
+        at 0 and once above 0 to see what the warm-up burst buys.
+        """
+        switches = [r for r in self.results if r.get('switched_to')]
+        if not switches:
+            return
+        after_switch: List[Dict[str, Any]] = []
+        steady: List[Dict[str, Any]] = []
+        target, remaining = '', 0
+        for result in self.results:
+            if remaining and result['post_backend'].lower() == target:
+                after_switch.append(result)
+                remaining -= 1
+            else:
+                steady.append(result)
+            if result.get('switched_to'):
+                target, remaining = result['switched_to'].lower(), POST_SWITCH_WINDOW
+        backends = {result['post_backend'] for result in after_switch}
+        steady = [result for result in steady if result['post_backend'] in backends]
+        rows = []
+        for phase, group in ((f"First {POST_SWITCH_WINDOW} after switch", after_switch), ('Steady state', steady)):
+            if group:
+                rows.append({
+                    'Phase': phase,
+                    'Operations': len(group),
+                    'Mean POST (s)': f"{sum(r['post_seconds'] for r in group) / len(group):.2f}",
+                    'Mean total (s)': f"{sum(r['total_time'] for r in group) / len(group):.2f}",
+                })
+        bursts = [r['prewarm_ms'] for r in switches if r.get('prewarm_ms') is not None]
+        if bursts:
+            self._log_info(
+                f"Pre-warm: {len(bursts)}/{len(switches)} switches sent a warm-up burst "
+                f"({switches[-1]['prewarm']} sent last time), mean {sum(bursts) / len(bursts):.0f}ms to dispatch"
+            )
+        else:
+            self._log_info(f"Pre-warm: none of {len(switches)} switches sent a warm-up burst")
+        if rows:
+            self._log_info("Latency on the switch target:\n" + tabulate(rows, headers="keys", tablefmt="github"))
+
+    def _log_server_timing_summary(self) -> None:
+        """Split gateway overhead from backend time using the Server-Timing stages seen this run."""
+        if not self.stage_timings:
+            return
+        self._log_info("Server-Timing by stage:\n" + _stage_timing_table(self.stage_timings))
+
+    def _log_polling_summary(self, results: List[Dict[str, Any]]) -> None:
+        """Report polls per operation, the figure adaptive polling is meant to bring down."""
+        polled = [r['polls'] for r in results if 'polls' in r]
+        if not self.completion_model or not polled:
+            return
+        self._log_info(
+            f"Adaptive polling: {sum(polled) / len(polled):.1f} polls per operation over {len(polled)} operations"
+        )
+
+    def _log_admission_summary(self) -> None:
+        """Report where each pool's submission rate settled and how often it was throttled."""
+        if not self.admission:
+            return
+        rows = [
+            {
+                'Backend': backend,
+                'Admitted': stats['admitted'],
+                '429s': stats['throttled'],
+                'Rate now (ops/s)': f"{stats['rate']:.2f}",
+                'Lowest rate (ops/s)': f"{stats['lowest_rate']:.2f}",
+                'Mean wait (s)': f"{stats['waited'] / stats['admitted']:.2f}" if stats['admitted'] else '-',
+            }
+            for backend, stats in self.admission.snapshot().items()
+        ]
+        if rows:
+            self._log_info("Admission control:\n" + tabulate(rows, headers="keys", tablefmt="github"))
+
+    def _log_subscription_key_summary(self, results: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Report the load each pooled subscription key carried and how often APIM throttled it."""
+        if not self.keys:
+            return
+        rows = []
+        for label, stats in self.keys.snapshot().items():
+            latencies = sorted(
+                r.get('total_time', r.get('latency', 0.0)) for r in results or [] if r.get('subscription_key') == label
+            )
+            rows.append({
+                'Key': label,
+                'Operations': stats['assigned'],
+                'Accepted POSTs': stats['accepted'],
+                'Requests': stats['requests'],
+                '429s': stats['throttled'],
+                'Errors': stats['errors'],
+                'p50 (s)': f"{latencies[len(latencies) // 2]:.2f}" if latencies else '-',
+                'p95 (s)': f"{latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]:.2f}" if latencies else '-',
+            })
+        self._log_info("Subscription keys:\n" + tabulate(rows, headers="keys", tablefmt="github"))
+
+    def _log_connection_summary(self) -> None:
+        """Report how many requests reused a pooled connection and what new connections cost."""
+        stats = self.transport.stats.snapshot()
+        if not stats['requests']:
+            return
+        self._log_info(
+            f"Connections: {stats['opened']} opened for {stats['requests']} requests "
+            f"({stats['reused'] / stats['requests']:.0%} reused), "
+            f"connect+handshake {stats['handshake_ms_total']:.0f}ms total, {stats['handshake_ms_mean']:.1f}ms mean"
+        )
+
+    def run_test(self, start_run: int = 1) -> List[Dict[str, Any]]:
         file_logger.info("=== STARTING AUTOMATIC BACKEND SWITCHING TEST ===")
         file_logger.info("Goal: Verify automatic backend switching at configured threshold")
         self.progress_entries = []
@@ -545,13 +1850,23 @@ class AutomaticBackendTester:
         runCount = 10000 # almost infinite loop 10000 x 6s delay = 60000s = 16.67 hours + processing time...
         console_logger.info(f"Running OCR {runCount} times:")
 
-        for run_id in range(1, runCount + 1):
+        for run_id in range(start_run, runCount + 1):
             self.test_automatic_switching(run_id, f"Auto-Switch-{run_id}")
             time.sleep(6) # Sleep between runs to test for long time
 
         switching_count = sum(1 for result in self.results if result['switching_occurred'])
         file_logger.info("=== FINAL SUMMARY ===")
         file_logger.info("Switching detected in %s/%s runs", switching_count, len(self.results))
+        if self.hedging_enabled:
+            hedge_wins = sum(1 for result in self.results if result.get('hedge_winner') == 'hedge')
+            file_logger.info("Hedged %s/%s runs; hedge finished first in %s", self.hedge_count, len(self.results), hedge_wins)
+        self._log_result_cache_summary()
+        self._log_polling_summary(self.results)
+        self._log_switch_warmup_summary()
+        self._log_admission_summary()
+        self._log_subscription_key_summary(self.results)
+        self._log_server_timing_summary()
+        self._log_connection_summary()
 
         if switching_count > 0:
             console_logger.info("Automatic backend switching confirmed (%s/%s runs)", switching_count, len(self.results))
@@ -562,6 +1877,55 @@ class AutomaticBackendTester:
         return self.results
 
 
+# Client-side phases --profile reports a CPU share and live memory for; each counts its callees too.
+PROFILE_PHASES = {
+    'capture': [AutomaticBackendTester._capture_response, AutomaticBackendTester._response_entry],
+    'headers': [AutomaticBackendTester._normalize_headers],
+    'base64': [base64, base64_decoded_length],
+    'progress': [AutomaticBackendTester._write_console_line, AutomaticBackendTester._log_progress_snapshot],
+}
+
+
+def _profile_phases() -> Dict[str, List[PhaseTarget]]:
+    """``PROFILE_PHASES`` plus the SDK package, looked up only when ``--profile`` is on.
+
+    The SDK phase is the package directory rather than its private model and serialization
+    modules, so an SDK release that renames them cannot break the tester's import.
+    """
+    phases: Dict[str, List[PhaseTarget]] = dict(PROFILE_PHASES)
+    try:
+        import azure.ai.documentintelligence as sdk
+    except ImportError:
+        return phases
+    phases['sdk'] = [Path(sdk.__file__).parent]
+    return phases
+
+
+def _report_profile(profiler: SamplingProfiler, path: Path) -> None:
+    profiler.write_collapsed(path)
+    cpu_seconds = profiler.total_microseconds() / 1_000_000
+    weighting = "CPU" if profiler.cpu_clock else "sampled wall"
+    console_logger.info(
+        "Profile: %.2fs of tester %s time over %.1fs (%.0f%% of one core); %s samples cost %.0fms",
+        cpu_seconds, weighting, profiler.elapsed, 100 * cpu_seconds / max(profiler.elapsed, 1e-9),
+        profiler.samples, profiler.sampler_seconds * 1000,
+    )
+    if profiler.memory_frames:
+        console_logger.info("CPU figures include tracemalloc's overhead; --profile-memory-frames 0 measures CPU alone")
+    elif profiler.elapsed and cpu_seconds / profiler.elapsed > 0.8:
+        # One interpreter runs Python on one core at a time, so this is the tester's ceiling.
+        console_logger.warning("The tester is close to one busy core; it, not the gateway, may be limiting throughput")
+    console_logger.info("%s", tabulate(profiler.phase_rows(), headers="keys", tablefmt="github"))
+    console_logger.info("%s", tabulate(profiler.function_rows(), headers="keys", tablefmt="github"))
+    memory = profiler.memory_rows()
+    if memory:
+        console_logger.info(
+            "tracemalloc: peak %.1f MiB; largest live allocation sites:\n%s",
+            profiler.peak_memory() / (1024 * 1024), tabulate(memory, headers="keys", tablefmt="github"),
+        )
+    console_logger.info("Collapsed stacks for flamegraph.pl / speedscope: %s", path)
+
+
 def _resolve_failure_url(tester: Optional[AutomaticBackendTester]) -> Optional[str]:
     """Return the most relevant request URL for error messages."""
     if tester:
@@ -580,6 +1944,15 @@ def _resolve_failure_url(tester: Optional[AutomaticBackendTester]) -> Optional[s
     return None
 
 
+def _concurrency_pool_size(args: argparse.Namespace) -> Optional[int]:
+    """Size the connection pool to the operations a mode keeps in flight, so none waits on a connection."""
+    if args.replay:
+        return max(DEFAULT_POOL_SIZE, args.concurrency)
+    if args.split:
+        return max(DEFAULT_POOL_SIZE, args.split_concurrency * len(BACKEND_POOLS))
+    return None
+
+
 def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Exercise automatic backend switching through APIM via Document Intelligence SDK",
@@ -589,15 +1962,233 @@ def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
         "--sample",
         help="Path to the document sent to Document Intelligence; overrides BACKEND_SWITCH_TEST_SAMPLE",
     )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Re-submit slow operations to the alternate pool and keep whichever finishes first",
+    )
+    parser.add_argument(
+        "--capture",
+        metavar="TRACE",
+        help="Append each operation (arrival time, document hash and size, model, backend, latency) to a JSONL trace",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="TRACE",
+        help="Re-issue a captured trace instead of running the soak loop",
+    )
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay time compression, e.g. 10 or 100 (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum operations in flight during replay (default: 8)")
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve OpenMetrics on this port at /metrics; overrides BACKEND_SWITCH_TEST_METRICS_PORT",
+    )
+    parser.add_argument(
+        "--trace-export",
+        metavar="TARGET",
+        help="Emit an OpenTelemetry trace per operation to file:PATH or otlp[:URL] (needs opentelemetry-sdk)",
+    )
+    parser.add_argument(
+        "--split",
+        type=int,
+        metavar="PAGES",
+        help="Analyze the sample once as chunks of PAGES pages spread over both pools, then merge the results",
+    )
+    parser.add_argument(
+        "--split-concurrency",
+        type=int,
+        default=2,
+        help="Maximum chunks in flight per pool in --split mode (default: 2)",
+    )
+    parser.add_argument("--page-count", type=int, help="Page count of the sample when it cannot be read from the PDF")
+    parser.add_argument("--split-output", metavar="PATH", help="Write the merged analyzeResult JSON to PATH")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit the source container as one analyzeBatch operation instead of running the soak loop",
+    )
+    parser.add_argument(
+        "--batch-source",
+        metavar="URL",
+        help="Container URL (with SAS) holding the batch documents; overrides BACKEND_SWITCH_TEST_BATCH_SOURCE",
+    )
+    parser.add_argument(
+        "--batch-results",
+        metavar="URL",
+        help="Container URL (with SAS) receiving the batch results; overrides BACKEND_SWITCH_TEST_BATCH_RESULTS",
+    )
+    parser.add_argument("--batch-prefix", default="", help="Only analyze blobs whose names start with this prefix")
+    parser.add_argument(
+        "--probe",
+        action="store_true",
+        help="Probe every pool with a one-page analyze instead of running the soak loop, feeding the gateway's health scores",
+    )
+    parser.add_argument(
+        "--probe-interval",
+        type=float,
+        help="Seconds between probe rounds (default: 30); overrides BACKEND_SWITCH_TEST_PROBE_INTERVAL",
+    )
+    parser.add_argument("--probe-rounds", type=int, default=0, help="Stop after this many probe rounds (default: run until interrupted)")
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        help="Connections kept per host (default: the replay or split concurrency, else 10); "
+        "overrides BACKEND_SWITCH_TEST_POOL_SIZE",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Send requests over HTTP/2 through httpx (needs httpx[http2]); overrides BACKEND_SWITCH_TEST_HTTP2",
+    )
+    parser.add_argument(
+        "--adaptive-polling",
+        action="store_true",
+        help="Schedule polls from learned completion times instead of a fixed interval; "
+        "overrides BACKEND_SWITCH_TEST_ADAPTIVE_POLLING",
+    )
+    parser.add_argument(
+        "--completion-model",
+        help="Completion model file for --adaptive-polling (default: logs/completion_model.json); "
+        "overrides BACKEND_SWITCH_TEST_COMPLETION_MODEL",
+    )
+    parser.add_argument(
+        "--admission-rate",
+        type=float,
+        metavar="OPS",
+        help="Admit at most OPS submissions per second per pool to start, adapting to 429s and Retry-After; "
+        "overrides BACKEND_SWITCH_TEST_ADMISSION_RATE",
+    )
+    parser.add_argument(
+        "--admission-burst",
+        type=int,
+        help=f"Submissions a pool's bucket can save up (default: {DEFAULT_BURST}); "
+        "overrides BACKEND_SWITCH_TEST_ADMISSION_BURST",
+    )
+    parser.add_argument(
+        "--subscription-keys",
+        metavar="PATH",
+        help="File of subscription keys (one per line, optionally LABEL=KEY) to shard operations over; "
+        "overrides BACKEND_SWITCH_TEST_SUBSCRIPTION_KEYS and AZURE_APIM_KEYS",
+    )
+    parser.add_argument(
+        "--key-assignment",
+        choices=ASSIGNMENTS,
+        help="How operations are given pooled keys (default: round-robin); overrides BACKEND_SWITCH_TEST_KEY_ASSIGNMENT",
+    )
+    parser.add_argument(
+        "--results-db",
+        metavar="PATH",
+        help="Append every finished operation to this SQLite database, e.g. logs/results.db (off by default); "
+        "overrides BACKEND_SWITCH_TEST_RESULTS_DB",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Finish the soak, hedge, replay, split and batch operations a previous run left in flight "
+        "before starting new ones",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="PATH",
+        help="File recording in-flight operations (default: logs/inflight_operations.json); "
+        "overrides BACKEND_SWITCH_TEST_CHECKPOINT",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Sample the tester's own CPU and memory use and report it per phase and function at the end; "
+        "overrides BACKEND_SWITCH_TEST_PROFILE",
+    )
+    parser.add_argument(
+        "--profile-interval",
+        type=float,
+        metavar="MS",
+        help=f"Milliseconds between --profile samples (default: {DEFAULT_INTERVAL * 1000:g}); "
+        "overrides BACKEND_SWITCH_TEST_PROFILE_INTERVAL",
+    )
+    parser.add_argument(
+        "--profile-memory-frames",
+        type=int,
+        help=f"Stack frames tracemalloc keeps per allocation, 0 to skip memory (default: {DEFAULT_MEMORY_FRAMES}); "
+        "overrides BACKEND_SWITCH_TEST_PROFILE_MEMORY_FRAMES",
+    )
+    parser.add_argument(
+        "--timing-report",
+        nargs="?",
+        const=LOG_DIR,
+        metavar="LOG_DIR",
+        help="Aggregate the Server-Timing stages logged by earlier runs (default: the logs directory) and exit",
+    )
     return parser.parse_args(argv)
 
 
 def main(argv: Optional[List[str]] = None) -> int:
     args = _parse_args(argv)
+    if args.timing_report:
+        samples = summarize_server_timing_logs(Path(args.timing_report))
+        if not samples:
+            console_logger.warning("No Server-Timing entries found in %s", args.timing_report)
+            return 1
+        console_logger.info("%s", _stage_timing_table(samples))
+        return 0
     tester: Optional[AutomaticBackendTester] = None
+    profiler: Optional[SamplingProfiler] = None
+    if args.profile or os.environ.get("BACKEND_SWITCH_TEST_PROFILE", "").lower() in ("1", "true", "yes"):
+        interval_ms = args.profile_interval or float(
+            os.environ.get("BACKEND_SWITCH_TEST_PROFILE_INTERVAL") or DEFAULT_INTERVAL * 1000
+        )
+        memory_frames = args.profile_memory_frames
+        if memory_frames is None:
+            memory_frames = int(os.environ.get("BACKEND_SWITCH_TEST_PROFILE_MEMORY_FRAMES") or DEFAULT_MEMORY_FRAMES)
+        profiler = SamplingProfiler(interval_ms / 1000, _profile_phases(), memory_frames)
+        profiler.start()
     try:
-        tester = AutomaticBackendTester(sample_override=args.sample)
-        results = tester.run_test()
+        tester = AutomaticBackendTester(
+            sample_override=args.sample,
+            hedge=args.hedge,
+            capture_path=args.capture,
+            metrics_port=args.metrics_port,
+            trace_export=args.trace_export,
+            checkpoint_path=args.checkpoint,
+            pool_size=args.pool_size or _concurrency_pool_size(args),
+            http2=args.http2,
+            adaptive_polling=args.adaptive_polling,
+            completion_model_path=args.completion_model,
+            admission_rate=args.admission_rate,
+            admission_burst=args.admission_burst,
+            subscription_keys=args.subscription_keys,
+            key_assignment=args.key_assignment,
+            results_db=args.results_db,
+        )
+        next_run = 1
+        if args.resume:
+            resumed = tester.resume_operations()
+            next_run = max((r['run'] for r in resumed if isinstance(r['run'], int)), default=0) + 1
+        if args.batch:
+            source = args.batch_source or os.environ.get("BACKEND_SWITCH_TEST_BATCH_SOURCE")
+            results_container = args.batch_results or os.environ.get("BACKEND_SWITCH_TEST_BATCH_RESULTS")
+            if not source or not results_container:
+                raise ValueError("--batch needs --batch-source and --batch-results (or their environment variables)")
+            summary = tester.run_batch(source, results_container, prefix=args.batch_prefix)
+            return 0 if summary['error'] is None and summary['failed'] == 0 else 1
+        if args.probe:
+            interval = args.probe_interval or float(os.environ.get("BACKEND_SWITCH_TEST_PROBE_INTERVAL") or 30)
+            probes = tester.probe_backends(interval=interval, rounds=args.probe_rounds)
+            latest = probes[-len(BACKEND_POOLS):]
+            return 0 if latest and all(probe['status'] == 'succeeded' for probe in latest) else 1
+        if args.split:
+            merged = tester.analyze_split(
+                args.split,
+                concurrency=args.split_concurrency,
+                page_count=args.page_count,
+                output_path=args.split_output,
+            )
+            return 0 if merged.get('pages') else 1
+        if args.replay:
+            replayed = tester.replay_trace(args.replay, speed=args.speed, concurrency=args.concurrency)
+            return 0 if replayed and all(r['status'] in (200, 404) for r in replayed) else 1
+        results = tester.run_test(start_run=next_run)
         return 0 if any(r['switching_occurred'] for r in results) else 1
     except Exception as exc:  # pragma: no cover - integration test failure path
         failure_url = _resolve_failure_url(tester)
@@ -608,6 +2199,14 @@ def main(argv: Optional[List[str]] = None) -> int:
             console_logger.error("Test execution failed: %s", exc)
             file_logger.exception("Test execution failed")
         return 1
+    finally:
+        if tester and tester.tracer:
+            tester.tracer.shutdown()  # flush batched spans before exit
+        if tester and tester.results_store:
+            tester.results_store.close()
+        if profiler:
+            profiler.stop()
+            _report_profile(profiler, Path(PROFILE_FILE))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+"""Unit tests for the bounded JSON field scan."""
+import base64
+import json
+
+import pytest
+
+from json_scan import base64_decoded_length, scan_string_fields, string_length
+
+STATUS = ("status",)
+CONTENT = ("analyzeResult", "content")
+
+
+def _lengths(body, paths=(STATUS, CONTENT)):
+    return {path: string_length(body, span) for path, span in scan_string_fields(body, paths).items()}
+
+
+@pytest.mark.parametrize("encode", [lambda text: text, lambda text: text.encode("utf-8")], ids=["str", "bytes"])
+def test_finds_status_and_content_spans(encode):
+    body = encode(json.dumps({"status": "succeeded", "analyzeResult": {"content": "hello", "pages": []}}))
+
+    spans = scan_string_fields(body, [STATUS, CONTENT])
+
+    assert json.loads(body[slice(*spans[STATUS])]) == "succeeded"
+    assert json.loads(body[slice(*spans[CONTENT])]) == "hello"
+
+
+def test_escaped_quotes_and_backslashes_do_not_end_the_string():
+    content = 'say "hi" \\ path\\\\ end\\'
+    body = json.dumps({"analyzeResult": {"content": content, "status": "trap"}, "status": "running"}).encode("utf-8")
+
+    assert _lengths(body) == {CONTENT: len(content), STATUS: len("running")}
+
+
+def test_non_ascii_content_is_measured_in_characters():
+    content = "Größe 東京 🙂"
+    for body in (json.dumps({"analyzeResult": {"content": content}}, ensure_ascii=False).encode("utf-8"),
+                 json.dumps({"analyzeResult": {"content": content}}).encode("utf-8")):
+        assert _lengths(body, [CONTENT]) == {CONTENT: len(content)}
+
+
+def test_nested_content_key_does_not_match():
+    body = json.dumps({
+        "analyzeResult": {
+            "paragraphs": [{"content": "in an array"}],
+            "styles": {"content": "one level too deep"},
+            "content": "top level",
+        },
+    })
+
+    assert _lengths(body, [CONTENT]) == {CONTENT: len("top level")}
+
+
+def test_missing_and_non_string_fields_are_not_reported():
+    body = json.dumps({"status": 200, "analyzeResult": {"pages": []}})
+
+    assert scan_string_fields(body, [STATUS, CONTENT]) == {}
+
+
+def test_scan_stops_after_limit():
+    body = json.dumps({"status": "succeeded", "analyzeResult": {"content": "x"}})
+
+    assert list(scan_string_fields(body, [STATUS, CONTENT], limit=1)) == [STATUS]
+
+
+def test_truncated_body_returns_what_was_found():
+    body = json.dumps({"status": "running", "analyzeResult": {"content": "cut off"}})[:-10]
+
+    assert list(scan_string_fields(body, [STATUS, CONTENT])) == [STATUS]
+
+
+def test_base64_decoded_length():
+    for raw in (b"", b"a", b"ab", b"abc", b"abcd"):
+        body = json.dumps({"base64Source": base64.b64encode(raw).decode("ascii")}).encode("ascii")
+        span = scan_string_fields(body, [("base64Source",)])[("base64Source",)]
+        assert base64_decoded_length(body, span) == len(raw)
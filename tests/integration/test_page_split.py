@@ -0,0 +1,83 @@
+"""Unit tests for merging split-mode ``analyzeResult`` chunks."""
+from page_split import format_pages, merge_analyze_results, page_ranges, parse_pages
+
+
+def _chunk(content, first_page, page_count=1):
+    """An analyzeResult for ``content`` on ``page_count`` pages numbered from ``first_page``."""
+    return {
+        "apiVersion": "2024-11-30",
+        "content": content,
+        "pages": [
+            {"pageNumber": first_page + index, "spans": [{"offset": 0, "length": len(content)}]}
+            for index in range(page_count)
+        ],
+        "paragraphs": [{"content": content, "spans": [{"offset": 0, "length": len(content)}]}] if content else [],
+    }
+
+
+def test_page_ranges_and_pages_parameter_round_trip():
+    assert page_ranges(5, 2) == [(1, 2), (3, 4), (5, 5)]
+    assert [format_pages(first, last) for first, last in page_ranges(5, 2)] == ["1-2", "3-4", "5"]
+    assert parse_pages("1-3,5") == [1, 2, 3, 5]
+
+
+def test_chunks_are_merged_in_page_order_whatever_order_they_finish_in():
+    merged = merge_analyze_results([(3, _chunk("third", 3)), (1, _chunk("first", 1)), (2, _chunk("second", 2))])
+
+    assert merged["content"] == "first\nsecond\nthird"
+    assert [page["pageNumber"] for page in merged["pages"]] == [1, 2, 3]
+    for paragraph in merged["paragraphs"]:
+        span = paragraph["spans"][0]
+        assert merged["content"][span["offset"]:span["offset"] + span["length"]] == paragraph["content"]
+
+
+def test_empty_chunk_adds_no_separator_and_keeps_its_pages():
+    merged = merge_analyze_results([(1, _chunk("first", 1)), (2, _chunk("", 2)), (3, _chunk("third", 3))])
+
+    assert merged["content"] == "first\nthird"
+    assert [page["pageNumber"] for page in merged["pages"]] == [1, 2, 3]
+    assert merged["paragraphs"][1]["spans"][0]["offset"] == len("first\n")
+
+
+def test_leading_empty_chunk_leaves_offsets_at_zero():
+    merged = merge_analyze_results([(1, _chunk("", 1)), (2, _chunk("second", 2))])
+
+    assert merged["content"] == "second"
+    assert merged["paragraphs"][0]["spans"][0]["offset"] == 0
+
+
+def test_chunks_numbered_from_one_by_the_service_are_renumbered():
+    # Some API versions number a chunk's pages from 1 rather than from the requested first page.
+    merged = merge_analyze_results([(1, _chunk("ab", 1, page_count=2)), (3, _chunk("cd", 1, page_count=2))])
+
+    assert [page["pageNumber"] for page in merged["pages"]] == [1, 2, 3, 4]
+    assert merged["pages"][2]["spans"][0]["offset"] == len("ab\n")
+
+
+def test_chunks_already_numbered_by_the_document_are_left_alone():
+    merged = merge_analyze_results([(1, _chunk("ab", 1)), (2, _chunk("cd", 2))])
+
+    assert [page["pageNumber"] for page in merged["pages"]] == [1, 2]
+
+
+def test_element_references_point_at_the_merged_collections():
+    second = _chunk("x y", 2)
+    second["paragraphs"] = [
+        {"content": "x", "spans": [{"offset": 0, "length": 1}]},
+        {"content": "y", "spans": [{"offset": 2, "length": 1}]},
+    ]
+    second["sections"] = [{"spans": [{"offset": 0, "length": 3}], "elements": ["/paragraphs/1", "/sections/0"]}]
+    first = _chunk("a", 1)
+    first["sections"] = [{"spans": [{"offset": 0, "length": 1}], "elements": ["/paragraphs/0"]}]
+
+    merged = merge_analyze_results([(2, second), (1, first)])
+
+    assert merged["sections"][0]["elements"] == ["/paragraphs/0"]
+    assert merged["sections"][1]["elements"] == ["/paragraphs/2", "/sections/1"]
+    assert merged["paragraphs"][2]["content"] == "y"
+
+
+def test_scalar_fields_come_from_the_first_chunk():
+    merged = merge_analyze_results([(1, _chunk("a", 1)), (2, {**_chunk("b", 2), "apiVersion": "other"})])
+
+    assert merged["apiVersion"] == "2024-11-30"
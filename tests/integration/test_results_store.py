@@ -0,0 +1,78 @@
+"""Unit tests for the SQLite results store and its percentile report."""
+import json
+import sqlite3
+
+import pytest
+
+from results_store import ResultsStore, latency_report, main
+
+
+@pytest.fixture
+def store(tmp_path):
+    results = ResultsStore(tmp_path / "results.db", run_id="run-1")
+    yield results
+    results.close()
+
+
+def _connect(store):
+    return sqlite3.connect(str(store.path))
+
+
+def test_append_maps_soak_and_replay_fields_to_columns(store):
+    store.append({
+        'test_name': 'Auto-Switch-1', 'post_backend': 'doc-west-pool', 'get_backend': 'doc-north-pool',
+        'total_time': 4.0, 'switching_occurred': True, 'success': 'true', 'hedge_winner': '', 'custom': 7,
+        'operation_query': {'skipped': 'yes'},
+    }, 'soak', finished=1000.0)
+    store.append({'backend': 'doc-west-pool', 'latency': 2.5, 'switched': False, 'status': 200}, 'replay', 2000.0)
+
+    rows = _connect(store).execute(
+        "SELECT run_id, mode, started, finished, get_backend, get_status, total_time, switching_occurred, success,"
+        " hedge_winner, extra FROM results ORDER BY finished"
+    ).fetchall()
+
+    assert rows[0][:10] == ('run-1', 'soak', 996.0, 1000.0, 'doc-north-pool', None, 4.0, 1, 1, None)
+    assert json.loads(rows[0][10]) == {'custom': 7}
+    assert rows[1][:9] == ('run-1', 'replay', 1997.5, 2000.0, 'doc-west-pool', 200, 2.5, 0, None)
+
+
+def test_percentiles_use_nearest_rank_per_group(store):
+    for second in range(1, 11):
+        store.append({'get_backend': 'doc-west-pool', 'total_time': float(second)}, 'soak', finished=3600.0)
+    store.append({'get_backend': 'doc-north-pool', 'total_time': 9.0}, 'soak', finished=3600.0)
+
+    rows = latency_report(_connect(store), by='backend')
+
+    assert [row['bucket'] for row in rows] == ['doc-north-pool', 'doc-west-pool']
+    north, west = rows
+    assert (north['operations'], north['p50'], north['p99'], north['max']) == (1, 9.0, 9.0, 9.0)
+    assert (west['operations'], west['mean'], west['p50'], west['p95'], west['p99']) == (10, 5.5, 5.0, 10.0, 10.0)
+
+
+def test_report_filters_and_groups_by_hour(store):
+    store.append({'get_backend': 'doc-west-pool', 'total_time': 1.0, 'switching_occurred': True}, 'soak', 0.0)
+    store.append({'get_backend': 'doc-west-pool', 'total_time': 2.0, 'switching_occurred': False}, 'soak', 3600.0)
+    store.append({'get_backend': 'doc-north-pool', 'total_time': 3.0, 'switching_occurred': True}, 'replay', 7200.0)
+    store.append({'get_backend': 'doc-west-pool'}, 'soak', 7200.0)  # no total_time: never reported
+
+    connection = _connect(store)
+
+    assert [row['bucket'] for row in latency_report(connection)] == [
+        '1970-01-01 00:00', '1970-01-01 01:00', '1970-01-01 02:00',
+    ]
+    assert [row['max'] for row in latency_report(connection, by='run', switched=True)] == [3.0]
+    assert [row['max'] for row in latency_report(connection, by='run', backend='doc-west-pool')] == [2.0]
+    assert [row['max'] for row in latency_report(connection, by='run', mode='replay')] == [3.0]
+    assert [row['operations'] for row in latency_report(connection, by='run', since=3600.0)] == [2]
+
+
+def test_report_command_prints_json(store, capsys):
+    store.append({'get_backend': 'doc-west-pool', 'total_time': 1.5}, 'soak', finished=0.0)
+
+    assert main(['--db', str(store.path), '--by', 'mode', '--json']) == 0
+    assert json.loads(capsys.readouterr().out)[0]['bucket'] == 'soak'
+
+
+def test_report_command_without_a_database(tmp_path, capsys):
+    assert main(['--db', str(tmp_path / "missing.db")]) == 1
+    assert "No results database" in capsys.readouterr().out
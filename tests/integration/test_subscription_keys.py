@@ -0,0 +1,109 @@
+"""Unit tests for subscription-key parsing and the key pool."""
+from types import SimpleNamespace
+
+import pytest
+
+from subscription_keys import KEY_HEADER, KEY_OPTION, SubscriptionKeyPolicy, SubscriptionKeyPool, parse_keys
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Context(dict):
+    """Pipeline context: a dict with the per-call ``options`` alongside."""
+
+    def __init__(self, options):
+        super().__init__()
+        self.options = dict(options)
+
+
+def _request(options):
+    return SimpleNamespace(context=_Context(options), http_request=SimpleNamespace(headers={}))
+
+
+def test_parse_keys_accepts_lines_commas_comments_and_labels():
+    text = "# tenants\ntenant-a=key-a, key-b\n\n  key-c  # trailing comment\n"
+
+    assert parse_keys(text) == [("tenant-a", "key-a"), ("key2", "key-b"), ("key3", "key-c")]
+
+
+def test_parse_keys_skips_empty_entries():
+    assert parse_keys(",, label= ,\n#only a comment") == []
+
+
+def test_parse_keys_rejects_duplicate_labels():
+    with pytest.raises(ValueError, match="tenant-a"):
+        parse_keys("tenant-a=one,tenant-a=two")
+
+
+def test_pool_needs_keys_and_a_known_assignment():
+    with pytest.raises(ValueError):
+        SubscriptionKeyPool([])
+    with pytest.raises(ValueError, match="random"):
+        SubscriptionKeyPool([("a", "1")], assignment="random")
+
+
+def test_round_robin_hands_keys_out_in_turn():
+    pool = SubscriptionKeyPool([("a", "1"), ("b", "2"), ("c", "3")])
+
+    assert [pool.assign() for _ in range(5)] == ["a", "b", "c", "a", "b"]
+    assert pool.snapshot()["a"]["assigned"] == 2
+
+
+def test_least_used_picks_the_key_with_fewest_requests():
+    pool = SubscriptionKeyPool([("a", "1"), ("b", "2")], assignment="least-used", clock=FakeClock())
+    for _ in range(3):
+        pool.record("a", "GET", 200)
+
+    assert pool.assign() == "b"
+
+
+def test_least_used_skips_keys_inside_retry_after_until_it_passes():
+    clock = FakeClock()
+    pool = SubscriptionKeyPool([("a", "1"), ("b", "2")], assignment="least-used", clock=clock)
+    for _ in range(3):
+        pool.record("b", "GET", 200)
+    pool.record("a", "POST", 429, retry_after=10)
+
+    assert pool.assign() == "b"
+    clock.now = 10.0
+    assert pool.assign() == "a"
+
+
+def test_least_used_falls_back_to_every_key_when_all_are_blocked():
+    pool = SubscriptionKeyPool([("a", "1"), ("b", "2")], assignment="least-used", clock=FakeClock())
+    pool.record("a", "POST", 429, retry_after=5)
+    pool.record("b", "POST", 429, retry_after=5)
+    pool.record("b", "GET", 200)
+
+    assert pool.assign() == "a"
+
+
+def test_record_counts_accepted_throttled_and_errors():
+    pool = SubscriptionKeyPool([("a", "1")])
+    pool.record("a", "POST", 202)
+    pool.record("a", "GET", 200)
+    pool.record("a", "GET", 404)  # how a switched operation ends, not an error
+    pool.record("a", "POST", 429)
+    pool.record("a", "GET", 500)
+
+    assert pool.snapshot()["a"] == {'assigned': 0, 'requests': 5, 'accepted': 1, 'throttled': 1, 'errors': 1}
+
+
+def test_policy_sends_the_operation_key_and_assigns_one_when_missing():
+    pool = SubscriptionKeyPool([("a", "key-a"), ("b", "key-b")])
+    policy = SubscriptionKeyPolicy(pool)
+
+    pinned = _request({KEY_OPTION: "b"})
+    unpinned = _request({})
+    policy.on_request(pinned)
+    policy.on_request(unpinned)
+
+    assert pinned.http_request.headers[KEY_HEADER] == "key-b"
+    assert unpinned.context[KEY_OPTION] == "a"
+    assert unpinned.http_request.headers[KEY_HEADER] == "key-a"
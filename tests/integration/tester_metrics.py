@@ -0,0 +1,154 @@
+"""Optional OpenMetrics ``/metrics`` endpoint for the backend switching tester.
+
+The capture hook only appends ``(kind, name, labels, value)`` tuples to a deque, which is
+atomic in CPython, so recording never takes a lock. Samples are folded into totals when
+Prometheus scrapes or, if nobody scrapes, once the backlog reaches ``FOLD_THRESHOLD``.
+"""
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List, Optional, Tuple
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+DURATION_BUCKETS = (1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0)
+POLL_BUCKETS = (1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 50.0)
+FOLD_THRESHOLD = 10000
+
+_HELP = {
+    "tester_http_responses": ("counter", "Responses captured by the tester by method, status and x-backend-used"),
+    "tester_backend_switched": ("counter", "GET responses carrying x-backend-switched: true, by old backend"),
+    "tester_named_value_updates": ("counter", "x-named-value-update-status values reported by the gateway"),
+    "tester_operation_duration_seconds": ("histogram", "Analyze completion time from POST to final GET"),
+    "tester_operation_polls": ("histogram", "analyzeResults GETs per operation"),
+    "tester_operations_in_flight": ("gauge", "Operations submitted but not yet completed"),
+}
+_BUCKETS = {
+    "tester_operation_duration_seconds": DURATION_BUCKETS,
+    "tester_operation_polls": POLL_BUCKETS,
+}
+
+
+def _labels(**labels: str) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: LabelSet, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class TesterMetrics:
+    """Counters, histograms and the in-flight gauge the tester exports."""
+
+    def __init__(self) -> None:
+        self._pending: Deque[Tuple[str, str, LabelSet, float]] = deque()
+        self._fold_lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelSet], float] = {}
+        self._gauges: Dict[Tuple[str, LabelSet], float] = {}
+        self._histograms: Dict[Tuple[str, LabelSet], List[float]] = {}
+
+    # Hot path -----------------------------------------------------------------
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        self._record("counter", name, _labels(**labels), value)
+
+    def add_gauge(self, name: str, value: float, **labels: str) -> None:
+        self._record("gauge", name, _labels(**labels), value)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        self._record("histogram", name, _labels(**labels), value)
+
+    def _record(self, kind: str, name: str, labels: LabelSet, value: float) -> None:
+        self._pending.append((kind, name, labels, value))
+        if len(self._pending) >= FOLD_THRESHOLD:
+            self._fold()
+
+    # Scrape path --------------------------------------------------------------
+
+    def _fold(self) -> None:
+        with self._fold_lock:
+            while True:
+                try:
+                    kind, name, labels, value = self._pending.popleft()
+                except IndexError:
+                    return
+                key = (name, labels)
+                if kind == "counter":
+                    self._counters[key] = self._counters.get(key, 0.0) + value
+                elif kind == "gauge":
+                    self._gauges[key] = self._gauges.get(key, 0.0) + value
+                else:
+                    buckets = _BUCKETS[name]
+                    state = self._histograms.setdefault(key, [0.0] * (len(buckets) + 2))
+                    for index, bound in enumerate(buckets):
+                        if value <= bound:
+                            state[index] += 1
+                    state[-2] += 1  # count (+Inf bucket)
+                    state[-1] += value  # sum
+
+    def render(self, openmetrics: bool = True) -> str:
+        self._fold()
+        lines: List[str] = []
+        with self._fold_lock:
+            for name, (kind, help_text) in _HELP.items():
+                # OpenMetrics names the counter family without _total; the Prometheus text format does not.
+                family = name if openmetrics or kind != "counter" else f"{name}_total"
+                lines.append(f"# HELP {family} {help_text}")
+                lines.append(f"# TYPE {family} {kind}")
+                if kind == "counter":
+                    for (metric, labels), value in sorted(self._counters.items()):
+                        if metric == name:
+                            lines.append(f"{name}_total{_format_labels(labels)} {value:g}")
+                elif kind == "gauge":
+                    for (metric, labels), value in sorted(self._gauges.items()):
+                        if metric == name:
+                            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                else:
+                    for (metric, labels), state in sorted(self._histograms.items()):
+                        if metric != name:
+                            continue
+                        for bound, count in zip(_BUCKETS[name], state):
+                            lines.append(f"{name}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {count:g}")
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {state[-2]:g}")
+                        lines.append(f"{name}_count{_format_labels(labels)} {state[-2]:g}")
+                        lines.append(f"{name}_sum{_format_labels(labels)} {state[-1]:g}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(metrics: TesterMetrics, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Expose ``metrics`` on ``http://host:port/metrics`` from a daemon thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args) -> None:  # noqa: A002 - BaseHTTPRequestHandler signature
+            pass
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+            body = metrics.render(openmetrics=openmetrics).encode("utf-8")
+            content_type = (
+                "application/openmetrics-text; version=1.0.0; charset=utf-8"
+                if openmetrics
+                else "text/plain; version=0.0.4; charset=utf-8"
+            )
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="tester-metrics", daemon=True).start()
+    return server
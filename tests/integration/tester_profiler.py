@@ -0,0 +1,240 @@
+"""Sampling profiler for the backend switching tester's own overhead.
+
+A daemon thread samples every other thread's Python stack each ``interval`` seconds. On Linux
+each sample is weighted by the CPU time its thread used since the previous sample, read from
+the thread's CPU clock. Threads blocked on the network or sleeping between polls therefore cost
+nothing, and the weights add up to the CPU the tester burned. Where per-thread CPU clocks are
+not available (Windows, macOS), every sample of a thread not parked in a known blocking call
+counts one interval of wall time instead.
+
+Stacks are written in the collapsed format (``thread;frame;frame weight``) that ``flamegraph.pl``,
+speedscope and inferno read, with weights in microseconds. Named phases - groups of functions,
+modules or whole package directories - get an inclusive CPU share, so the report shows how much of the run went into
+response capture or SDK deserialization. With ``memory_frames`` set, tracemalloc runs alongside.
+The report lists the peak, the largest allocation sites still live at the end, and how much of
+that memory each phase allocated. tracemalloc slows every allocation, and the cost grows with
+the frames kept per allocation. The default of one frame is enough for the site list, but it still
+inflates the CPU figures severalfold, so measure CPU with memory tracing off. Deeper frames let
+allocations made in a phase's callees count towards that phase.
+"""
+import collections
+import inspect
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from types import CodeType, ModuleType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_MEMORY_FRAMES = 1
+
+# Functions a thread is parked in while it waits; only consulted without per-thread CPU clocks.
+_BLOCKING_FUNCTIONS = {
+    'wait', '_wait_for_tstate_lock', 'select', 'poll', 'readinto', 'recv_into', 'recv', 'accept', 'get',
+    '_sleep', 'serve_forever',
+}
+
+# A directory (as a Path) matches every file below it, so a package is covered without importing its modules.
+PhaseTarget = Union[Callable[..., Any], ModuleType, Path]
+
+
+def _thread_cpu_ns(ident: int) -> Optional[int]:
+    try:
+        return time.clock_gettime_ns(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError):
+        return None
+
+
+def _thread_role(name: str) -> str:
+    """``ThreadPoolExecutor-0_3`` -> ``ThreadPoolExecutor``, ``LROPoller(<id>)`` -> ``LROPoller``."""
+    return re.sub(r"[-_ ]\d.*$", "", re.sub(r"\(.*?\)", "", name)) or name
+
+
+def _frame_label(code: CodeType) -> str:
+    return f"{Path(code.co_filename).stem}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class _Phase:
+    """A named set of functions, modules and directories, matched against sampled stacks and allocation tracebacks."""
+
+    def __init__(self, name: str, targets: Iterable[PhaseTarget]) -> None:
+        self.name = name
+        self.codes = set()
+        self.files = set()
+        self.prefixes: Tuple[str, ...] = ()
+        self.ranges: List[Tuple[str, int, int]] = []
+        for target in targets:
+            if isinstance(target, Path):
+                self.prefixes += (os.path.join(str(target), ''),)
+                continue
+            if inspect.ismodule(target):
+                self.files.add(target.__file__)
+                continue
+            code = inspect.unwrap(target).__code__
+            lines = [line for _, _, line in code.co_lines() if line]
+            self.codes.add(code)
+            first = min(lines, default=code.co_firstlineno)
+            self.ranges.append((code.co_filename, first, max(lines, default=first)))
+
+    def in_stack(self, stack: Sequence[CodeType]) -> bool:
+        return any(self._in_files(code.co_filename) or code in self.codes for code in stack)
+
+    def in_traceback(self, traceback: tracemalloc.Traceback) -> bool:
+        for frame in traceback:
+            if self._in_files(frame.filename):
+                return True
+            if any(frame.filename == name and first <= frame.lineno <= last for name, first, last in self.ranges):
+                return True
+        return False
+
+    def _in_files(self, filename: str) -> bool:
+        return filename in self.files or filename.startswith(self.prefixes)
+
+
+class SamplingProfiler:
+    """Samples thread stacks in the background; see the module docstring for how samples are weighted."""
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        phases: Optional[Dict[str, Iterable[PhaseTarget]]] = None,
+        memory_frames: int = DEFAULT_MEMORY_FRAMES,
+    ) -> None:
+        self.interval = interval
+        self.memory_frames = memory_frames
+        self.cpu_clock = _thread_cpu_ns(threading.get_ident()) is not None
+        self._phases = [_Phase(name, targets) for name, targets in (phases or {}).items()]
+        self._stacks: Dict[Tuple[str, Tuple[CodeType, ...]], int] = collections.Counter()
+        self._last_cpu: Dict[int, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self.elapsed = 0.0
+        self.samples = 0
+        self.sampler_seconds = 0.0
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak_memory = 0
+
+    def start(self) -> None:
+        if self.memory_frames and not tracemalloc.is_tracing():
+            tracemalloc.start(self.memory_frames)
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="tester-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.elapsed = time.perf_counter() - self._started
+        if tracemalloc.is_tracing():
+            self._peak_memory = tracemalloc.get_traced_memory()[1]
+            self._snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ))
+            tracemalloc.stop()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            names = {thread.ident: _thread_role(thread.name) for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                weight = self._weight(ident, frame)
+                if weight <= 0:
+                    continue
+                stack: List[CodeType] = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                self._stacks[(names.get(ident, "thread"), tuple(stack))] += weight
+            self.samples += 1
+            self.sampler_seconds += time.perf_counter() - started
+
+    def _weight(self, ident: int, frame: Any) -> int:
+        """Microseconds to charge to the thread's current stack."""
+        if not self.cpu_clock:
+            return 0 if frame.f_code.co_name in _BLOCKING_FUNCTIONS else int(self.interval * 1_000_000)
+        now = _thread_cpu_ns(ident)
+        if now is None:
+            return 0
+        previous = self._last_cpu.get(ident)
+        self._last_cpu[ident] = now
+        return (now - previous) // 1000 if previous is not None else 0
+
+    def write_collapsed(self, path: Path) -> None:
+        """Write the stacks in the collapsed format, one ``thread;frame;...;frame weight`` line each."""
+        lines: Dict[str, int] = collections.Counter()
+        for (thread, stack), weight in self._stacks.items():
+            lines[";".join([thread, *(_frame_label(code) for code in stack)])] += weight
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as handle:
+            for line, weight in sorted(lines.items()):
+                handle.write(f"{line} {weight}\n")
+
+    def total_microseconds(self) -> int:
+        return sum(self._stacks.values())
+
+    def phase_rows(self) -> List[Dict[str, Any]]:
+        """Inclusive CPU per phase, plus the bytes of end-of-run memory each phase allocated."""
+        total = self.total_microseconds()
+        traces = list(self._snapshot.traces) if self._snapshot else []
+        rows = []
+        for phase in self._phases:
+            weight = sum(value for (_, stack), value in self._stacks.items() if phase.in_stack(stack))
+            row = {
+                'Phase': phase.name,
+                'CPU (ms)': f"{weight / 1000:.1f}",
+                'Share': f"{weight / total:.1%}" if total else '-',
+            }
+            if self._snapshot:
+                row['Live memory (KiB)'] = f"{sum(t.size for t in traces if phase.in_traceback(t.traceback)) / 1024:.1f}"
+            rows.append(row)
+        return rows
+
+    def function_rows(self, limit: int = 15) -> List[Dict[str, Any]]:
+        """Functions by self CPU (the sample's innermost frame), highest first."""
+        total = self.total_microseconds()
+        self_time: Dict[str, int] = collections.Counter()
+        inclusive: Dict[str, int] = collections.Counter()
+        for (_, stack), weight in self._stacks.items():
+            if stack:
+                self_time[_frame_label(stack[-1])] += weight
+            for label in {_frame_label(code) for code in stack}:
+                inclusive[label] += weight
+        return [
+            {
+                'Function': label,
+                'Self (ms)': f"{weight / 1000:.1f}",
+                'Self share': f"{weight / total:.1%}" if total else '-',
+                'Inclusive (ms)': f"{inclusive[label] / 1000:.1f}",
+            }
+            for label, weight in self_time.most_common(limit)
+        ]
+
+    def memory_rows(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Allocation sites holding the most memory when profiling stopped."""
+        if not self._snapshot:
+            return []
+        return [
+            {
+                'Allocated at': f"{Path(stat.traceback[0].filename).name}:{stat.traceback[0].lineno}",
+                'Size (KiB)': f"{stat.size / 1024:.1f}",
+                'Blocks': stat.count,
+            }
+            for stat in self._snapshot.statistics("lineno")[:limit]
+        ]
+
+    def peak_memory(self) -> int:
+        return self._peak_memory
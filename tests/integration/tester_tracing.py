@@ -0,0 +1,171 @@
+"""Optional OpenTelemetry tracing for the backend switching tester.
+
+Each analyze operation becomes one trace: a root span covering POST to completion and a
+client span per HTTP attempt (the POST and every ``analyzeResults`` poll), annotated with the
+gateway's switching headers. The W3C ``traceparent`` of each HTTP span is sent with the request,
+and APIM forwards it unchanged to Document Intelligence, so gateway and backend telemetry can be
+joined to the same trace.
+
+OpenTelemetry is optional: without ``opentelemetry-sdk`` installed, :func:`create_tracer`
+returns ``None`` and the tester runs untraced.
+"""
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    trace = None
+
+OPERATION_OPTION = "trace_operation"
+SERVICE_NAME = "docintel-backend-switch-tester"
+
+# Response headers recorded on every HTTP span.
+_HEADER_ATTRIBUTES = {
+    "x-backend-used": "docintel.backend",
+    "x-request-duration": "docintel.request_duration_s",
+    "x-duration-threshold-exceeded": "docintel.threshold_exceeded",
+    "x-backend-switched": "docintel.backend_switched",
+    "x-switch-reason": "docintel.switch_reason",
+    "x-switch-lease": "docintel.switch_lease",
+    "x-named-value-update-status": "docintel.named_value_update_status",
+    "x-routing-mode": "docintel.routing_mode",
+}
+
+
+def otel_available() -> bool:
+    return trace is not None
+
+
+if trace is not None:
+
+    class JsonLinesSpanExporter(SpanExporter):
+        """Write finished spans to a file, one JSON object per line."""
+
+        def __init__(self, path: str) -> None:
+            self._handle = open(path, "a", encoding="utf-8")
+            self._lock = threading.Lock()
+
+        def export(self, spans) -> "SpanExportResult":
+            with self._lock:
+                for span in spans:
+                    self._handle.write(json.dumps(json.loads(span.to_json())) + "\n")
+                self._handle.flush()
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            with self._lock:
+                self._handle.close()
+
+
+class OperationTrace:
+    """The root span for one analyze operation plus helpers for its HTTP child spans."""
+
+    def __init__(self, tracer: "TesterTracer", name: str, attributes: Dict[str, Any]) -> None:
+        self._tracer = tracer
+        self.span = tracer.tracer.start_span(name, kind=SpanKind.INTERNAL, attributes=attributes)
+        self._context = trace.set_span_in_context(self.span)
+
+    def start_http_span(self, method: str, url: str):
+        span = self._tracer.tracer.start_span(
+            f"{method} {'analyzeResults' if method == 'GET' else ':analyze'}",
+            context=self._context,
+            kind=SpanKind.CLIENT,
+            attributes={"http.request.method": method, "url.full": url},
+        )
+        carrier: Dict[str, str] = {}
+        TraceContextTextMapPropagator().inject(carrier, context=trace.set_span_in_context(span))
+        return span, carrier
+
+    @staticmethod
+    def end_http_span(span, status_code: Optional[int], headers: Dict[str, str]) -> None:
+        if status_code is not None:
+            span.set_attribute("http.response.status_code", status_code)
+            if status_code >= 400:
+                span.set_status(Status(StatusCode.ERROR))
+        for header, attribute in _HEADER_ATTRIBUTES.items():
+            value = headers.get(header)
+            if value:
+                span.set_attribute(attribute, value)
+        span.end()
+
+    def finish(self, attributes: Dict[str, Any], error: bool = False) -> None:
+        for key, value in attributes.items():
+            if value is not None and value != "":
+                self.span.set_attribute(key, value)
+        if error:
+            self.span.set_status(Status(StatusCode.ERROR))
+        self.span.end()
+
+
+class TesterTracer:
+    """Owns the tracer provider and the exporter selected on the command line."""
+
+    def __init__(self, export: str) -> None:
+        provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+        kind, _, target = export.partition(":")
+        if kind == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            exporter = OTLPSpanExporter(endpoint=target or None)
+        elif kind == "file":
+            exporter = JsonLinesSpanExporter(target or f"traces_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+        else:
+            raise ValueError(f"Unsupported trace export '{export}'; use file:PATH or otlp[:URL]")
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        self.provider = provider
+        self.tracer = provider.get_tracer(__name__)
+
+    def start_operation(self, model_id: str, **attributes: Any) -> OperationTrace:
+        return OperationTrace(self, f"analyze {model_id}", {"docintel.model_id": model_id, **attributes})
+
+    def shutdown(self) -> None:
+        self.provider.shutdown()
+
+
+class TraceparentPolicy(SansIOHTTPPolicy):
+    """Opens a client span per HTTP attempt and sends its ``traceparent``.
+
+    The operation travels as the ``trace_operation`` request option, which the SDK passes to
+    both the initial POST and the poller, so polls land in the same trace as their POST.
+    """
+
+    def on_request(self, request) -> None:
+        operation = request.context.options.pop(OPERATION_OPTION, None) or request.context.get(OPERATION_OPTION)
+        if operation is None:
+            return
+        request.context[OPERATION_OPTION] = operation
+        span, carrier = operation.start_http_span(request.http_request.method, request.http_request.url)
+        request.http_request.headers.update(carrier)
+        request.context["trace_span"] = span
+
+    def on_response(self, request, response) -> None:
+        span = request.context.get("trace_span")
+        if span is None:
+            return
+        headers = {str(key).lower(): str(value) for key, value in response.http_response.headers.items()}
+        OperationTrace.end_http_span(span, response.http_response.status_code, headers)
+        request.context["trace_span"] = None
+
+    def on_exception(self, request) -> None:
+        span = request.context.get("trace_span")
+        if span is not None:
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
+            request.context["trace_span"] = None
+
+
+def create_tracer(export: Optional[str]) -> Optional[TesterTracer]:
+    """Return a tracer for ``export`` or ``None`` when tracing is off or OpenTelemetry is missing."""
+    if not export or not otel_available():
+        return None
+    return TesterTracer(export)
@@ -0,0 +1,216 @@
+"""Tuned HTTP transport for the backend switching tester, with connection counters.
+
+The default ``RequestsTransport`` keeps at most 10 connections per host, so replay and split runs
+with more operations in flight than that open and discard connections through the gateway. Here
+the pool is sized to the tester's concurrency, and TCP keep-alive probes hold idle connections open
+across the pauses between soak runs. Those pauses would otherwise let the load balancer in front of
+APIM drop connections after its ~4 minute idle timeout. Every transport counts the connections it
+opens and the time spent in TCP connect plus TLS handshake, so reuse through the gateway can be
+measured.
+
+HTTP/2 is optional: with ``httpx`` and ``h2`` installed, ``http2=True`` multiplexes every poll over
+a single connection per host. Without them :func:`create_transport` returns the requests transport.
+"""
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from azure.core.exceptions import ServiceRequestError, ServiceResponseError
+from azure.core.pipeline.transport import HttpTransport, RequestsTransport
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import httpx
+    import h2  # noqa: F401 - httpx needs it for http2=True
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    httpx = None
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_KEEPALIVE_IDLE = 60
+
+
+def http2_available() -> bool:
+    return httpx is not None
+
+
+class ConnectionStats:
+    """Requests sent, connections opened and handshake time for one transport."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.opened = 0
+        self.handshake_seconds = 0.0
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self, seconds: float) -> None:
+        with self._lock:
+            self.opened += 1
+            self.handshake_seconds += seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            requests_sent, opened, handshake = self.requests, self.opened, self.handshake_seconds
+        return {
+            'requests': requests_sent,
+            'opened': opened,
+            'reused': max(0, requests_sent - opened),
+            'handshake_ms_total': handshake * 1000,
+            'handshake_ms_mean': handshake * 1000 / opened if opened else 0.0,
+        }
+
+
+def _keepalive_options(idle: int) -> List[Tuple[int, int, int]]:
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    for name, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", max(1, idle // 4)), ("TCP_KEEPCNT", 4)):
+        if hasattr(socket, name):  # not every platform exposes the TCP keep-alive knobs
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools build connections that report their connect time to ``stats``."""
+
+    def __init__(self, stats: ConnectionStats, keepalive_idle: int, **kwargs: Any) -> None:
+        self._socket_options = HTTPConnection.default_socket_options + _keepalive_options(keepalive_idle)
+        self._pool_classes = {
+            scheme: self._counting_pool(pool_cls, connection_cls, stats)
+            for scheme, pool_cls, connection_cls in (
+                ("http", HTTPConnectionPool, HTTPConnection),
+                ("https", HTTPSConnectionPool, HTTPSConnection),
+            )
+        }
+        super().__init__(**kwargs)
+
+    @staticmethod
+    def _counting_pool(pool_cls: type, connection_cls: type, stats: ConnectionStats) -> type:
+        def connect(self) -> None:
+            started = time.perf_counter()
+            connection_cls.connect(self)
+            stats.record_connection(time.perf_counter() - started)
+
+        counting_connection = type(f"Counting{connection_cls.__name__}", (connection_cls,), {"connect": connect})
+        return type(f"Counting{pool_cls.__name__}", (pool_cls,), {"ConnectionCls": counting_connection})
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, socket_options=self._socket_options, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+
+class CountingRequestsTransport(RequestsTransport):
+    """RequestsTransport with a sized connection pool, TCP keep-alive and connection counters."""
+
+    def __init__(self, pool_size: int, keepalive_idle: int, stats: ConnectionStats) -> None:
+        session = requests.Session()
+        adapter = _CountingAdapter(stats, keepalive_idle, pool_connections=4, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        super().__init__(session=session, session_owner=True)
+        self.stats = stats
+
+    def send(self, request, **kwargs: Any):
+        self.stats.record_request()
+        return super().send(request, **kwargs)
+
+
+if httpx is not None:
+    # Private azure-core base class, only needed (and only imported) when the HTTP/2 transport exists.
+    from azure.core.rest._http_response_impl import HttpResponseImpl
+
+    class _HttpxTransportResponse(HttpResponseImpl):
+        def __init__(self, request, internal_response: "httpx.Response") -> None:
+            super().__init__(
+                request=request,
+                internal_response=internal_response,
+                status_code=internal_response.status_code,
+                headers=internal_response.headers,
+                reason=internal_response.reason_phrase,
+                content_type=internal_response.headers.get("content-type"),
+                stream_download_generator=None,
+            )
+            self._content = internal_response.content
+
+    class HttpxTransport(HttpTransport):
+        """Sends pipeline requests through an ``httpx.Client``, over HTTP/2 when the server offers it.
+
+        Responses are read in full; the tester never streams a download.
+        """
+
+        def __init__(self, pool_size: int, keepalive_idle: int, stats: ConnectionStats) -> None:
+            self.stats = stats
+            self._limits = httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=keepalive_idle
+            )
+            self._client: Optional["httpx.Client"] = None
+
+        def open(self) -> None:
+            if self._client is None:
+                self._client = httpx.Client(http2=True, limits=self._limits)
+
+        def close(self) -> None:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+        def __enter__(self) -> "HttpxTransport":
+            self.open()
+            return self
+
+        def __exit__(self, *args: Any) -> None:
+            self.close()
+
+        def _trace(self, event: str, started: List[float], tls: bool) -> None:
+            # httpcore reports connection setup only when a new connection is opened.
+            if event == "connection.connect_tcp.started":
+                started.append(time.perf_counter())
+            elif event.endswith(".failed"):
+                started.clear()
+            elif started and event == ("connection.start_tls.complete" if tls else "connection.connect_tcp.complete"):
+                self.stats.record_connection(time.perf_counter() - started.pop())
+
+        def send(self, request, **kwargs: Any):
+            self.open()
+            self.stats.record_request()
+            started: List[float] = []
+            tls = request.url.startswith("https://")
+            content = getattr(request, "content", None)
+            if content is None:
+                content = getattr(request, "data", None)
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            timeout = httpx.Timeout(
+                kwargs.pop("read_timeout", 300), connect=kwargs.pop("connection_timeout", 300)
+            )
+            try:
+                response = self._client.request(
+                    request.method,
+                    request.url,
+                    headers=dict(request.headers),
+                    content=content,
+                    timeout=timeout,
+                    extensions={"trace": lambda event, info: self._trace(event, started, tls)},
+                )
+            except (httpx.ConnectError, httpx.ConnectTimeout) as error:
+                raise ServiceRequestError(error, error=error) from error
+            except httpx.TransportError as error:
+                raise ServiceResponseError(error, error=error) from error
+            return _HttpxTransportResponse(request, response)
+
+
+def create_transport(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    keepalive_idle: int = DEFAULT_KEEPALIVE_IDLE,
+    http2: bool = False,
+) -> HttpTransport:
+    """Return a counting transport; HTTP/2 only when requested and ``httpx[http2]`` is installed."""
+    stats = ConnectionStats()
+    if http2 and http2_available():
+        return HttpxTransport(pool_size, keepalive_idle, stats)
+    return CountingRequestsTransport(pool_size, keepalive_idle, stats)